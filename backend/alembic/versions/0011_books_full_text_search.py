@@ -0,0 +1,36 @@
+"""add full-text search vector to books
+
+Revision ID: 0011_books_full_text_search
+Revises: 0010_audit_change_diff
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0011_books_full_text_search"
+down_revision = "0010_audit_change_diff"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated column, so every insert/update keeps it current without
+    # triggers. The 'simple' config does no stemming: author names and
+    # ISBNs must match as typed, and queries use prefix terms instead.
+    op.execute(
+        """
+        ALTER TABLE books ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(author, '')), 'B')
+            || setweight(to_tsvector('simple', coalesce(subject, '')), 'C')
+            || setweight(to_tsvector('simple', coalesce(isbn, '') || ' ' || coalesce(rack_number, '')), 'D')
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_books_search_vector")
+    op.execute("ALTER TABLE books DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,37 @@
+"""add pg_trgm indexes for substring and fuzzy search
+
+Revision ID: 0012_trigram_search_indexes
+Revises: 0011_books_full_text_search
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0012_trigram_search_indexes"
+down_revision = "0011_books_full_text_search"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = {
+    "books": ("title", "author", "isbn"),
+    "users": ("name", "email", "phone"),
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, columns in TRIGRAM_COLUMNS.items():
+        for column in columns:
+            op.create_index(
+                f"ix_{table}_{column}_trgm",
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+
+def downgrade() -> None:
+    for table, columns in TRIGRAM_COLUMNS.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}_trgm", table_name=table)
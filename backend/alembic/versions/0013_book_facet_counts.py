@@ -0,0 +1,44 @@
+"""add incrementally maintained book facet counts
+
+Revision ID: 0013_book_facet_counts
+Revises: 0012_trigram_search_indexes
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_book_facet_counts"
+down_revision = "0012_trigram_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "book_facet_counts",
+        sa.Column("facet", sa.String(length=32), primary_key=True),
+        sa.Column("value", sa.String(length=200), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index("ix_book_facet_counts_facet_count", "book_facet_counts", ["facet", "count"])
+    # Backfill; from here on app.crud.book_facets keeps the counts current.
+    op.execute(
+        """
+        INSERT INTO book_facet_counts (facet, value, count)
+        SELECT 'author', author, count(*) FROM books GROUP BY author
+        UNION ALL
+        SELECT 'subject', subject, count(*) FROM books WHERE subject IS NOT NULL AND subject <> '' GROUP BY subject
+        UNION ALL
+        SELECT 'decade', (published_year / 10 * 10)::text || 's', count(*)
+        FROM books WHERE published_year IS NOT NULL GROUP BY published_year / 10
+        UNION ALL
+        SELECT 'availability', CASE WHEN copies_available > 0 THEN 'available' ELSE 'unavailable' END, count(*)
+        FROM books GROUP BY copies_available > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_book_facet_counts_facet_count", table_name="book_facet_counts")
+    op.drop_table("book_facet_counts")
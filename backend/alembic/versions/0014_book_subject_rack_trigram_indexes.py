@@ -0,0 +1,32 @@
+"""add pg_trgm indexes for substring search on book subject and rack
+
+Revision ID: 0014_book_subject_rack_trgm
+Revises: 0013_book_facet_counts
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0014_book_subject_rack_trgm"
+down_revision = "0013_book_facet_counts"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("subject", "rack_number")
+
+
+def upgrade() -> None:
+    # Book search ORs substring ILIKE over these into the search_vector match.
+    for column in COLUMNS:
+        op.create_index(
+            f"ix_books_{column}_trgm",
+            "books",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for column in COLUMNS:
+        op.drop_index(f"ix_books_{column}_trgm", table_name="books")
@@ -26,17 +26,47 @@ class Settings(BaseSettings):
     jwt_secret_key: str = "set_in_env_for_dev_only"
     jwt_algorithm: str = "HS256"
     jwt_access_token_expires_minutes: int = 120
+    auth_token_cache_max_entries: int = 10000
+    auth_principal_cache_enabled: bool = True
+    auth_principal_cache_ttl_seconds: int = 30
+    password_bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_concurrency: int = 4
     default_user_password: str = "set_in_env_for_dev_only"
     auth_login_rate_limit_per_window: int = 20
     auth_login_rate_limit_window_seconds: int = 60
     audit_log_enabled: bool = True
+    audit_log_queue_max_size: int = 10000
+    audit_log_batch_size: int = 200
+    audit_log_flush_interval_seconds: float = 1.0
+    audit_log_overflow_policy: str = "drop_oldest"
     circulation_max_active_loans_per_user: int = 5
     circulation_max_loan_days: int = 21
     overdue_fine_per_day: float = 2.0
     api_cache_enabled: bool = True
     api_cache_ttl_seconds: int = 45
+    api_cache_stale_ttl_seconds: dict[str, int] = {"books:list": 15, "users:list": 15}
     api_cache_redis_url: str | None = None
+    api_cache_redis_max_connections: int = 50
+    api_cache_redis_timeout_seconds: float = 0.25
+    api_cache_redis_breaker_failures: int = 5
+    api_cache_redis_breaker_reset_seconds: float = 10.0
     api_cache_namespace: str = "nls:api-cache"
+    api_cache_generation_sync_seconds: float = 1.0
+    api_cache_max_entries: int = 5000
+    api_cache_max_bytes: int = 64 * 1024 * 1024
+    api_cache_sweep_interval_seconds: float = 30.0
+    api_cache_compress_min_bytes: int = 4096
+    api_cache_compress_level: int = 6
+    api_cache_singleflight_lock_seconds: float = 0.0
+    api_cache_pubsub_enabled: bool = True
+    api_cache_pubsub_retry_seconds: float = 5.0
+    suggest_index_enabled: bool = True
+    suggest_index_max_entries: int = 1_000_000
+    suggest_index_max_key_length: int = 48
+    suggest_index_max_words: int = 6
+    suggest_index_refresh_seconds: float = 300.0
+    suggest_index_stream_batch_size: int = 1000
 
 
 def _ensure_async_driver(url: str) -> str:
@@ -2,10 +2,26 @@ from sqlalchemy import String, cast, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import AuditLog
+from ..utils.pagination import Keyset
 from .base import SQLQueryRunner
 
 
 class CRUDAudit(SQLQueryRunner):
+    @staticmethod
+    def keyset(*, sort_by: str, sort_order: str) -> Keyset:
+        sort_columns = {
+            "created_at": AuditLog.created_at,
+            "status_code": AuditLog.status_code,
+            "duration_ms": AuditLog.duration_ms,
+            "id": AuditLog.id,
+        }
+        return Keyset(
+            column=sort_columns.get(sort_by, AuditLog.created_at),
+            tiebreaker=AuditLog.id,
+            descending=sort_order.lower() == "desc",
+            tiebreaker_descending=True,
+        )
+
     async def list_logs(
         self,
         db: AsyncSession,
@@ -18,6 +34,7 @@ class CRUDAudit(SQLQueryRunner):
         sort_order: str = "desc",
         skip: int,
         limit: int,
+        cursor: str | None = None,
     ) -> list[AuditLog]:
         stmt = select(AuditLog)
         if q:
@@ -41,15 +58,9 @@ class CRUDAudit(SQLQueryRunner):
             stmt = stmt.where(AuditLog.entity.in_(normalized_entities))
         if status_code is not None:
             stmt = stmt.where(AuditLog.status_code == status_code)
-        sort_columns = {
-            "created_at": AuditLog.created_at,
-            "status_code": AuditLog.status_code,
-            "duration_ms": AuditLog.duration_ms,
-            "id": AuditLog.id,
-        }
-        sort_column = sort_columns.get(sort_by, AuditLog.created_at)
-        order = sort_column.desc() if sort_order.lower() == "desc" else sort_column.asc()
-        stmt = stmt.order_by(order, AuditLog.id.desc()).offset(skip).limit(limit)
+        keyset = self.keyset(sort_by=sort_by, sort_order=sort_order)
+        stmt = keyset.apply(stmt, cursor, dialect=self.dialect_name(db))
+        stmt = stmt.offset(0 if cursor else skip).limit(limit)
         return await self.scalars_all(db, stmt)
 
 
@@ -3,7 +3,7 @@ from typing import Any, Generic, TypeVar
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..utils.audit_fields import stamp_created_updated_by
+from ..utils.audit_fields import publish_created, stamp_created_updated_by
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
@@ -11,6 +11,11 @@ UpdateSchemaType = TypeVar("UpdateSchemaType")
 
 
 class SQLQueryRunner:
+    @staticmethod
+    def dialect_name(db: AsyncSession) -> str:
+        bind = db.get_bind()
+        return bind.dialect.name
+
     async def execute(self, db: AsyncSession, statement: Any):
         return await db.execute(statement)
 
@@ -47,6 +52,7 @@ class CRUDBase(SQLQueryRunner, Generic[ModelType, CreateSchemaType, UpdateSchema
         db.add(obj)
         await db.flush()
         await db.refresh(obj)
+        publish_created(obj)
         return obj
 
     async def update(
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from sqlalchemy import String, and_, case, cast, event, func, insert, literal, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import Base
+from ..models import Book, BookFacetCount
+from .base import SQLQueryRunner
+
+FACETS = ("author", "subject", "decade", "availability")
+UPSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+FacetKey = tuple[str, str]
+
+
+def availability_bucket(copies_available: int) -> str:
+    return "available" if copies_available > 0 else "unavailable"
+
+
+def decade_label(published_year: int) -> str:
+    return f"{published_year // 10 * 10}s"
+
+
+def facet_keys(book: Any) -> set[FacetKey]:
+    keys = {("author", book.author), ("availability", availability_bucket(book.copies_available))}
+    if book.subject:
+        keys.add(("subject", book.subject))
+    if book.published_year is not None:
+        keys.add(("decade", decade_label(book.published_year)))
+    return keys
+
+
+def facet_expressions() -> dict[str, Any]:
+    # SQL twins of facet_keys, for counting a filtered catalog live.
+    return {
+        "author": Book.author,
+        "subject": Book.subject,
+        "decade": cast(Book.published_year // 10 * 10, String) + "s",
+        "availability": case((Book.copies_available > 0, "available"), else_="unavailable"),
+    }
+
+
+def backfill_statement() -> Any:
+    # The buckets of facet_keys, counted from scratch (as migration 0013 does).
+    present = {
+        "subject": and_(Book.subject.is_not(None), Book.subject != ""),
+        "decade": Book.published_year.is_not(None),
+    }
+    counts = []
+    for facet, expression in facet_expressions().items():
+        stmt = select(literal(facet, String).label("facet"), expression.label("value"), func.count(Book.id))
+        if facet in present:
+            stmt = stmt.where(present[facet])
+        counts.append(stmt.group_by(literal_column("value")))
+    return insert(BookFacetCount).from_select(["facet", "value", "count"], union_all(*counts))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _backfill_created_table(_metadata: Any, connection: Any, tables: Iterable[Any] = (), **_: Any) -> None:
+    # AUTO_CREATE_SCHEMA can add the table next to an existing catalog; start
+    # it from the current books rather than empty.
+    if BookFacetCount.__table__ in tables:
+        connection.execute(backfill_statement())
+
+
+class CRUDBookFacets(SQLQueryRunner):
+    async def apply(self, db: AsyncSession, before: Iterable[FacetKey], after: Iterable[FacetKey]) -> None:
+        # Moves one book between buckets inside the caller's transaction, so
+        # the counts commit or roll back with the book change itself. Keys are
+        # upserted in sorted order to keep row-lock order stable under
+        # concurrent writers.
+        before, after = set(before), set(after)
+        deltas = sorted([(key, -1) for key in before - after] + [(key, 1) for key in after - before])
+        if not deltas:
+            return
+        insert = UPSERTS[self.dialect_name(db)]
+        stmt = insert(BookFacetCount).values(
+            [{"facet": facet, "value": value, "count": delta} for (facet, value), delta in deltas]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BookFacetCount.facet, BookFacetCount.value],
+            set_={"count": BookFacetCount.count + stmt.excluded.count},
+        )
+        await self.execute(db, stmt)
+
+    async def availability_changed(self, db: AsyncSession, *, before: int, after: int) -> None:
+        await self.apply(
+            db,
+            {("availability", availability_bucket(before))},
+            {("availability", availability_bucket(after))},
+        )
+
+    async def counts(self, db: AsyncSession, *, limit: int) -> dict[str, list[dict[str, Any]]]:
+        result: dict[str, list[dict[str, Any]]] = {}
+        for facet in FACETS:
+            rows = await self.rows_all(
+                db,
+                select(BookFacetCount.value, BookFacetCount.count)
+                .where(BookFacetCount.facet == facet, BookFacetCount.count > 0)
+                .order_by(BookFacetCount.count.desc(), BookFacetCount.value.asc())
+                .limit(limit),
+            )
+            result[facet] = [{"value": value, "count": count} for value, count in rows]
+        return result
+
+    async def live_counts(self, db: AsyncSession, stmt: Any, *, limit: int) -> dict[str, list[dict[str, Any]]]:
+        # `stmt` is a filtered select(Book); each facet is one GROUP BY over it.
+        # Grouping by the output label keeps Postgres from seeing the bound
+        # literals in the SELECT and GROUP BY copies as different expressions.
+        result: dict[str, list[dict[str, Any]]] = {}
+        for facet, expression in facet_expressions().items():
+            rows = await self.rows_all(
+                db,
+                stmt.with_only_columns(expression.label("value"), func.count(Book.id).label("count"))
+                .where(expression.is_not(None))
+                .group_by(literal_column("value"))
+                .order_by(literal_column("count").desc(), literal_column("value").asc())
+                .limit(limit),
+            )
+            result[facet] = [{"value": value, "count": count} for value, count in rows]
+        return result
+
+
+crud_book_facets = CRUDBookFacets()
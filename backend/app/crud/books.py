@@ -1,12 +1,28 @@
 from __future__ import annotations
 
-from sqlalchemy import func, or_, select
+import re
+from typing import Any
+
+from sqlalchemy import case, func, literal_column, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Book, Loan
 from ..schemas.books import BookCreate, BookUpdate
-from ..utils.audit_fields import stamp_created_updated_by
+from ..utils.audit_fields import publish_created, stamp_created_updated_by
+from ..utils.pagination import Keyset
+from ..utils.suggest_index import book_suggestions, book_values, index_after_commit
 from .base import CRUDBase
+from .book_facets import crud_book_facets, facet_keys
+from .search import fuzzy_filter, substring_filter
+
+SEARCH_TOKEN = re.compile(r"\w+")
+SEARCH_COLUMNS = (Book.title, Book.author, Book.isbn, Book.subject, Book.rack_number)
+
+
+def prefix_tsquery(q: str) -> str | None:
+    # Tokens are \w+ only, so no tsquery operators from user input survive.
+    terms = [f"{token}:*" for token in SEARCH_TOKEN.findall(q.lower())]
+    return " & ".join(terms) or None
 
 
 class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
@@ -49,33 +65,67 @@ class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
         )
         return await self.scalar_one_or_none(db, stmt)
 
-    async def list(
+    @staticmethod
+    def apply_search(stmt: Any, q: str, dialect: str, *, fuzzy: bool = False) -> tuple[Any, Any]:
+        # Returns the filtered statement and a relevance expression (higher
+        # is better). Every dialect keeps substring ILIKE matching. Postgres
+        # answers it from the trigram indexes and also matches word prefixes
+        # against the GIN-indexed search_vector, ranked with ts_rank (so
+        # mid-word fragments still match, ranked last), or with fuzzy=True
+        # matches by trigram similarity; elsewhere (SQLite in tests) the score
+        # is field-weighted.
+        if fuzzy and dialect == "postgresql":
+            condition, score = fuzzy_filter((Book.title, Book.author, Book.isbn), q)
+            return stmt.where(condition), score
+        substring = substring_filter(SEARCH_COLUMNS, q)
+        terms = prefix_tsquery(q) if dialect == "postgresql" else None
+        if terms:
+            vector = literal_column("books.search_vector")
+            query = func.to_tsquery(literal_column("'simple'::regconfig"), terms)
+            return stmt.where(or_(vector.op("@@")(query), substring)), func.ts_rank(vector, query)
+        like = f"%{q}%"
+        stmt = stmt.where(substring)
+        relevance = case(
+            (Book.title.ilike(like), 4),
+            (Book.author.ilike(like), 3),
+            (Book.subject.ilike(like), 2),
+            else_=1,
+        )
+        return stmt, relevance
+
+    @staticmethod
+    def keyset(*, q: str | None, fuzzy: bool, sort_by: str, sort_order: str) -> Keyset | None:
+        if (sort_by == "relevance" or fuzzy) and q:
+            return None
+        sort_columns = {
+            "title": Book.title,
+            "author": Book.author,
+            "subject": Book.subject,
+            "available": Book.copies_available,
+            "id": Book.id,
+        }
+        return Keyset(
+            column=sort_columns.get(sort_by, Book.title),
+            tiebreaker=Book.id,
+            descending=sort_order.lower() == "desc",
+        )
+
+    def filtered(
         self,
         db: AsyncSession,
         *,
         q: str | None,
+        fuzzy: bool = False,
         author: list[str] | None = None,
         subject: list[str] | None = None,
         availability: list[str] | None = None,
-        published_year: int | None,
-        available_only: bool,
-        sort_by: str = "title",
-        sort_order: str = "asc",
-        skip: int = 0,
-        limit: int = 100,
-    ) -> list[Book]:
+        published_year: int | None = None,
+        available_only: bool = False,
+    ) -> tuple[Any, Any]:
         stmt = select(Book)
+        relevance = None
         if q:
-            like = f"%{q}%"
-            stmt = stmt.where(
-                or_(
-                    Book.title.ilike(like),
-                    Book.author.ilike(like),
-                    Book.isbn.ilike(like),
-                    Book.subject.ilike(like),
-                    Book.rack_number.ilike(like),
-                )
-            )
+            stmt, relevance = self.apply_search(stmt, q, self.dialect_name(db), fuzzy=fuzzy)
         normalized_authors = [value.strip().lower() for value in (author or []) if value.strip()]
         if normalized_authors:
             stmt = stmt.where(func.lower(Book.author).in_(normalized_authors))
@@ -89,18 +139,72 @@ class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
             stmt = stmt.where(Book.copies_available > 0)
         elif normalized_availability == {"unavailable"}:
             stmt = stmt.where(Book.copies_available <= 0)
+        return stmt, relevance
 
-        sort_columns = {
-            "title": Book.title,
-            "author": Book.author,
-            "subject": Book.subject,
-            "available": Book.copies_available,
-            "id": Book.id,
-        }
-        sort_column = sort_columns.get(sort_by, Book.title)
-        order = sort_column.desc() if sort_order.lower() == "desc" else sort_column.asc()
+    async def facets(
+        self,
+        db: AsyncSession,
+        *,
+        q: str | None,
+        fuzzy: bool = False,
+        author: list[str] | None = None,
+        subject: list[str] | None = None,
+        availability: list[str] | None = None,
+        published_year: int | None = None,
+        available_only: bool = False,
+        limit: int = 50,
+    ) -> dict[str, list[dict[str, Any]]]:
+        if not (q or author or subject or availability or available_only) and published_year is None:
+            # The whole catalog: read the maintained aggregate, not the books.
+            return await crud_book_facets.counts(db, limit=limit)
+        stmt, _ = self.filtered(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            author=author,
+            subject=subject,
+            availability=availability,
+            published_year=published_year,
+            available_only=available_only,
+        )
+        return await crud_book_facets.live_counts(db, stmt, limit=limit)
 
-        stmt = stmt.order_by(order, Book.id.asc()).offset(skip).limit(limit)
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        q: str | None,
+        fuzzy: bool = False,
+        author: list[str] | None = None,
+        subject: list[str] | None = None,
+        availability: list[str] | None = None,
+        published_year: int | None,
+        available_only: bool,
+        sort_by: str = "title",
+        sort_order: str = "asc",
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> list[Book]:
+        stmt, relevance = self.filtered(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            author=author,
+            subject=subject,
+            availability=availability,
+            published_year=published_year,
+            available_only=available_only,
+        )
+        keyset = self.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+        if keyset is None:
+            if cursor:
+                raise ValueError("Cursor pagination is not available for relevance ordering.")
+            # Best match first regardless of sort_order; ties by title.
+            stmt = stmt.order_by(relevance.desc(), Book.title.asc(), Book.id.asc())
+        else:
+            stmt = keyset.apply(stmt, cursor, dialect=self.dialect_name(db))
+        stmt = stmt.offset(0 if cursor else skip).limit(limit)
         return await self.scalars_all(db, stmt)
 
     async def create(self, db: AsyncSession, *, obj_in: BookCreate) -> Book:
@@ -118,9 +222,13 @@ class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
         db.add(book)
         await db.flush()
         await db.refresh(book)
+        await crud_book_facets.apply(db, (), facet_keys(book))
+        index_after_commit(db, book_suggestions, book.id, book_values(book))
+        publish_created(book)
         return book
 
     async def update(self, db: AsyncSession, *, db_obj: Book, obj_in: BookUpdate) -> Book:
+        before = facet_keys(db_obj)
         updates = obj_in.model_dump(exclude_unset=True)
         for key in ("title", "author", "subject", "rack_number", "isbn"):
             if key not in updates:
@@ -144,7 +252,16 @@ class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
         stamp_created_updated_by(db_obj, is_create=False)
         await db.flush()
         await db.refresh(db_obj)
+        await crud_book_facets.apply(db, before, facet_keys(db_obj))
+        index_after_commit(db, book_suggestions, db_obj.id, book_values(db_obj))
         return db_obj
 
+    async def remove(self, db: AsyncSession, *, obj_id: int) -> Book | None:
+        book = await super().remove(db, obj_id=obj_id)
+        if book is not None:
+            await crud_book_facets.apply(db, facet_keys(book), ())
+            index_after_commit(db, book_suggestions, obj_id, None)
+        return book
+
 
 crud_books = CRUDBook(Book)
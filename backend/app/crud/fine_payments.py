@@ -1,12 +1,13 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import String, asc, cast, desc, func, or_, select
+from sqlalchemy import String, cast, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 from ..models import Book, FinePayment, Loan, User
 from ..schemas.fine_payments import FinePaymentCreate, FineSummaryOut
-from ..utils.audit_fields import stamp_created_updated_by
+from ..utils.audit_fields import publish_created, stamp_created_updated_by
+from ..utils.pagination import Keyset
 from .base import SQLQueryRunner
 
 
@@ -83,6 +84,7 @@ class CRUDFinePayments(SQLQueryRunner):
         db.add(payment)
         await db.flush()
         await db.refresh(payment)
+        publish_created(payment)
         return payment
 
     async def list_for_loan(self, db: AsyncSession, *, loan_id: int) -> list[FinePayment]:
@@ -93,6 +95,27 @@ class CRUDFinePayments(SQLQueryRunner):
             .order_by(FinePayment.collected_at.desc(), FinePayment.id.desc()),
         )
 
+    @staticmethod
+    def keyset(*, sort_by: str, sort_order: str) -> Keyset:
+        # Ledger rows are mappings keyed by these names.
+        order_fields = {
+            "collected_at": FinePayment.collected_at,
+            "amount": FinePayment.amount,
+            "loan_id": FinePayment.loan_id,
+            "user_name": User.name,
+            "book_title": Book.title,
+            "payment_mode": FinePayment.payment_mode,
+            "id": FinePayment.id,
+        }
+        field = sort_by if sort_by in order_fields else "collected_at"
+        return Keyset(
+            column=order_fields[field],
+            tiebreaker=FinePayment.id,
+            descending=sort_order.lower() != "asc",
+            tiebreaker_descending=True,
+            field=field,
+        )
+
     async def list_ledger(
         self,
         db: AsyncSession,
@@ -107,6 +130,7 @@ class CRUDFinePayments(SQLQueryRunner):
         sort_order: str = "desc",
         skip: int = 0,
         limit: int = 100,
+        cursor: str | None = None,
     ) -> list[dict]:
         statement = (
             select(
@@ -165,19 +189,9 @@ class CRUDFinePayments(SQLQueryRunner):
         if collected_to is not None:
             statement = statement.where(FinePayment.collected_at <= collected_to)
 
-        order_fields = {
-            "collected_at": FinePayment.collected_at,
-            "amount": FinePayment.amount,
-            "loan_id": FinePayment.loan_id,
-            "user_name": User.name,
-            "book_title": Book.title,
-            "payment_mode": FinePayment.payment_mode,
-            "id": FinePayment.id,
-        }
-        order_column = order_fields.get(sort_by, FinePayment.collected_at)
-        order_func = asc if sort_order.lower() == "asc" else desc
-        statement = statement.order_by(order_func(order_column), desc(FinePayment.id))
-        statement = statement.offset(skip).limit(limit)
+        keyset = self.keyset(sort_by=sort_by, sort_order=sort_order)
+        statement = keyset.apply(statement, cursor, dialect=self.dialect_name(db))
+        statement = statement.offset(0 if cursor else skip).limit(limit)
 
         rows = await self.rows_all(db, statement)
         return [dict(row._mapping) for row in rows]
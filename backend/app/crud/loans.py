@@ -2,16 +2,19 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import String, cast, func, or_, select, update
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Book, LibraryPolicy, Loan, User
 from ..schemas.loans import LoanCreate, LoanUpdate
-from ..utils.audit_fields import stamp_created_updated_by
-from ..utils.request_context import get_actor_user_id
+from ..utils.audit_fields import publish_created, stamp_created_updated_by
+from ..utils.pagination import Keyset
+from ..utils.request_context import get_actor_user_id, publish_changed_entity
 from .base import SQLQueryRunner
+from .book_facets import crud_book_facets
 from .fine_payments import crud_fine_payments
 from .policies import crud_policies
+from .search import fuzzy_filter, substring_filter
 
 
 class CRUDLoan(SQLQueryRunner):
@@ -77,22 +80,45 @@ class CRUDLoan(SQLQueryRunner):
             db,
             update(Book)
             .where(Book.id == payload.book_id, Book.copies_available > 0)
-            .values(copies_available=Book.copies_available - 1),
+            .values(copies_available=Book.copies_available - 1)
+            .returning(Book.copies_available),
         )
-        if result.rowcount == 0:
+        remaining = result.scalar_one_or_none()
+        if remaining is None:
             book = await db.get(Book, payload.book_id)
             if not book:
                 raise ValueError("Book not found")
             raise ValueError("Book is not currently available")
 
+        publish_changed_entity("books", payload.book_id)
+        await crud_book_facets.availability_changed(db, before=remaining + 1, after=remaining)
         loan = Loan(book_id=payload.book_id, user_id=user.id, due_at=due_at)
         stamp_created_updated_by(loan, is_create=True)
         db.add(loan)
         await db.flush()
         await db.refresh(loan)
+        publish_created(loan)
         return loan
 
+    async def _restock(self, db: AsyncSession, book_id: int) -> None:
+        result = await self.execute(
+            db,
+            update(Book)
+            .where(Book.id == book_id)
+            .values(copies_available=Book.copies_available + 1)
+            .returning(Book.copies_available),
+        )
+        available = result.scalar_one_or_none()
+        if available is not None:
+            await crud_book_facets.availability_changed(db, before=available - 1, after=available)
+
     async def return_loan(self, db: AsyncSession, loan_id: int) -> Loan:
+        # Load first so the loan is in the session before the guarded UPDATE;
+        # audit change capture baselines identity-map instances at that point.
+        loan = await db.get(Loan, loan_id)
+        if loan is None:
+            raise ValueError("Loan not found")
+
         now = datetime.now(timezone.utc)
         actor_user_id = get_actor_user_id()
         update_values: dict[str, object] = {"returned_at": now}
@@ -108,24 +134,32 @@ class CRUDLoan(SQLQueryRunner):
         )
         returned = result.first()
         if not returned:
-            loan = await db.get(Loan, loan_id)
-            if not loan:
-                raise ValueError("Loan not found")
             raise ValueError("Loan already returned")
 
         book_id = int(returned[0])
-        await self.execute(
-            db,
-            update(Book).where(Book.id == book_id).values(copies_available=Book.copies_available + 1),
-        )
+        publish_changed_entity("books", book_id)
+        await self._restock(db, book_id)
         await db.flush()
-
-        loan = await db.get(Loan, loan_id)
-        if loan is None:
-            raise ValueError("Loan not found")
         await db.refresh(loan)
         return loan
 
+    @staticmethod
+    def keyset(*, q: str | None, fuzzy: bool, sort_by: str, sort_order: str) -> Keyset | None:
+        if fuzzy and q:
+            return None
+        sort_columns = {
+            "borrowed_at": Loan.borrowed_at,
+            "due_at": Loan.due_at,
+            "returned_at": Loan.returned_at,
+            "id": Loan.id,
+        }
+        return Keyset(
+            column=sort_columns.get(sort_by, Loan.borrowed_at),
+            tiebreaker=Loan.id,
+            descending=sort_order.lower() == "desc",
+            tiebreaker_descending=True,
+        )
+
     async def list(
         self,
         db: AsyncSession,
@@ -135,29 +169,29 @@ class CRUDLoan(SQLQueryRunner):
         book_id: int | None,
         overdue_only: bool,
         q: str | None = None,
+        fuzzy: bool = False,
         sort_by: str = "borrowed_at",
         sort_order: str = "desc",
         skip: int = 0,
         limit: int = 100,
+        cursor: str | None = None,
     ) -> list[Loan]:
         await self._get_policy(db)
         stmt = select(Loan)
+        similarity = None
         if q:
-            like = f"%{q}%"
             stmt = stmt.join(Book, Book.id == Loan.book_id).join(User, User.id == Loan.user_id)
-            stmt = stmt.where(
-                or_(
-                    cast(Loan.id, String).ilike(like),
-                    cast(Loan.book_id, String).ilike(like),
-                    cast(Loan.user_id, String).ilike(like),
-                    Book.title.ilike(like),
-                    Book.author.ilike(like),
-                    Book.isbn.ilike(like),
-                    User.name.ilike(like),
-                    User.email.ilike(like),
-                    User.phone.ilike(like),
-                )
-            )
+            columns = (Book.title, Book.author, Book.isbn, User.name, User.email, User.phone)
+            if fuzzy and self.dialect_name(db) == "postgresql":
+                condition, similarity = fuzzy_filter(columns, q)
+            else:
+                condition = substring_filter(columns, q)
+            # Ids match exactly; casting them to text for ILIKE defeats every index.
+            term = q.strip()
+            if term.isdigit():
+                loan_ref = int(term)
+                condition = or_(condition, Loan.id == loan_ref, Loan.book_id == loan_ref, Loan.user_id == loan_ref)
+            stmt = stmt.where(condition)
         if active is True:
             stmt = stmt.where(Loan.returned_at.is_(None))
         if active is False:
@@ -168,15 +202,17 @@ class CRUDLoan(SQLQueryRunner):
             stmt = stmt.where(Loan.book_id == book_id)
         if overdue_only:
             stmt = stmt.where(Loan.returned_at.is_(None), Loan.due_at < datetime.now(timezone.utc))
-        sort_columns = {
-            "borrowed_at": Loan.borrowed_at,
-            "due_at": Loan.due_at,
-            "returned_at": Loan.returned_at,
-            "id": Loan.id,
-        }
-        sort_column = sort_columns.get(sort_by, Loan.borrowed_at)
-        order = sort_column.desc() if sort_order.lower() == "desc" else sort_column.asc()
-        stmt = stmt.order_by(order, Loan.id.desc()).offset(skip).limit(limit)
+        keyset = self.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+        if keyset is None:
+            if cursor:
+                raise ValueError("Cursor pagination is not available for fuzzy search.")
+            if similarity is not None:
+                stmt = stmt.order_by(similarity.desc())
+            ordering = self.keyset(q=None, fuzzy=False, sort_by=sort_by, sort_order=sort_order)
+            stmt = stmt.order_by(*ordering.order_by(self.dialect_name(db)))
+        else:
+            stmt = keyset.apply(stmt, cursor, dialect=self.dialect_name(db))
+        stmt = stmt.offset(0 if cursor else skip).limit(limit)
         loans = await self.scalars_all(db, stmt)
         loan_ids = [loan.id for loan in loans]
         paid_map = await crud_fine_payments.paid_amounts_by_loans(db, loan_ids)
@@ -213,12 +249,8 @@ class CRUDLoan(SQLQueryRunner):
             raise ValueError("Loan not found")
 
         if loan.returned_at is None:
-            await self.execute(
-                db,
-                update(Book)
-                .where(Book.id == loan.book_id)
-                .values(copies_available=Book.copies_available + 1),
-            )
+            publish_changed_entity("books", loan.book_id)
+            await self._restock(db, loan.book_id)
 
         await db.delete(loan)
         await db.flush()
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from sqlalchemy import func, literal, or_
+
+
+def substring_filter(columns: Sequence[Any], q: str) -> Any:
+    like = f"%{q}%"
+    return or_(*(column.ilike(like) for column in columns))
+
+
+def fuzzy_filter(columns: Sequence[Any], q: str) -> tuple[Any, Any]:
+    # Postgres only (pg_trgm, migration 0012). `q <% column` holds when some
+    # word of the column is trigram-similar to q, which tolerates typos, and
+    # like ILIKE it is answered from the gin_trgm_ops indexes. Substring
+    # matches are kept for fragments too short to share trigrams.
+    like = f"%{q}%"
+    term = literal(q)
+    condition = or_(*(or_(column.ilike(like), term.op("<%")(column)) for column in columns))
+    score = func.greatest(*(func.word_similarity(term, func.coalesce(column, "")) for column in columns))
+    return condition, score
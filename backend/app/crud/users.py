@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 from ..models import Book, FinePayment, Loan, User
 from ..schemas.users import UserCreate, UserUpdate
-from ..utils.audit_fields import stamp_created_updated_by
-from ..utils.security import hash_password
+from ..utils.audit_fields import publish_created, stamp_created_updated_by
+from ..utils.pagination import Keyset
+from ..utils.principal_cache import principal_cache
+from ..utils.security import password_service
+from ..utils.suggest_index import index_after_commit, user_suggestions, user_values
 from .base import CRUDBase
+from .search import fuzzy_filter, substring_filter
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
@@ -48,33 +52,58 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             ),
         )
 
+    @staticmethod
+    def keyset(*, q: str | None, fuzzy: bool, sort_by: str, sort_order: str) -> Keyset | None:
+        if fuzzy and q:
+            return None
+        sort_columns = {
+            "name": User.name,
+            "role": User.role,
+            "id": User.id,
+        }
+        return Keyset(
+            column=sort_columns.get(sort_by, User.name),
+            tiebreaker=User.id,
+            descending=sort_order.lower() == "desc",
+        )
+
     async def list(
         self,
         db: AsyncSession,
         *,
         q: str | None = None,
+        fuzzy: bool = False,
         role: list[str] | None = None,
         sort_by: str = "name",
         sort_order: str = "asc",
         skip: int = 0,
         limit: int = 100,
+        cursor: str | None = None,
     ) -> list[User]:
         stmt = select(User)
+        similarity = None
         if q:
-            like = f"%{q}%"
-            stmt = stmt.where(or_(User.name.ilike(like), User.email.ilike(like), User.phone.ilike(like)))
+            columns = (User.name, User.email, User.phone)
+            if fuzzy and self.dialect_name(db) == "postgresql":
+                condition, similarity = fuzzy_filter(columns, q)
+                stmt = stmt.where(condition)
+            else:
+                stmt = stmt.where(substring_filter(columns, q))
         normalized_roles = [value.strip().lower() for value in (role or []) if value.strip()]
         if normalized_roles:
             stmt = stmt.where(func.lower(User.role).in_(normalized_roles))
 
-        sort_columns = {
-            "name": User.name,
-            "role": User.role,
-            "id": User.id,
-        }
-        sort_column = sort_columns.get(sort_by, User.name)
-        order = sort_column.desc() if sort_order.lower() == "desc" else sort_column.asc()
-        stmt = stmt.order_by(order, User.id.asc()).offset(skip).limit(limit)
+        keyset = self.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+        if keyset is None:
+            if cursor:
+                raise ValueError("Cursor pagination is not available for fuzzy search.")
+            if similarity is not None:
+                stmt = stmt.order_by(similarity.desc())
+            ordering = self.keyset(q=None, fuzzy=False, sort_by=sort_by, sort_order=sort_order)
+            stmt = stmt.order_by(*ordering.order_by(self.dialect_name(db)))
+        else:
+            stmt = keyset.apply(stmt, cursor, dialect=self.dialect_name(db))
+        stmt = stmt.offset(0 if cursor else skip).limit(limit)
         return await self.scalars_all(db, stmt)
 
     async def list_loans_with_books(self, db: AsyncSession, *, user_id: int) -> list[tuple[Loan, Book, float]]:
@@ -153,13 +182,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             name=obj_in.name.strip(),
             email=obj_in.email.strip() if obj_in.email else None,
             phone=obj_in.phone.strip() if obj_in.phone else None,
-            password_hash=hash_password(raw_password),
+            password_hash=await password_service.hash(raw_password),
             role=obj_in.role,
         )
         stamp_created_updated_by(user, is_create=True)
         db.add(user)
         await db.flush()
         await db.refresh(user)
+        index_after_commit(db, user_suggestions, user.id, user_values(user))
+        publish_created(user)
         return user
 
     async def update(self, db: AsyncSession, *, db_obj: User, obj_in: UserUpdate) -> User:
@@ -167,13 +198,21 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if "password" in updates:
             password = updates.pop("password")
             if password:
-                db_obj.password_hash = hash_password(password)
+                db_obj.password_hash = await password_service.hash(password)
         for key, value in updates.items():
             setattr(db_obj, key, value)
         stamp_created_updated_by(db_obj, is_create=False)
         await db.flush()
         await db.refresh(db_obj)
+        principal_cache.invalidate_after_commit(db, db_obj.id)
+        index_after_commit(db, user_suggestions, db_obj.id, user_values(db_obj))
         return db_obj
 
+    async def remove(self, db: AsyncSession, *, obj_id: int) -> User | None:
+        user = await super().remove(db, obj_id=obj_id)
+        principal_cache.invalidate_after_commit(db, obj_id)
+        index_after_commit(db, user_suggestions, obj_id, None)
+        return user
+
 
 crud_users = CRUDUser(User)
@@ -1,3 +1,4 @@
+from sqlalchemy import DDL, Index, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -8,6 +9,24 @@ class Base(DeclarativeBase):
     pass
 
 
+# Trigram indexes and fuzzy search (migration 0012) need pg_trgm.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def trigram_index(table: str, column: str) -> Index:
+    # Lets Postgres answer ILIKE '%q%' and pg_trgm similarity from an index.
+    return Index(
+        f"ix_{table}_{column}_trgm",
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+
 engine = create_async_engine(
     settings.database_url,
     pool_pre_ping=True,
@@ -8,13 +8,9 @@ from .crud.users import crud_users
 from .db import get_db
 from .models import User
 from .schemas.users import UserCreate
-from .utils.request_context import (
-    get_actor_role,
-    get_actor_user,
-    get_actor_user_id,
-    set_actor_user,
-)
-from .utils.security import decode_access_token
+from .utils.principal_cache import Principal, principal_cache
+from .utils.request_context import get_actor_claims, get_actor_user, set_actor_user
+from .utils.security import verify_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
@@ -28,36 +24,24 @@ def _auth_error() -> HTTPException:
     )
 
 
-async def _resolve_user_from_token(db: AsyncSession, token: str) -> User:
-    context_user_id = get_actor_user_id()
-    context_role = get_actor_role()
+async def _resolve_user_from_token(db: AsyncSession, token: str) -> User | Principal:
+    # The request pipeline already verified the bearer token; reuse its claims.
+    claims = get_actor_claims()
+    if claims is None:
+        try:
+            claims = verify_access_token(token)
+        except ValueError as exc:
+            raise _auth_error() from exc
+
+    user_id = claims["uid"]
     cached_user = get_actor_user()
-    if (
-        isinstance(cached_user, User)
-        and isinstance(context_user_id, int)
-        and cached_user.id == context_user_id
-    ):
+    if isinstance(cached_user, (User, Principal)) and cached_user.id == user_id:
         return cached_user
 
-    if isinstance(context_user_id, int):
-        user = await db.get(User, context_user_id)
-        if user and (context_role is None or user.role == context_role):
-            set_actor_user(user)
-            return user
-
-    try:
-        payload = decode_access_token(token)
-    except ValueError as exc:
-        raise _auth_error() from exc
-
-    user_id = payload.get("uid")
-    if not isinstance(user_id, int):
-        raise _auth_error()
-
-    user = await db.get(User, user_id)
+    user = await principal_cache.resolve(db, user_id)
     if not user:
         raise _auth_error()
-    if isinstance(context_user_id, int):
+    if get_actor_claims() is not None:
         set_actor_user(user)
     return user
 
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+import logging
+import re
+from time import monotonic
+from typing import Any, Sequence
+
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .utils.api_cache import api_cache
+from .utils.audit_changes import (
+    select_primary_change,
+    start_change_recording,
+    stop_change_recording,
+    table_for_segment,
+)
+from .utils.audit_sink import audit_log_writer
+from .utils.request_context import (
+    begin_changed_entity_capture,
+    begin_created_entity_capture,
+    end_changed_entity_capture,
+    end_created_entity_capture,
+    get_changed_entities,
+    get_created_entity_id,
+    reset_actor_context,
+    set_actor_context,
+)
+from .utils.security import verify_access_token
+
+audit_logger = logging.getLogger("audit")
+login_attempts: dict[str, deque[float]] = defaultdict(deque)
+MUTATING_METHODS = {"POST", "PATCH", "PUT", "DELETE"}
+
+
+@dataclass
+class PipelineContext:
+    method: str
+    path: str
+    headers: dict[str, str]
+    client_host: str
+    started_at: float = field(default_factory=monotonic)
+    status_code: int | None = None
+    actor_user_id: int | None = None
+    actor_role: str | None = None
+    state: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_mutation(self) -> bool:
+        return self.method in MUTATING_METHODS
+
+
+# A stage may short-circuit from on_request by returning a response. Stages
+# that were entered get on_response_start before the response headers go out
+# and on_complete (in reverse order) once the downstream app has returned.
+class PipelineStage:
+    async def on_request(self, ctx: PipelineContext) -> Response | None:
+        return None
+
+    async def on_response_start(self, ctx: PipelineContext) -> None:
+        return None
+
+    async def on_complete(self, ctx: PipelineContext) -> None:
+        return None
+
+
+class RequestPipelineMiddleware:
+    def __init__(self, app: ASGIApp, stages: Sequence[PipelineStage]) -> None:
+        self.app = app
+        self.stages = list(stages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ctx = PipelineContext(
+            method=scope["method"],
+            path=scope["path"],
+            headers={key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]},
+            client_host=client[0] if client else "unknown",
+        )
+        entered: list[PipelineStage] = []
+
+        async def send_with_hooks(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                ctx.status_code = message["status"]
+                for stage in entered:
+                    await stage.on_response_start(ctx)
+            await send(message)
+
+        try:
+            short_circuit: Response | None = None
+            for stage in self.stages:
+                entered.append(stage)
+                short_circuit = await stage.on_request(ctx)
+                if short_circuit is not None:
+                    break
+            if short_circuit is not None:
+                await short_circuit(scope, receive, send_with_hooks)
+            else:
+                await self.app(scope, receive, send_with_hooks)
+        finally:
+            for stage in reversed(entered):
+                await stage.on_complete(ctx)
+
+
+def _extract_claims_from_header(auth_header: str) -> dict[str, Any] | None:
+    if not auth_header.startswith("Bearer "):
+        return None
+    try:
+        return verify_access_token(auth_header.removeprefix("Bearer ").strip())
+    except ValueError:
+        return None
+
+
+def _extract_entity_from_path(path: str) -> tuple[str | None, int | None]:
+    segments = [segment for segment in path.strip("/").split("/") if segment]
+    if not segments:
+        return None, None
+    entity = segments[0].lower()
+    entity_id = int(segments[1]) if len(segments) > 1 and segments[1].isdigit() else None
+    return entity, entity_id
+
+
+class ActorContextStage(PipelineStage):
+    async def on_request(self, ctx: PipelineContext) -> Response | None:
+        # The single decode for this request; deps read the claims from context.
+        claims = _extract_claims_from_header(ctx.headers.get("authorization", ""))
+        if claims is not None:
+            ctx.actor_user_id = claims["uid"]
+            ctx.actor_role = claims["role"]
+        ctx.state["actor_tokens"] = set_actor_context(ctx.actor_user_id, ctx.actor_role, claims)
+        return None
+
+    async def on_complete(self, ctx: PipelineContext) -> None:
+        reset_actor_context(ctx.state.pop("actor_tokens"))
+
+
+class LoginRateLimitStage(PipelineStage):
+    async def on_request(self, ctx: PipelineContext) -> Response | None:
+        if ctx.method != "POST" or ctx.path != "/auth/login":
+            return None
+        key = f"{ctx.client_host}:{ctx.path}"
+        now = monotonic()
+        window = settings.auth_login_rate_limit_window_seconds
+        bucket = login_attempts[key]
+        while bucket and now - bucket[0] > window:
+            bucket.popleft()
+        if len(bucket) >= settings.auth_login_rate_limit_per_window:
+            return JSONResponse(
+                {"detail": "Too many login attempts. Please retry later."},
+                status_code=429,
+            )
+        bucket.append(now)
+        return None
+
+
+class AuditStage(PipelineStage):
+    async def on_request(self, ctx: PipelineContext) -> Response | None:
+        if not (settings.audit_log_enabled and ctx.is_mutation):
+            return None
+        recorder, recorder_token = start_change_recording()
+        ctx.state["audit"] = (recorder, recorder_token, begin_created_entity_capture())
+        return None
+
+    async def on_complete(self, ctx: PipelineContext) -> None:
+        audit_state = ctx.state.pop("audit", None)
+        if audit_state is None:
+            return
+        recorder, recorder_token, created_token = audit_state
+        entity, entity_id = _extract_entity_from_path(ctx.path)
+        try:
+            if ctx.status_code is None:
+                # The app raised before responding; nothing to audit.
+                return
+            resolved_entity_id = entity_id
+            created_table = table_for_segment(entity) if entity else None
+            if resolved_entity_id is None and created_table and ctx.status_code < 400:
+                resolved_entity_id = get_created_entity_id(created_table)
+            change_diff: dict[str, Any] | None = None
+            if ctx.status_code < 400:
+                primary_change = select_primary_change(recorder.changes(), ctx.path)
+                if primary_change is not None:
+                    change_diff = primary_change.change_diff
+                    if primary_change.entity != created_table:
+                        # A child written under its parent's path, e.g. a fine
+                        # payment for /loans/{id}/fine-payments: the row
+                        # names the entity its diff describes.
+                        entity, resolved_entity_id = primary_change.entity, primary_change.entity_id
+        finally:
+            end_created_entity_capture(created_token)
+            stop_change_recording(recorder_token)
+
+        duration_ms = (monotonic() - ctx.started_at) * 1000
+        audit_logger.info(
+            "method=%s path=%s status=%s user_id=%s role=%s duration_ms=%.2f",
+            ctx.method,
+            ctx.path,
+            ctx.status_code,
+            str(ctx.actor_user_id) if ctx.actor_user_id is not None else "-",
+            ctx.actor_role or "-",
+            duration_ms,
+        )
+        await audit_log_writer.submit(
+            {
+                "actor_user_id": ctx.actor_user_id,
+                "actor_role": ctx.actor_role,
+                "method": ctx.method,
+                "path": ctx.path,
+                "entity": entity,
+                "entity_id": resolved_entity_id,
+                "change_diff": change_diff,
+                "status_code": ctx.status_code,
+                "duration_ms": duration_ms,
+            }
+        )
+
+
+# Entities each mutating route writes. Cached reads are tagged with every
+# entity their payload depends on, so only those pages are dropped. Routes not
+# listed here (e.g. /seed) flush the whole cache.
+MUTATION_CACHE_TAGS: list[tuple[frozenset[str], re.Pattern[str], tuple[str, ...]]] = [
+    (frozenset({"POST"}), re.compile(r"^/auth/login$"), ()),
+    (frozenset({"POST"}), re.compile(r"^/books$"), ("books",)),
+    (frozenset({"PATCH", "DELETE"}), re.compile(r"^/books/\d+$"), ("books",)),
+    (frozenset({"POST"}), re.compile(r"^/users$"), ("users",)),
+    (frozenset({"PATCH", "DELETE"}), re.compile(r"^/users/\d+$"), ("users",)),
+    (frozenset({"POST"}), re.compile(r"^/loans/borrow$"), ("loans", "books")),
+    (frozenset({"POST"}), re.compile(r"^/loans/\d+/return$"), ("loans", "books")),
+    (frozenset({"POST"}), re.compile(r"^/loans/\d+/fine-payments$"), ("fine_payments",)),
+    (frozenset({"PATCH"}), re.compile(r"^/loans/\d+$"), ("loans",)),
+    (frozenset({"DELETE"}), re.compile(r"^/loans/\d+$"), ("loans", "books", "fine_payments")),
+    (frozenset({"PUT"}), re.compile(r"^/settings/policy$"), ("policy",)),
+    (frozenset({"POST"}), re.compile(r"^/imports/books$"), ("books",)),
+    (frozenset({"POST"}), re.compile(r"^/imports/users$"), ("users",)),
+    (frozenset({"POST"}), re.compile(r"^/imports/loans$"), ("loans", "books", "users")),
+]
+
+
+def mutation_cache_tags(method: str, path: str) -> tuple[str, ...] | None:
+    normalized = path.rstrip("/") or "/"
+    for methods, pattern, tags in MUTATION_CACHE_TAGS:
+        if method in methods and pattern.match(normalized):
+            return tags
+    return None
+
+
+class CacheInvalidationStage(PipelineStage):
+    async def on_request(self, ctx: PipelineContext) -> Response | None:
+        if ctx.is_mutation:
+            ctx.state["changed_entities"] = begin_changed_entity_capture()
+        return None
+
+    async def on_response_start(self, ctx: PipelineContext) -> None:
+        # Runs before the client sees the response so a follow-up read cannot
+        # be served from a page cached before this write.
+        if not ctx.is_mutation:
+            return
+        # Cached rows the handler reported as changed are dropped even on
+        # failure; a spurious miss is cheaper than a stale detail page.
+        await api_cache.invalidate_entities(get_changed_entities())
+        if ctx.status_code is None or ctx.status_code >= 500:
+            return
+        tags = mutation_cache_tags(ctx.method, ctx.path)
+        if tags is None:
+            await api_cache.invalidate_all()
+        else:
+            await api_cache.invalidate_tags(tags)
+
+    async def on_complete(self, ctx: PipelineContext) -> None:
+        token = ctx.state.pop("changed_entities", None)
+        if token is not None:
+            end_changed_entity_capture(token)
+
+
+def default_stages() -> list[PipelineStage]:
+    return [ActorContextStage(), AuditStage(), LoginRateLimitStage(), CacheInvalidationStage()]
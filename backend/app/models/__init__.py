@@ -1,8 +1,9 @@
 from .audit_log import AuditLog
 from .book import Book
+from .book_facet import BookFacetCount
 from .fine_payment import FinePayment
 from .loan import Loan
 from .policy import LibraryPolicy
 from .user import User
 
-__all__ = ["AuditLog", "Book", "FinePayment", "Loan", "LibraryPolicy", "User"]
+__all__ = ["AuditLog", "Book", "BookFacetCount", "FinePayment", "Loan", "LibraryPolicy", "User"]
@@ -1,13 +1,17 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import DDL, DateTime, ForeignKey, Integer, String, event, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from ..db import Base
+from ..db import Base, trigram_index
 
 
 class Book(Base):
     __tablename__ = "books"
+    # Substring and fuzzy search; see migrations 0012 and 0014.
+    __table_args__ = tuple(
+        trigram_index("books", column) for column in ("title", "author", "isbn", "subject", "rack_number")
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -32,3 +36,21 @@ class Book(Base):
     )
 
     loans: Mapped[list["Loan"]] = relationship(back_populates="book")
+
+
+# books.search_vector is Postgres-only (see migration 0011) and deliberately
+# unmapped so SQLite schemas still build; app.crud.books queries it by name.
+# Mirrored here for databases created with AUTO_CREATE_SCHEMA.
+for _statement in (
+    """
+    ALTER TABLE books ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(author, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(subject, '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(isbn, '') || ' ' || coalesce(rack_number, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)",
+):
+    event.listen(Book.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
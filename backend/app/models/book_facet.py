@@ -0,0 +1,16 @@
+from sqlalchemy import Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class BookFacetCount(Base):
+    # Unfiltered catalog facet counts, maintained by app.crud.book_facets as
+    # books are created, edited, borrowed and returned. Rows may drop to zero
+    # and are filtered out on read.
+    __tablename__ = "book_facet_counts"
+    __table_args__ = (Index("ix_book_facet_counts_facet_count", "facet", "count"),)
+
+    facet: Mapped[str] = mapped_column(String(32), primary_key=True)
+    value: Mapped[str] = mapped_column(String(200), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
@@ -3,11 +3,13 @@ from datetime import datetime
 from sqlalchemy import DateTime, ForeignKey, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from ..db import Base
+from ..db import Base, trigram_index
 
 
 class User(Base):
     __tablename__ = "users"
+    # Substring and fuzzy search; see migration 0012.
+    __table_args__ = tuple(trigram_index("users", column) for column in ("name", "email", "phone"))
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
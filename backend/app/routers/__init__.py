@@ -8,4 +8,5 @@ __all__ = [
     "imports",
     "policies",
     "audit",
+    "admin",
 ]
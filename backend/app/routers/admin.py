@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from ..deps import require_roles
+from ..utils.api_cache import api_cache
+from ..utils.suggest_index import suggest_indexes
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/metrics/cache")
+async def get_cache_metrics(_: object = Depends(require_roles("admin"))):
+    return api_cache.stats()
+
+
+@router.get("/metrics/suggest-index")
+async def get_suggest_index_stats(_: object = Depends(require_roles("admin"))):
+    return suggest_indexes.stats()
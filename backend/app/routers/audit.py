@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.audit import crud_audit
 from ..db import get_db
 from ..deps import require_roles
 from ..schemas.audit import AuditLogOut
-from ..utils.api_cache import api_cache, build_user_cache_key
+from ..utils.api_cache import Payload, api_cache
+from ..utils.pagination import CURSOR_DESCRIPTION, check_cursor, cursor_headers
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
@@ -19,27 +20,35 @@ async def list_audit_logs(
     status_code: int | None = Query(default=None),
     sort_by: str = Query(default="created_at"),
     sort_order: str = Query(default="desc", pattern="^(asc|desc)$"),
-    skip: int = Query(default=0, ge=0),
+    skip: int = Query(default=0, ge=0, description="Offset pagination; prefer cursor for deep pages"),
     limit: int = Query(default=200, ge=1, le=500),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     _: object = Depends(require_roles("admin")),
 ):
-    cache_key = build_user_cache_key(request, scope="audit:list")
-    cached = await api_cache.get_json(cache_key)
-    if cached is not None:
-        return cached
+    keyset = crud_audit.keyset(sort_by=sort_by, sort_order=sort_order)
+    try:
+        check_cursor(keyset, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    cache_key = await api_cache.key_for(request, "audit:list")
 
-    rows = await crud_audit.list_logs(
-        db,
-        q=q,
-        method=method,
-        entity=entity,
-        status_code=status_code,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        skip=skip,
-        limit=limit,
-    )
-    payload = [AuditLogOut.model_validate(row).model_dump(mode="json") for row in rows]
-    await api_cache.set_json(cache_key, payload)
-    return payload
+    async def build_payload(db: AsyncSession):
+        rows = await crud_audit.list_logs(
+            db,
+            q=q,
+            method=method,
+            entity=entity,
+            status_code=status_code,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+        return Payload(
+            [AuditLogOut.model_validate(row).model_dump(mode="json") for row in rows],
+            cursor_headers(keyset, rows, limit),
+        )
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
@@ -7,7 +7,7 @@ from ..db import get_db
 from ..deps import get_current_user
 from ..models import User
 from ..schemas.auth import AuthUser, LoginRequest, TokenOut
-from ..utils.security import create_access_token, verify_password
+from ..utils.security import create_access_token, password_service
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -15,12 +15,20 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/login", response_model=TokenOut)
 async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     user = await crud_auth.get_by_email(db, payload.email)
-    if not user or not verify_password(payload.password, user.password_hash):
+    verified, upgraded_hash = (
+        await password_service.verify_and_update(payload.password, user.password_hash)
+        if user
+        else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if upgraded_hash:
+        # Configured scheme or cost changed since this hash was stored.
+        user.password_hash = upgraded_hash
 
     token = create_access_token(
         user_id=user.id,
@@ -4,8 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..crud.books import crud_books
 from ..db import get_db
 from ..deps import get_current_user, require_roles
-from ..schemas.books import BookCreate, BookOut, BookUpdate
-from ..utils.api_cache import api_cache, build_user_cache_key
+from ..schemas.books import BookCreate, BookFacetsOut, BookOut, BookSuggestion, BookUpdate
+from ..utils.api_cache import Payload, api_cache
+from ..utils.pagination import CURSOR_DESCRIPTION, check_cursor, cursor_headers
+from ..utils.suggest_index import book_suggestions
 from .crud import register_crud_endpoints
 
 router = APIRouter(prefix="/books", tags=["books"])
@@ -14,40 +16,96 @@ router = APIRouter(prefix="/books", tags=["books"])
 @router.get("", response_model=list[BookOut])
 async def list_books(
     request: Request,
-    q: str | None = Query(default=None, description="Search in title/author/isbn"),
+    q: str | None = Query(default=None, description="Search in title/author/subject/isbn/rack"),
+    fuzzy: bool = Query(default=False, description="Typo-tolerant trigram matching, best match first"),
     author: list[str] = Query(default=[]),
     subject: list[str] = Query(default=[]),
     availability: list[str] = Query(default=[]),
     published_year: int | None = Query(default=None, ge=0, le=2100),
     available_only: bool = Query(default=False),
-    sort_by: str = Query(default="title"),
+    sort_by: str = Query(default="title", description="title, author, subject, available, id or relevance"),
     sort_order: str = Query(default="asc", pattern="^(asc|desc)$"),
-    skip: int = Query(default=0, ge=0),
+    skip: int = Query(default=0, ge=0, description="Offset pagination; prefer cursor for deep pages"),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     _: object = Depends(get_current_user),
 ):
-    cache_key = build_user_cache_key(request, scope="books:list")
-    cached = await api_cache.get_json(cache_key)
-    if cached is not None:
-        return cached
-
-    rows = await crud_books.list(
-        db,
-        q=q,
-        author=author,
-        subject=subject,
-        availability=availability,
-        published_year=published_year,
-        available_only=available_only,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        skip=skip,
-        limit=limit,
-    )
-    payload = [BookOut.model_validate(row).model_dump(mode="json") for row in rows]
-    await api_cache.set_json(cache_key, payload)
-    return payload
+    keyset = crud_books.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+    try:
+        check_cursor(keyset, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    cache_key = await api_cache.key_for(request, "books:list")
+
+    async def build_payload(db: AsyncSession):
+        rows = await crud_books.list(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            author=author,
+            subject=subject,
+            availability=availability,
+            published_year=published_year,
+            available_only=available_only,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+        return Payload(
+            [BookOut.model_validate(row).model_dump(mode="json") for row in rows],
+            cursor_headers(keyset, rows, limit),
+        )
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
+
+
+@router.get("/suggest", response_model=list[BookSuggestion])
+async def suggest_books(
+    q: str = Query(min_length=1, max_length=100, description="Prefix of a title, author or ISBN"),
+    limit: int = Query(default=10, ge=1, le=50),
+    _: object = Depends(get_current_user),
+):
+    return [
+        BookSuggestion(id=book_id, title=title, author=author, isbn=isbn)
+        for book_id, (title, author, isbn) in book_suggestions.search(q, limit=limit)
+    ]
+
+
+@router.get("/facets", response_model=BookFacetsOut)
+async def book_facets(
+    request: Request,
+    q: str | None = Query(default=None, description="Search in title/author/subject/isbn/rack"),
+    fuzzy: bool = Query(default=False, description="Typo-tolerant trigram matching"),
+    author: list[str] = Query(default=[]),
+    subject: list[str] = Query(default=[]),
+    availability: list[str] = Query(default=[]),
+    published_year: int | None = Query(default=None, ge=0, le=2100),
+    available_only: bool = Query(default=False),
+    limit: int = Query(default=50, ge=1, le=500, description="Values per facet, most common first"),
+    db: AsyncSession = Depends(get_db),
+    _: object = Depends(get_current_user),
+):
+    cache_key = await api_cache.key_for(request, "books:facets")
+
+    async def build_payload(db: AsyncSession):
+        facets = await crud_books.facets(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            author=author,
+            subject=subject,
+            availability=availability,
+            published_year=published_year,
+            available_only=available_only,
+            limit=limit,
+        )
+        return BookFacetsOut.model_validate(facets).model_dump(mode="json")
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
+
 
 async def _book_delete_precheck(book_id: int, db: AsyncSession) -> None:
     if await crud_books.active_loans(db, book_id) > 0:
@@ -68,4 +126,5 @@ register_crud_endpoints(
     delete_precheck=_book_delete_precheck,
     create_db_error_detail="Database error while creating book.",
     update_db_error_detail="Database error while updating book.",
+    object_cache="books",
 )
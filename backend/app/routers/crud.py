@@ -1,10 +1,12 @@
 from typing import Any, Callable, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_db
+from ..utils.api_cache import CachedResponse, api_cache
+from ..utils.request_context import publish_changed_entity
 
 IntegrityErrorHandler = Callable[[IntegrityError], tuple[int, str]]
 DeletePrecheck = Callable[[int, AsyncSession], Any]
@@ -26,7 +28,11 @@ def register_crud_endpoints(
     integrity_error_handler: IntegrityErrorHandler | None = None,
     create_db_error_detail: str = "Database error while creating record.",
     update_db_error_detail: str = "Database error while updating record.",
+    object_cache: str | None = None,
 ) -> None:
+    # object_cache names the entity (e.g. "books") whose detail reads are
+    # served cache-aside; writers elsewhere report changes via
+    # publish_changed_entity with the same name.
     def _map_integrity_error(exc: IntegrityError, default_detail: str) -> HTTPException:
         if integrity_error_handler:
             code, detail = integrity_error_handler(exc)
@@ -56,11 +62,22 @@ def register_crud_endpoints(
         response_model=response_schema,
         dependencies=list(get_dependencies or []),
     )
-    async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
-        item = await crud.get(db, item_id)
-        if not item:
+    async def get_item(item_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+        async def load_payload(db: AsyncSession):
+            item = await crud.get(db, item_id)
+            if not item:
+                return None
+            return response_schema.model_validate(item).model_dump(mode="json")
+
+        if object_cache:
+            response = await api_cache.serve_entity(object_cache, item_id, load_payload, db=db, request=request)
+            if response is None:
+                raise HTTPException(status_code=404, detail=not_found_detail)
+            return response
+        payload = await load_payload(db)
+        if payload is None:
             raise HTTPException(status_code=404, detail=not_found_detail)
-        return item
+        return CachedResponse.from_payload(payload).to_response(cache_status="BYPASS", request=request)
 
     @router.patch(
         "/{item_id}",
@@ -74,6 +91,8 @@ def register_crud_endpoints(
         if not item:
             raise HTTPException(status_code=404, detail=not_found_detail)
 
+        if object_cache:
+            publish_changed_entity(object_cache, item_id)
         try:
             return await crud.update(db, db_obj=item, obj_in=payload)
         except ValueError as exc:
@@ -100,4 +119,6 @@ def register_crud_endpoints(
             if hasattr(result, "__await__"):
                 await result
 
+        if object_cache:
+            publish_changed_entity(object_cache, item_id)
         await crud.remove(db, obj_id=item_id)
@@ -1,13 +1,14 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.fine_payments import crud_fine_payments
 from ..db import get_db
 from ..deps import require_roles
 from ..schemas.fine_payments import FinePaymentLedgerOut
-from ..utils.api_cache import api_cache, build_user_cache_key
+from ..utils.api_cache import Payload, api_cache
+from ..utils.pagination import CURSOR_DESCRIPTION, check_cursor, cursor_headers
 
 router = APIRouter(prefix="/fine-payments", tags=["fine-payments"])
 
@@ -23,29 +24,37 @@ async def list_fine_payments(
     collected_to: datetime | None = Query(default=None),
     sort_by: str = Query(default="collected_at"),
     sort_order: str = Query(default="desc", pattern="^(asc|desc)$"),
-    skip: int = Query(default=0, ge=0),
+    skip: int = Query(default=0, ge=0, description="Offset pagination; prefer cursor for deep pages"),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     _: object = Depends(require_roles("staff", "admin")),
 ):
-    cache_key = build_user_cache_key(request, scope="fine_payments:list")
-    cached = await api_cache.get_json(cache_key)
-    if cached is not None:
-        return cached
+    keyset = crud_fine_payments.keyset(sort_by=sort_by, sort_order=sort_order)
+    try:
+        check_cursor(keyset, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    cache_key = await api_cache.key_for(request, "fine_payments:list")
 
-    rows = await crud_fine_payments.list_ledger(
-        db,
-        q=q,
-        payment_mode=payment_mode,
-        user_id=user_id,
-        loan_id=loan_id,
-        collected_from=collected_from,
-        collected_to=collected_to,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        skip=skip,
-        limit=limit,
-    )
-    payload = [FinePaymentLedgerOut.model_validate(row).model_dump(mode="json") for row in rows]
-    await api_cache.set_json(cache_key, payload)
-    return payload
+    async def build_payload(db: AsyncSession):
+        rows = await crud_fine_payments.list_ledger(
+            db,
+            q=q,
+            payment_mode=payment_mode,
+            user_id=user_id,
+            loan_id=loan_id,
+            collected_from=collected_from,
+            collected_to=collected_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+        return Payload(
+            [FinePaymentLedgerOut.model_validate(row).model_dump(mode="json") for row in rows],
+            cursor_headers(keyset, rows, limit),
+        )
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
@@ -8,7 +8,8 @@ from ..db import get_db
 from ..deps import require_roles
 from ..schemas.fine_payments import FinePaymentCreate, FinePaymentOut, FineSummaryOut
 from ..schemas.loans import LoanCreate, LoanOut, LoanUpdate
-from ..utils.api_cache import api_cache, build_user_cache_key
+from ..utils.api_cache import Payload, api_cache
+from ..utils.pagination import CURSOR_DESCRIPTION, check_cursor, cursor_headers
 
 router = APIRouter(prefix="/loans", tags=["loans"])
 
@@ -56,37 +57,47 @@ async def return_book(
 async def list_loans(
     request: Request,
     q: str | None = Query(default=None),
+    fuzzy: bool = Query(default=False, description="Typo-tolerant trigram matching, best match first"),
     active: bool | None = Query(default=None),
     overdue_only: bool = Query(default=False),
     user_id: int | None = Query(default=None),
     book_id: int | None = Query(default=None),
     sort_by: str = Query(default="borrowed_at"),
     sort_order: str = Query(default="desc", pattern="^(asc|desc)$"),
-    skip: int = Query(default=0, ge=0),
+    skip: int = Query(default=0, ge=0, description="Offset pagination; prefer cursor for deep pages"),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     _: object = Depends(require_roles("staff", "admin")),
 ):
-    cache_key = build_user_cache_key(request, scope="loans:list")
-    cached = await api_cache.get_json(cache_key)
-    if cached is not None:
-        return cached
-
-    rows = await crud_loans.list(
-        db,
-        q=q,
-        active=active,
-        user_id=user_id,
-        book_id=book_id,
-        overdue_only=overdue_only,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        skip=skip,
-        limit=limit,
-    )
-    payload = [LoanOut.model_validate(row).model_dump(mode="json") for row in rows]
-    await api_cache.set_json(cache_key, payload)
-    return payload
+    keyset = crud_loans.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+    try:
+        check_cursor(keyset, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    cache_key = await api_cache.key_for(request, "loans:list")
+
+    async def build_payload(db: AsyncSession):
+        rows = await crud_loans.list(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            active=active,
+            user_id=user_id,
+            book_id=book_id,
+            overdue_only=overdue_only,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+        return Payload(
+            [LoanOut.model_validate(row).model_dump(mode="json") for row in rows],
+            cursor_headers(keyset, rows, limit),
+        )
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
 
 
 @router.get("/{loan_id}/fine-summary", response_model=FineSummaryOut)
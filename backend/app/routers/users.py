@@ -12,8 +12,10 @@ from ..deps import (
 from ..models import User
 from ..schemas.fine_payments import FinePaymentOut
 from ..schemas.loans import BorrowedBookOut, UserLoanOut
-from ..schemas.users import UserCreate, UserOut, UserUpdate
-from ..utils.api_cache import api_cache, build_user_cache_key
+from ..schemas.users import UserCreate, UserOut, UserSuggestion, UserUpdate
+from ..utils.api_cache import Payload, api_cache
+from ..utils.pagination import CURSOR_DESCRIPTION, check_cursor, cursor_headers
+from ..utils.suggest_index import user_suggestions
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -22,31 +24,53 @@ router = APIRouter(prefix="/users", tags=["users"])
 async def list_users(
     request: Request,
     q: str | None = Query(default=None, description="Search by name/email/phone"),
+    fuzzy: bool = Query(default=False, description="Typo-tolerant trigram matching, best match first"),
     role: list[str] = Query(default=[]),
     sort_by: str = Query(default="name"),
     sort_order: str = Query(default="asc", pattern="^(asc|desc)$"),
-    skip: int = Query(default=0, ge=0),
+    skip: int = Query(default=0, ge=0, description="Offset pagination; prefer cursor for deep pages"),
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     _: object = Depends(require_roles("staff", "admin")),
 ):
-    cache_key = build_user_cache_key(request, scope="users:list")
-    cached = await api_cache.get_json(cache_key)
-    if cached is not None:
-        return cached
-
-    rows = await crud_users.list(
-        db,
-        q=q,
-        role=role,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        skip=skip,
-        limit=limit,
-    )
-    payload = [UserOut.model_validate(row).model_dump(mode="json") for row in rows]
-    await api_cache.set_json(cache_key, payload)
-    return payload
+    keyset = crud_users.keyset(q=q, fuzzy=fuzzy, sort_by=sort_by, sort_order=sort_order)
+    try:
+        check_cursor(keyset, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    cache_key = await api_cache.key_for(request, "users:list")
+
+    async def build_payload(db: AsyncSession):
+        rows = await crud_users.list(
+            db,
+            q=q,
+            fuzzy=fuzzy,
+            role=role,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+        return Payload(
+            [UserOut.model_validate(row).model_dump(mode="json") for row in rows],
+            cursor_headers(keyset, rows, limit),
+        )
+
+    return await api_cache.serve(cache_key, build_payload, db=db, request=request)
+
+
+@router.get("/suggest", response_model=list[UserSuggestion])
+async def suggest_users(
+    q: str = Query(min_length=1, max_length=100, description="Prefix of a name, email or phone"),
+    limit: int = Query(default=10, ge=1, le=50),
+    _: object = Depends(require_roles("staff", "admin")),
+):
+    return [
+        UserSuggestion(id=user_id, name=name, email=email, phone=phone)
+        for user_id, (name, email, phone) in user_suggestions.search(q, limit=limit)
+    ]
 
 
 @router.get("/me", response_model=UserOut)
@@ -33,3 +33,22 @@ class BookOut(BookBase):
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class BookFacetsOut(BaseModel):
+    author: list[FacetCount]
+    subject: list[FacetCount]
+    decade: list[FacetCount]
+    availability: list[FacetCount]
+
+
+class BookSuggestion(BaseModel):
+    id: int
+    title: str
+    author: str
+    isbn: str | None = None
@@ -44,3 +44,10 @@ class UserOut(UserBase):
     id: int
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserSuggestion(BaseModel):
+    id: int
+    name: str
+    email: str | None = None
+    phone: str | None = None
@@ -1,14 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from enum import Enum
+import gzip
+import hashlib
 import json
-from time import monotonic
-from typing import Any
+import logging
+import secrets
+import struct
+from time import monotonic, perf_counter, time
+from typing import Any, Awaitable, Callable, Iterable
 from urllib.parse import urlencode
+from uuid import uuid4
 
-from fastapi import Request
+from fastapi import Request, Response
+from fastapi.dependencies.utils import request_params_to_args
 
 from ..config import settings
+from ..db import SessionLocal
 from .request_context import get_actor_role, get_actor_user_id
 
 try:
@@ -16,129 +29,1197 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     redis_async = None
 
+cache_logger = logging.getLogger("api_cache")
+
+
+def encode_json(value: Any) -> bytes:
+    # Same separators and escaping as starlette's JSONResponse.
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def compute_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses weak comparison.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in {"gzip", "*"}:
+            return params.replace(" ", "").lower() not in {"q=0", "q=0.0", "q=0.00", "q=0.000"}
+    return False
+
+
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+# The catalog changes rarely and is the same for every patron, so browsers may
+# reuse it briefly and revalidate in the background.
+CATALOG_CACHE_CONTROL = "private, max-age=5, stale-while-revalidate=30"
+
+
+@dataclass(frozen=True, slots=True)
+class Payload:
+    # A build result that carries response headers (e.g. X-Next-Cursor),
+    # cached together with the body.
+    content: Any
+    headers: dict[str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    # The final encoded body; hits are returned as-is without decoding or
+    # response_model validation. Large bodies are kept gzipped and sent that
+    # way to clients that accept it, so memory, Redis and the wire all carry
+    # the compressed bytes.
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+    # Wall-clock time, so freshness survives a round trip through Redis.
+    fresh_until: float = 0.0
+    content_encoding: str | None = None
+    headers: tuple[tuple[str, str], ...] = ()
+
+    @classmethod
+    def from_payload(cls, payload: Any, *, fresh_for: float = 0.0) -> CachedResponse:
+        headers: tuple[tuple[str, str], ...] = ()
+        if isinstance(payload, Payload):
+            headers = tuple(payload.headers.items())
+            payload = payload.content
+        body = encode_json(payload)
+        etag = compute_etag(body)
+        body, content_encoding = payload_codec.compress(body)
+        return cls(
+            body=body,
+            etag=etag,
+            fresh_until=time() + fresh_for,
+            content_encoding=content_encoding,
+            headers=headers,
+        )
+
+    @property
+    def is_fresh(self) -> bool:
+        return time() < self.fresh_until
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.body)
+            + len(self.etag)
+            + len(self.media_type)
+            + sum(len(name) + len(value) for name, value in self.headers)
+        )
+
+    @property
+    def identity_body(self) -> bytes:
+        return gzip.decompress(self.body) if self.content_encoding == "gzip" else self.body
+
+    def to_response(
+        self,
+        *,
+        cache_status: str,
+        request: Request | None = None,
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+    ) -> Response:
+        headers = dict(self.headers)
+        headers.update({"ETag": self.etag, "Cache-Control": cache_control, "X-Cache": cache_status})
+        body = self.body
+        if self.content_encoding is not None:
+            headers["Vary"] = "Accept-Encoding"
+            if request is not None and accepts_gzip(request.headers.get("accept-encoding")):
+                # A distinct strong validator per representation.
+                headers["ETag"] = f'{self.etag[:-1]}-gzip"'
+                headers["Content-Encoding"] = self.content_encoding
+            else:
+                body = self.identity_body
+        if request is not None:
+            if_none_match = request.headers.get("if-none-match")
+            if etag_matches(if_none_match, self.etag) or etag_matches(if_none_match, headers["ETag"]):
+                headers.pop("Content-Encoding", None)
+                return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class PayloadCodec:
+    # Serialized form used for Redis: a version byte, a fixed header, the
+    # etag, media type and extra headers, then the (possibly gzipped) body. Entries written
+    # in a version this process does not know decode as a miss, so the format
+    # can change across a rolling deploy without flushing the cache.
+    VERSION = 3
+    _HEADER = struct.Struct("!BdBHHH")
+    _ENCODINGS = (None, "gzip")
+
+    def __init__(self, min_bytes: int | None = None, level: int | None = None) -> None:
+        self.min_bytes = min_bytes if min_bytes is not None else settings.api_cache_compress_min_bytes
+        self.level = level if level is not None else settings.api_cache_compress_level
+
+    def compress(self, body: bytes) -> tuple[bytes, str | None]:
+        if self.min_bytes <= 0 or len(body) < self.min_bytes:
+            return body, None
+        compressed = gzip.compress(body, compresslevel=self.level, mtime=0)
+        if len(compressed) >= len(body):
+            return body, None
+        return compressed, "gzip"
+
+    def encode(self, cached: CachedResponse) -> bytes:
+        etag = cached.etag.encode("ascii")
+        media_type = cached.media_type.encode("ascii")
+        extra_headers = "\n".join(f"{name}:{value}" for name, value in cached.headers).encode("latin-1")
+        header = self._HEADER.pack(
+            self.VERSION,
+            cached.fresh_until,
+            self._ENCODINGS.index(cached.content_encoding),
+            len(etag),
+            len(media_type),
+            len(extra_headers),
+        )
+        return b"".join((header, etag, media_type, extra_headers, cached.body))
+
+    def decode(self, raw: bytes) -> CachedResponse:
+        if len(raw) < self._HEADER.size or raw[0] != self.VERSION:
+            raise ValueError("Unsupported cache payload version")
+        _, fresh_until, encoding, etag_length, media_type_length, headers_length = self._HEADER.unpack_from(raw)
+        if encoding >= len(self._ENCODINGS):
+            raise ValueError("Unsupported cache payload encoding")
+        offset = self._HEADER.size
+        etag = raw[offset : offset + etag_length].decode("ascii")
+        offset += etag_length
+        media_type = raw[offset : offset + media_type_length].decode("ascii")
+        offset += media_type_length
+        extra_headers = raw[offset : offset + headers_length].decode("latin-1")
+        offset += headers_length
+        headers = tuple(
+            (name, value)
+            for name, _, value in (line.partition(":") for line in extra_headers.split("\n") if line)
+        )
+        return CachedResponse(
+            body=raw[offset:],
+            etag=etag,
+            media_type=media_type,
+            fresh_until=fresh_until,
+            content_encoding=self._ENCODINGS[encoding],
+            headers=headers,
+        )
+
+
+payload_codec = PayloadCodec()
+
 
 class InMemoryTTLCache:
-    def __init__(self) -> None:
-        self._store: dict[str, tuple[float, str]] = {}
-        self._lock = asyncio.Lock()
+    # Bounded LRU tier. User-scoped keys with arbitrary query strings make the
+    # key space unbounded, so cap entries and bytes and sweep expired entries
+    # instead of waiting for the same key to be read again.
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        sweep_interval_seconds: float | None = None,
+        on_drop: Callable[[str, str], None] | None = None,
+    ) -> None:
+        self.max_entries = max(max_entries if max_entries is not None else settings.api_cache_max_entries, 1)
+        self.max_bytes = max(max_bytes if max_bytes is not None else settings.api_cache_max_bytes, 1)
+        self.sweep_interval_seconds = (
+            sweep_interval_seconds
+            if sweep_interval_seconds is not None
+            else settings.api_cache_sweep_interval_seconds
+        )
+        # No awaits happen while the store is touched, so no lock is needed.
+        self._store: OrderedDict[str, tuple[float, CachedResponse, int]] = OrderedDict()
+        self._last_sweep = monotonic()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Called with (key, "eviction" | "expiration").
+        self.on_drop = on_drop
+
+    def _dropped(self, key: str, reason: str) -> None:
+        if reason == "eviction":
+            self.evictions += 1
+        else:
+            self.expirations += 1
+        if self.on_drop is not None:
+            self.on_drop(key, reason)
+
+    def _pop(self, key: str) -> None:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def delete(self, key: str) -> None:
+        self._pop(key)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self.bytes = 0
 
-    async def get_json(self, key: str) -> Any | None:
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._store.get(key)
+        if not entry:
+            self.misses += 1
+            return None
+        expires_at, cached, _ = entry
+        if expires_at <= monotonic():
+            self._pop(key)
+            self._dropped(key, "expiration")
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return cached
+
+    def set(self, key: str, cached: CachedResponse, ttl_seconds: int) -> None:
+        size = len(key) + cached.size
+        if size > self.max_bytes:
+            return
         now = monotonic()
-        async with self._lock:
-            entry = self._store.get(key)
-            if not entry:
-                return None
-            expires_at, payload = entry
-            if expires_at <= now:
-                self._store.pop(key, None)
-                return None
-        return json.loads(payload)
-
-    async def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
-        payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
-        async with self._lock:
-            self._store[key] = (monotonic() + max(ttl_seconds, 1), payload)
-
-    async def clear_prefix(self, prefix: str) -> None:
-        async with self._lock:
-            keys = [key for key in self._store if key.startswith(prefix)]
-            for key in keys:
-                self._store.pop(key, None)
+        if now - self._last_sweep >= self.sweep_interval_seconds:
+            self.sweep(now)
+        self._pop(key)
+        self._store[key] = (now + max(ttl_seconds, 1), cached, size)
+        self.bytes += size
+        while len(self._store) > self.max_entries or self.bytes > self.max_bytes:
+            evicted_key, (_, _, evicted_size) = self._store.popitem(last=False)
+            self.bytes -= evicted_size
+            self._dropped(evicted_key, "eviction")
+
+    def sweep(self, now: float | None = None) -> int:
+        now = monotonic() if now is None else now
+        expired = [key for key, (expires_at, _, _) in self._store.items() if expires_at <= now]
+        for key in expired:
+            self._pop(key)
+            self._dropped(key, "expiration")
+        self._last_sweep = now
+        return len(expired)
+
+    def usage_by(self, group: Callable[[str], str]) -> dict[str, dict[str, int]]:
+        # Walks the store, so only for metrics reads, not per request.
+        usage: dict[str, dict[str, int]] = {}
+        for key, (_, _, size) in self._store.items():
+            bucket = usage.setdefault(group(key), {"entries": 0, "bytes": 0})
+            bucket["entries"] += 1
+            bucket["bytes"] += size
+        return usage
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._store),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures so a dead Redis
+    # costs nothing per request; after `reset_seconds` one probe is let
+    # through (half-open) and its outcome closes or re-opens the circuit.
+    def __init__(
+        self,
+        failure_threshold: int | None = None,
+        reset_seconds: float | None = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.failure_threshold = max(
+            failure_threshold if failure_threshold is not None else settings.api_cache_redis_breaker_failures, 1
+        )
+        self.reset_seconds = (
+            reset_seconds if reset_seconds is not None else settings.api_cache_redis_breaker_reset_seconds
+        )
+        self._clock = clock
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state is CircuitState.CLOSED:
+            return True
+        if self.state is CircuitState.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self.state = CircuitState.HALF_OPEN
+            self._probing = False
+        if self.state is CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state is CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state is not CircuitState.OPEN:
+                self.opened += 1
+                cache_logger.warning("Redis cache circuit opened after %s failure(s)", self._failures)
+            self.state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        # The probing call was cancelled before it could report an outcome.
+        self._probing = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
 
 
 class OptionalRedisCache:
-    def __init__(self, redis_url: str | None) -> None:
+    # Every call goes through _run: bounded by a per-operation timeout and
+    # short-circuited while the breaker is open. Failures degrade to a cache
+    # miss and the client recovers on its own once Redis answers again.
+    def __init__(
+        self,
+        redis_url: str | None,
+        *,
+        max_connections: int | None = None,
+        timeout_seconds: float | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self._redis_url = redis_url
         self._client = None
-        self._enabled = bool(redis_url and redis_async)
-        self._checked = False
+        self.max_connections = (
+            max_connections if max_connections is not None else settings.api_cache_redis_max_connections
+        )
+        self.timeout_seconds = (
+            timeout_seconds if timeout_seconds is not None else settings.api_cache_redis_timeout_seconds
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.timeouts = 0
+        self.errors: dict[str, int] = {}
 
-    async def _client_or_none(self):
-        if not self._enabled:
-            return None
+    @property
+    def configured(self) -> bool:
+        return bool(self._redis_url and redis_async)
+
+    def _get_client(self):
         if self._client is None:
-            self._client = redis_async.from_url(self._redis_url, decode_responses=True)
-        if not self._checked:
-            try:
-                await self._client.ping()
-                self._checked = True
-            except Exception:
-                self._enabled = False
-                return None
+            self._client = redis_async.from_url(
+                self._redis_url,
+                max_connections=self.max_connections,
+                socket_connect_timeout=self.timeout_seconds,
+            )
         return self._client
 
-    async def get_json(self, key: str) -> Any | None:
-        client = await self._client_or_none()
-        if client is None:
+    async def _run(self, operation: str, call: Callable[[Any], Awaitable[Any]], default: Any = None) -> Any:
+        if not self.configured or not self.breaker.allow():
+            return default
+        self.calls += 1
+        try:
+            result = await asyncio.wait_for(call(self._get_client()), self.timeout_seconds)
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        except Exception as exc:
+            if isinstance(exc, asyncio.TimeoutError):
+                self.timeouts += 1
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+            self.breaker.record_failure()
+            return default
+        self.breaker.record_success()
+        return result
+
+    async def get(self, key: str) -> CachedResponse | None:
+        raw = await self._run("get", lambda client: client.get(key))
+        if raw is None:
             return None
         try:
-            raw = await client.get(key)
-        except Exception:
+            return payload_codec.decode(raw)
+        except ValueError:
             return None
+
+    async def set(self, key: str, cached: CachedResponse, ttl_seconds: int) -> None:
+        await self._run("set", lambda client: client.set(key, payload_codec.encode(cached), ex=max(ttl_seconds, 1)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._run("delete", lambda client: client.delete(*keys))
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._run("publish", lambda client: client.publish(channel, message))
+
+    async def subscribe(self, channel: str):
+        async def subscribe(client):
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+            except BaseException:
+                with suppress(Exception):
+                    await pubsub.aclose()
+                raise
+            return pubsub
+
+        return await self._run("subscribe", subscribe)
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> bool | None:
+        async def acquire(client):
+            return bool(await client.set(key, b"1", nx=True, px=max(int(ttl_seconds * 1000), 1)))
+
+        return await self._run("acquire_lock", acquire)
+
+    async def release_lock(self, key: str) -> None:
+        await self._run("release_lock", lambda client: client.delete(key))
+
+    async def get_generations(self, key: str) -> dict[str, int] | None:
+        raw = await self._run("get_generations", lambda client: client.hgetall(key))
         if raw is None:
             return None
-        return json.loads(raw)
+        return {
+            (tag.decode("utf-8") if isinstance(tag, bytes) else tag): int(value)
+            for tag, value in raw.items()
+        }
 
-    async def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
-        client = await self._client_or_none()
-        if client is None:
-            return
-        try:
-            payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
-            await client.set(key, payload, ex=max(ttl_seconds, 1))
-        except Exception:
-            return
+    async def incr_generations(self, key: str, tags: tuple[str, ...]) -> dict[str, int] | None:
+        async def incr(client):
+            async with client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.hincrby(key, tag, 1)
+                return await pipe.execute()
+
+        values = await self._run("incr_generations", incr)
+        if values is None:
+            return None
+        return dict(zip(tags, (int(value) for value in values)))
+
+    async def claim_generation_epoch(self, key: str, field: str, epoch: int) -> int | None:
+        async def claim(client):
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hsetnx(key, field, epoch)
+                pipe.hget(key, field)
+                return (await pipe.execute())[1]
+
+        value = await self._run("claim_generation_epoch", claim)
+        return None if value is None else int(value)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "breaker": self.breaker.stats(),
+            "max_connections": self.max_connections,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": dict(self.errors),
+        }
+
+
+# Field of the generations hash holding its epoch; tags never start with "_".
+GENERATION_EPOCH_FIELD = "_epoch"
 
-    async def clear_prefix(self, prefix: str) -> None:
-        client = await self._client_or_none()
-        if client is None:
+
+class GenerationStore:
+    # Generation per tag, kept in Redis when available and mirrored locally.
+    # Bumping a generation orphans every key built with the old value, so
+    # invalidation is O(tags) regardless of how many pages are cached.
+    #
+    # A bump Redis did not acknowledge stays pending: until it is pushed, the
+    # tag is stamped "<remote>~<origin>.<n>", which no other worker can build,
+    # so the local invalidation holds without this worker running ahead of
+    # the shared counter. The hash also carries an epoch field; a flushed or
+    # recreated hash gets a new one, and every key embeds it.
+    def __init__(
+        self,
+        redis: OptionalRedisCache,
+        key: str,
+        sync_interval_seconds: float,
+        *,
+        origin: str | None = None,
+        on_reset: Callable[[], None] | None = None,
+    ) -> None:
+        self._redis = redis
+        self._key = key
+        self._sync_interval = sync_interval_seconds
+        self._origin = (origin or uuid4().hex)[:8]
+        self._on_reset = on_reset
+        self._remote: dict[str, int] = {}
+        self._pending: dict[str, int] = {}
+        self._local_bumps = 0
+        self.epoch: int | None = None
+        self._synced_at: float | None = None
+
+    def observe(self, remote: dict[str, int], *, epoch: int | None = None) -> None:
+        # Values from another epoch belong to a hash this worker no longer
+        # (or does not yet) share; the next sync settles them.
+        if epoch != self.epoch:
             return
-        try:
-            async for key in client.scan_iter(match=f"{prefix}*"):
-                await client.delete(key)
-        except Exception:
+        for tag, value in remote.items():
+            if value > self._remote.get(tag, 0):
+                self._remote[tag] = value
+
+    async def _sync(self) -> None:
+        remote = await self._redis.get_generations(self._key)
+        if remote is None:
             return
+        epoch = remote.pop(GENERATION_EPOCH_FIELD, None)
+        if epoch is None:
+            epoch = await self._redis.claim_generation_epoch(
+                self._key, GENERATION_EPOCH_FIELD, secrets.randbits(48)
+            )
+            if epoch is None:
+                return
+        if epoch != self.epoch:
+            # First sync, or the hash was flushed: adopt it as-is, including
+            # values lower than what this worker had seen.
+            if self.epoch is not None and self._on_reset is not None:
+                self._on_reset()
+            self.epoch = epoch
+            self._remote = remote
+        else:
+            self.observe(remote, epoch=epoch)
+        if self._pending:
+            acked = await self._redis.incr_generations(self._key, tuple(self._pending))
+            if acked is not None:
+                self._pending.clear()
+                self._acknowledge(acked)
+
+    def _hold(self, tags: Iterable[str]) -> None:
+        self._local_bumps += 1
+        for tag in tags:
+            self._pending[tag] = self._local_bumps
+
+    def _acknowledge(self, acked: dict[str, int]) -> bool:
+        if any(value <= self._remote.get(tag, 0) for tag, value in acked.items()):
+            # The counter went backwards: the hash was flushed since the last
+            # sync. Keep these tags unique until a resync adopts the new epoch.
+            self._hold(acked)
+            self._synced_at = None
+            return False
+        self.observe(acked, epoch=self.epoch)
+        return True
+
+    def _stamp(self, tag: str) -> int | str:
+        value = self._remote.get(tag, 0)
+        if tag in self._pending:
+            return f"{value}~{self._origin}.{self._pending[tag]}"
+        return value
+
+    async def _sync_if_due(self, interval: float) -> None:
+        now = monotonic()
+        if self._synced_at is None or now - self._synced_at >= interval:
+            self._synced_at = now
+            await self._sync()
+
+    async def current(self, tags: Iterable[str]) -> dict[str, int | str]:
+        await self._sync_if_due(self._sync_interval)
+        return {tag: self._stamp(tag) for tag in tags}
+
+    async def bump(self, tags: Iterable[str]) -> dict[str, int]:
+        tags = tuple(dict.fromkeys(tags))
+        # The broadcast carries the epoch, so learn it before the first bump.
+        await self._sync_if_due(float("inf"))
+        acked = await self._redis.incr_generations(self._key, tags)
+        if acked is None:
+            self._hold(tags)
+            return {}
+        # Any acknowledged increment orphans what other workers built before
+        # this write, so it settles an earlier pending bump of the same tag.
+        for tag in tags:
+            self._pending.pop(tag, None)
+        return acked if self._acknowledge(acked) else {}
+
+    def stats(self) -> dict[str, Any]:
+        return {"epoch": self.epoch, "pending": sorted(self._pending)}
+
+
+# Bumped by invalidate_all; every key embeds it.
+ALL_TAG = "*"
+
+
+# Upper bounds in milliseconds; lookups slower than the last one land in +Inf.
+LATENCY_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.counts[bisect_left(self.buckets, elapsed_ms)] += 1
+        self.count += 1
+        self.sum_ms += elapsed_ms
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    @staticmethod
+    def _label(bound: float | None) -> float | str | None:
+        return "+Inf" if bound == float("inf") else bound
+
+    def stats(self) -> dict[str, Any]:
+        cumulative, seen = {}, 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            seen += count
+            cumulative[bound] = seen
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            # JSON has no infinity; report the open bucket by its label.
+            "p50_ms": self._label(self.quantile(0.5)),
+            "p99_ms": self._label(self.quantile(0.99)),
+            "buckets": cumulative,
+        }
+
+
+class CacheMetrics:
+    # Per-scope outcome counters plus per-tier lookup latency. Scopes are the
+    # key prefix (books:list, books:detail, ...); counters are plain ints
+    # bumped on the request path, so reading them never blocks a request.
+    LOOKUP_OUTCOMES = ("hit", "stale", "coalesced", "miss", "bypass")
+
+    def __init__(self) -> None:
+        self.scopes: dict[str, Counter[str]] = {}
+        self.invalidations: Counter[str] = Counter()
+        self.latency = {"memory": LatencyHistogram(), "redis": LatencyHistogram()}
+
+    def record(self, scope: str, event: str, count: int = 1) -> None:
+        counters = self.scopes.get(scope)
+        if counters is None:
+            counters = self.scopes[scope] = Counter()
+        counters[event] += count
+
+    def observe(self, tier: str, started: float) -> None:
+        self.latency[tier].observe((perf_counter() - started) * 1000)
+
+    def snapshot(self, usage: dict[str, dict[str, int]]) -> dict[str, Any]:
+        scopes = {}
+        for scope in sorted(set(self.scopes) | set(usage)):
+            counters = self.scopes.get(scope, Counter())
+            lookups = sum(counters[outcome] for outcome in self.LOOKUP_OUTCOMES if outcome != "bypass")
+            served = counters["hit"] + counters["stale"] + counters["coalesced"]
+            scopes[scope] = {
+                **dict(counters),
+                **usage.get(scope, {"entries": 0, "bytes": 0}),
+                "hit_ratio": round(served / lookups, 4) if lookups else None,
+            }
+        return {
+            "scopes": scopes,
+            "invalidations": dict(self.invalidations),
+            "latency": {tier: histogram.stats() for tier, histogram in self.latency.items()},
+        }
 
 
 class APICache:
     def __init__(self) -> None:
-        self._memory = InMemoryTTLCache()
+        self.metrics = CacheMetrics()
+        self._memory = InMemoryTTLCache(on_drop=self._on_memory_drop)
         self._redis = OptionalRedisCache(settings.api_cache_redis_url)
         self._namespace = settings.api_cache_namespace
         self._ttl = settings.api_cache_ttl_seconds
+        # Invalidations are broadcast so every worker's memory tier drops
+        # them at once instead of waiting for a generation sync or a TTL.
+        self._origin = uuid4().hex
+        self._generations = GenerationStore(
+            self._redis,
+            f"{self._namespace}:generations",
+            settings.api_cache_generation_sync_seconds,
+            origin=self._origin,
+            on_reset=self._memory.clear,
+        )
+        self._lock_seconds = settings.api_cache_singleflight_lock_seconds
+        # Background refreshes cannot reuse the request's session.
+        self.session_factory: Callable[[], Any] = SessionLocal
+        self._refresh_tasks: set[asyncio.Task] = set()
+        self._refreshing: set[str] = set()
+        self._inflight: dict[str, asyncio.Future[CachedResponse]] = {}
+        self.builds = 0
+        self.coalesced = 0
+        # Bumped by every entity invalidation; a detail read that straddles one
+        # does not store what it loaded.
+        self._entity_epoch = 0
+        self._channel = f"{self._namespace}:invalidations"
+        self._listener: asyncio.Task | None = None
+        # Called with the entities other workers changed, or None when events
+        # may have been lost (the subscription dropped).
+        self._entity_observers: list[Callable[[list[tuple[str, int]] | None], None]] = []
+        self.broadcasts_sent = 0
+        self.broadcasts_received = 0
 
     def _key(self, key: str) -> str:
         return f"{self._namespace}:{key}"
 
-    async def get_json(self, key: str) -> Any | None:
+    def _namespaced_scope(self, namespaced: str) -> str:
+        return self._scope(namespaced.removeprefix(f"{self._namespace}:"))
+
+    def _on_memory_drop(self, namespaced: str, reason: str) -> None:
+        self.metrics.record(self._namespaced_scope(namespaced), reason)
+
+    async def key_for(self, request: Request, scope_name: str) -> str | None:
+        scope = CACHE_SCOPES[scope_name]
+        key = build_cache_key(request, scope)
+        if key is None:
+            return None
+        return await self.versioned_key(key, tags=scope.tags)
+
+    async def versioned_key(self, key: str, *, tags: Iterable[str] = ()) -> str:
+        # Resolve once per request and reuse for get and set, so a page built
+        # while a write bumps its tags is stored under the stale generation.
+        generations = await self._generations.current((ALL_TAG, *sorted(set(tags))))
+        stamp = ",".join(f"{tag}={value}" for tag, value in generations.items())
+        return f"{key}|gen@{self._generations.epoch or 0}:{stamp}"
+
+    async def get(self, key: str) -> CachedResponse | None:
         if not settings.api_cache_enabled:
             return None
         namespaced = self._key(key)
-        cached = await self._redis.get_json(namespaced)
+        started = perf_counter()
+        cached = self._memory.get(namespaced)
+        self.metrics.observe("memory", started)
         if cached is not None:
             return cached
-        return await self._memory.get_json(namespaced)
+        if not self._redis.configured:
+            return None
+        started = perf_counter()
+        cached = await self._redis.get(namespaced)
+        self.metrics.observe("redis", started)
+        if cached is not None:
+            self._memory.set(namespaced, cached, self._ttls(key)[1])
+        return cached
 
-    async def set_json(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+    async def set(self, key: str, cached: CachedResponse, ttl_seconds: int | None = None) -> None:
         if not settings.api_cache_enabled:
             return
         namespaced = self._key(key)
         ttl = ttl_seconds if ttl_seconds is not None else self._ttl
-        await self._memory.set_json(namespaced, value, ttl)
-        await self._redis.set_json(namespaced, value, ttl)
+        self.metrics.record(self._scope(key), "set")
+        self._memory.set(namespaced, cached, ttl)
+        await self._redis.set(namespaced, cached, ttl)
+
+    @staticmethod
+    def _scope(key: str) -> str:
+        return key.split("|", 1)[0]
+
+    def _ttls(self, key: str) -> tuple[int, int]:
+        # Fresh for api_cache_ttl_seconds, then servable while stale for the
+        # scope's extra window (e.g. books:list) while it is refreshed.
+        stale = max(settings.api_cache_stale_ttl_seconds.get(self._scope(key), 0), 0)
+        return self._ttl, self._ttl + stale
+
+    async def serve(
+        self,
+        key: str | None,
+        build: Callable[[Any], Awaitable[Any]],
+        *,
+        db: Any,
+        request: Request | None = None,
+    ) -> Response:
+        # `build(db)` returns the JSON-ready payload, or a Payload carrying
+        # response headers; it only runs on a miss or in a background
+        # refresh, where it gets a session of its own.
+        scope = CACHE_SCOPES.get(self._scope(key)) if key is not None else None
+        cache_control = scope.cache_control if scope else DEFAULT_CACHE_CONTROL
+
+        def respond(cached: CachedResponse, cache_status: str) -> Response:
+            if key is not None:
+                self.metrics.record(self._scope(key), cache_status.lower())
+            return cached.to_response(cache_status=cache_status, request=request, cache_control=cache_control)
+
+        if key is None or not settings.api_cache_enabled:
+            return respond(CachedResponse.from_payload(await build(db)), "BYPASS")
+        cached = await self.get(key)
+        if cached is not None:
+            if cached.is_fresh:
+                return respond(cached, "HIT")
+            fresh_ttl, hard_ttl = self._ttls(key)
+            if time() < cached.fresh_until + (hard_ttl - fresh_ttl):
+                self._schedule_refresh(key, build)
+                return respond(cached, "STALE")
+
+        # Single flight: concurrent misses for a key share one build.
+        while (flight := self._inflight.get(key)) is not None:
+            try:
+                cached = await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if flight.cancelled():
+                    # The leading request went away; retry as leader.
+                    continue
+                raise
+            self.coalesced += 1
+            return respond(cached, "COALESCED")
+        cached = await self._lead(key, lambda: build(db))
+        return respond(cached, "MISS")
+
+    async def _lead(self, key: str, build: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        try:
+            cached = await self._build_once(key, build)
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                flight.cancel()
+            else:
+                flight.set_exception(exc)
+                # Waiters re-raise it; keep asyncio from reporting it as lost.
+                flight.exception()
+            raise
+        else:
+            flight.set_result(cached)
+        finally:
+            self._inflight.pop(key, None)
+        return cached
+
+    def _schedule_refresh(self, key: str, build: Callable[[Any], Awaitable[Any]]) -> None:
+        if key in self._inflight or key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                async with self.session_factory() as session:
+                    await self._lead(key, lambda: build(session))
+            except Exception:
+                cache_logger.exception("Background refresh failed for %s", self._scope(key))
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _build_once(self, key: str, build: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        lock_key = self._key(f"lock:{key}")
+        locked = None
+        if self._lock_seconds > 0:
+            locked = await self._redis.acquire_lock(lock_key, self._lock_seconds)
+            if locked is False:
+                # Another worker is building it; wait briefly for its result.
+                cached = await self._wait_for_peer(key)
+                if cached is not None:
+                    return cached
+        try:
+            self.builds += 1
+            fresh_ttl, hard_ttl = self._ttls(key)
+            cached = CachedResponse.from_payload(await build(), fresh_for=fresh_ttl)
+            await self.set(key, cached, hard_ttl)
+            return cached
+        finally:
+            if locked:
+                await self._redis.release_lock(lock_key)
+
+    async def _wait_for_peer(self, key: str) -> CachedResponse | None:
+        namespaced = self._key(key)
+        deadline = monotonic() + self._lock_seconds
+        while monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            cached = await self._redis.get(namespaced)
+            if cached is not None:
+                self._memory.set(namespaced, cached, self._ttls(key)[1])
+                return cached
+        return None
+
+    @staticmethod
+    def entity_key(entity: str, entity_id: int) -> str:
+        return f"{entity}:detail|{entity_id}"
+
+    async def serve_entity(
+        self,
+        entity: str,
+        entity_id: int,
+        load: Callable[[Any], Awaitable[Any]],
+        *,
+        db: Any,
+        request: Request | None = None,
+    ) -> Response | None:
+        # Cache-aside for one row. `load(db)` returns the JSON-ready payload or
+        # None when the row does not exist; misses are not cached.
+        key = await self.versioned_key(self.entity_key(entity, entity_id))
+        scope = self._scope(key)
+        cached = await self.get(key)
+        if cached is not None and cached.is_fresh:
+            self.metrics.record(scope, "hit")
+            return cached.to_response(cache_status="HIT", request=request)
+        self.metrics.record(scope, "miss")
+        epoch = self._entity_epoch
+        payload = await load(db)
+        if payload is None:
+            return None
+        cached = CachedResponse.from_payload(payload, fresh_for=self._ttl)
+        if epoch == self._entity_epoch:
+            await self.set(key, cached)
+        return cached.to_response(cache_status="MISS", request=request)
+
+    async def invalidate_entities(self, entities: Iterable[tuple[str, int]]) -> None:
+        entities = sorted(set(entities))
+        if not entities:
+            return
+        keys = await self._drop_entities(entities)
+        await self._redis.delete(*keys)
+        await self._broadcast({"entities": entities})
+
+    async def _drop_entities(self, entities: Iterable[tuple[str, int]]) -> list[str]:
+        keys = [
+            self._key(await self.versioned_key(self.entity_key(entity, entity_id)))
+            for entity, entity_id in entities
+        ]
+        self._entity_epoch += 1
+        for key in keys:
+            self._memory.delete(key)
+            self.metrics.invalidations[self._namespaced_scope(key)] += 1
+        return keys
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        tags = tuple(tags)
+        if tags:
+            self.metrics.invalidations.update(tags)
+            await self._broadcast_generations(await self._generations.bump(tags))
 
     async def invalidate_all(self) -> None:
-        prefix = f"{self._namespace}:"
-        await self._memory.clear_prefix(prefix)
-        await self._redis.clear_prefix(prefix)
+        self.metrics.invalidations[ALL_TAG] += 1
+        await self._broadcast_generations(await self._generations.bump((ALL_TAG,)))
+
+    async def _broadcast_generations(self, generations: dict[str, int]) -> None:
+        if generations:
+            await self._broadcast({"generations": generations, "epoch": self._generations.epoch})
+
+    async def _broadcast(self, event: dict[str, Any]) -> None:
+        if not (settings.api_cache_pubsub_enabled and self._redis.configured):
+            return
+        await self._redis.publish(self._channel, encode_json({"origin": self._origin, **event}))
+        self.broadcasts_sent += 1
+
+    async def apply_invalidation(self, raw: bytes | str) -> None:
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            cache_logger.warning("Ignoring malformed cache invalidation event")
+            return
+        if event.get("origin") == self._origin:
+            return
+        self.broadcasts_received += 1
+        generations = event.get("generations")
+        if generations:
+            self._generations.observe(
+                {tag: int(value) for tag, value in generations.items()}, epoch=event.get("epoch")
+            )
+        entities = event.get("entities")
+        if entities:
+            entities = [(entity, int(entity_id)) for entity, entity_id in entities]
+            await self._drop_entities(entities)
+            self._notify_entity_observers(entities)
+
+    def observe_entities(self, callback: Callable[[list[tuple[str, int]] | None], None]) -> None:
+        if callback not in self._entity_observers:
+            self._entity_observers.append(callback)
+
+    def _notify_entity_observers(self, entities: list[tuple[str, int]] | None) -> None:
+        for callback in self._entity_observers:
+            try:
+                callback(entities)
+            except Exception:
+                cache_logger.warning("Entity observer failed", exc_info=True)
+
+    @property
+    def listening(self) -> bool:
+        return self._listener is not None and not self._listener.done()
+
+    async def start_listener(self) -> None:
+        if self.listening or not (settings.api_cache_pubsub_enabled and self._redis.configured):
+            return
+        self._listener = asyncio.create_task(self._listen(), name="api-cache-invalidations")
+
+    async def stop_listener(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._listener
+        self._listener = None
+
+    async def _listen(self) -> None:
+        retry = settings.api_cache_pubsub_retry_seconds
+        while True:
+            pubsub = await self._redis.subscribe(self._channel)
+            if pubsub is None:
+                await asyncio.sleep(retry)
+                continue
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self.apply_invalidation(message["data"])
+            except Exception:
+                cache_logger.warning("Cache invalidation subscription dropped", exc_info=True)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+            # Events published while disconnected are lost; start cold.
+            self._memory.clear()
+            self._entity_epoch += 1
+            self._notify_entity_observers(None)
+            await asyncio.sleep(retry)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "memory": self._memory.stats(),
+            "redis": self._redis.stats(),
+            "generations": self._generations.stats(),
+            "singleflight": {"builds": self.builds, "coalesced": self.coalesced, "inflight": len(self._inflight)},
+            **self.metrics.snapshot(self._memory.usage_by(self._namespaced_scope)),
+            "broadcasts": {
+                "listening": self.listening,
+                "sent": self.broadcasts_sent,
+                "received": self.broadcasts_received,
+            },
+        }
+
+
+class CacheVisibility(str, Enum):
+    ROLE = "role"  # shared by every user in the same role class
+    USER = "user"  # one entry per user
+    NONE = "none"  # never cached
+
+
+@dataclass(frozen=True)
+class CacheScope:
+    name: str
+    visibility: CacheVisibility
+    # Entities the payload depends on; see MUTATION_CACHE_TAGS for writers.
+    tags: tuple[str, ...]
+    # Query parameters the endpoint compares case-insensitively.
+    case_insensitive: frozenset[str] = frozenset()
+    cache_control: str = DEFAULT_CACHE_CONTROL
+
+
+CACHE_SCOPES = {
+    scope.name: scope
+    for scope in (
+        CacheScope(
+            "books:list",
+            CacheVisibility.ROLE,
+            ("books",),
+            frozenset({"q", "author", "subject", "availability", "sort_order"}),
+            cache_control=CATALOG_CACHE_CONTROL,
+        ),
+        CacheScope(
+            "books:facets",
+            CacheVisibility.ROLE,
+            ("books",),
+            frozenset({"q", "author", "subject", "availability"}),
+            cache_control=CATALOG_CACHE_CONTROL,
+        ),
+        # Member data: always revalidate (a 304 keeps that cheap).
+        CacheScope(
+            "users:list",
+            CacheVisibility.ROLE,
+            ("users",),
+            frozenset({"q", "role", "sort_order"}),
+            cache_control="private, no-cache",
+        ),
+        CacheScope(
+            "loans:list",
+            CacheVisibility.ROLE,
+            ("loans", "books", "users", "fine_payments", "policy"),
+            frozenset({"q", "sort_order"}),
+            cache_control="private, no-cache",
+        ),
+        CacheScope(
+            "fine_payments:list",
+            CacheVisibility.ROLE,
+            ("fine_payments", "books", "users"),
+            frozenset({"q", "payment_mode", "sort_order"}),
+            cache_control="private, no-cache",
+        ),
+        CacheScope(
+            "audit:list",
+            CacheVisibility.ROLE,
+            ("audit",),
+            frozenset({"q", "method", "entity", "sort_order"}),
+            cache_control="private, no-cache, no-transform",
+        ),
+    )
+}
+# Roles that see identical payloads share entries.
+ROLE_CLASSES = {"member": "patron", "staff": "staff", "admin": "staff"}
+
+
+def _normalize_value(value: Any, *, fold: bool) -> str:
+    if isinstance(value, bool):
+        text = "true" if value else "false"
+    elif hasattr(value, "isoformat"):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return text.lower() if fold else text
+
+
+def normalize_query(request: Request, scope: CacheScope) -> str:
+    # Parse with the route's own query definitions so equivalent URLs share an
+    # entry: defaults are dropped, multi-values sorted and de-duplicated, and
+    # case-insensitive filters folded.
+    route = request.scope.get("route")
+    fields = getattr(getattr(route, "dependant", None), "query_params", None)
+    if not fields:
+        return urlencode(sorted(request.query_params.multi_items()), doseq=True)
+    values, errors = request_params_to_args(fields, request.query_params)
+    if errors:
+        return urlencode(sorted(request.query_params.multi_items()), doseq=True)
+
+    items: list[tuple[str, str]] = []
+    for field in fields:
+        value = values.get(field.name)
+        fold = field.alias in scope.case_insensitive
+        if isinstance(value, list):
+            normalized = sorted({_normalize_value(entry, fold=fold).strip() for entry in value} - {""})
+            items.extend((field.alias, entry) for entry in normalized)
+            continue
+        if value is None:
+            continue
+        normalized_value = _normalize_value(value, fold=fold)
+        if field.default is not None and normalized_value == _normalize_value(field.default, fold=fold):
+            continue
+        items.append((field.alias, normalized_value))
+    return urlencode(sorted(items))
 
 
-def build_user_cache_key(request: Request, *, scope: str) -> str:
-    user_id = get_actor_user_id()
+def build_cache_key(request: Request, scope: CacheScope) -> str | None:
+    if scope.visibility is CacheVisibility.NONE:
+        return None
     role = get_actor_role() or "anonymous"
-    query_items = sorted(request.query_params.multi_items())
-    query_string = urlencode(query_items, doseq=True)
-    return f"{scope}|user:{user_id or 0}|role:{role}|path:{request.url.path}|query:{query_string}"
+    if scope.visibility is CacheVisibility.USER:
+        audience = f"user:{get_actor_user_id() or 0}|role:{role}"
+    else:
+        audience = f"role:{ROLE_CLASSES.get(role, role)}"
+    return f"{scope.name}|{audience}|path:{request.url.path}|query:{normalize_query(request, scope)}"
 
 
 api_cache = APICache()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.inspection import inspect as sa_inspect
+from sqlalchemy.orm import InstanceState, Session
+
+from ..db import Base
+
+# Avoid storing secrets in audit logs.
+SNAPSHOT_EXCLUDED_COLUMNS = {"password_hash"}
+# URL segments that do not match a table name.
+ENTITY_ALIASES = {"settings": "library_policies", "policy": "library_policies"}
+NOT_AUDITED_TABLES = {"audit_logs"}
+
+
+_registry: dict[str, type] = {}
+
+
+def audited_models() -> dict[str, type]:
+    # Built lazily so every model module has been imported and mapped.
+    if not _registry:
+        for mapper in Base.registry.mappers:
+            table_name = mapper.local_table.name
+            if table_name not in NOT_AUDITED_TABLES:
+                _registry[table_name] = mapper.class_
+    return _registry
+
+
+def table_for_segment(segment: str) -> str | None:
+    normalized = segment.lower().replace("-", "_")
+    normalized = ENTITY_ALIASES.get(normalized, normalized)
+    return normalized if normalized in audited_models() else None
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {key: _to_jsonable(entry) for key, entry in value.items()}
+    if isinstance(value, list):
+        return [_to_jsonable(entry) for entry in value]
+    return value
+
+
+def _column_keys(state: InstanceState) -> list[str]:
+    return [
+        column.key
+        for column in state.mapper.column_attrs
+        if column.key not in SNAPSHOT_EXCLUDED_COLUMNS
+    ]
+
+
+def current_snapshot(state: InstanceState) -> dict[str, Any]:
+    # Reads loaded attributes only; never emits lazy loads.
+    loaded = state.dict
+    return {key: _to_jsonable(loaded[key]) for key in _column_keys(state) if key in loaded}
+
+
+def committed_snapshot(state: InstanceState) -> dict[str, Any]:
+    snapshot: dict[str, Any] = {}
+    loaded = state.dict
+    for key in _column_keys(state):
+        history = state.attrs[key].history
+        if history.deleted:
+            snapshot[key] = _to_jsonable(history.deleted[0])
+        elif history.added:
+            # Value set without the previous one loaded: original is unknown.
+            continue
+        elif key in loaded:
+            snapshot[key] = _to_jsonable(loaded[key])
+    return snapshot
+
+
+def compute_change_diff(
+    before_snapshot: dict[str, Any] | None, after_snapshot: dict[str, Any] | None
+) -> dict[str, Any] | None:
+    if before_snapshot is None and after_snapshot is None:
+        return None
+    if before_snapshot is None:
+        return {"_created": {"from": None, "to": after_snapshot}}
+    if after_snapshot is None:
+        return {"_deleted": {"from": before_snapshot, "to": None}}
+
+    changed: dict[str, Any] = {}
+    for key in sorted(set(before_snapshot) & set(after_snapshot)):
+        before_value = before_snapshot[key]
+        after_value = after_snapshot[key]
+        if before_value != after_value:
+            changed[key] = {"from": before_value, "to": after_value}
+    return changed or None
+
+
+@dataclass
+class EntityChange:
+    entity: str
+    entity_id: Any
+    change_diff: dict[str, Any]
+
+
+class ChangeRecorder:
+    def __init__(self) -> None:
+        self._baselines: dict[InstanceState, dict[str, Any] | None] = {}
+        # The identity map is weak-referencing; keep tracked objects alive
+        # until the diff is computed after the handler returns.
+        self._objects: list[Any] = []
+
+    def _track(self, state: InstanceState, baseline: dict[str, Any] | None) -> None:
+        if state not in self._baselines:
+            self._baselines[state] = baseline
+            self._objects.append(state.obj())
+
+    def before_flush(self, session: Session) -> None:
+        for obj in session.new:
+            state = sa_inspect(obj)
+            if _is_audited(state):
+                self._track(state, None)
+        for obj in session.dirty:
+            state = sa_inspect(obj)
+            if _is_audited(state) and session.is_modified(obj):
+                self._track(state, committed_snapshot(state))
+        for obj in session.deleted:
+            state = sa_inspect(obj)
+            if _is_audited(state):
+                self._track(state, committed_snapshot(state))
+
+    def before_bulk_statement(self, session: Session, model: type) -> None:
+        # Core UPDATE/DELETE statements bypass the unit of work; baseline the
+        # instances already in the identity map before the statement runs.
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, model):
+                state = sa_inspect(obj)
+                self._track(state, current_snapshot(state))
+
+    def changes(self) -> list[EntityChange]:
+        changes: list[EntityChange] = []
+        for state, baseline in self._baselines.items():
+            if state.deleted or state.was_deleted:
+                after = None
+            elif state.key is None:
+                # Pending objects that were never flushed were not persisted.
+                continue
+            else:
+                after = current_snapshot(state)
+            diff = compute_change_diff(baseline, after)
+            if not diff:
+                continue
+            identity = state.identity or ()
+            entity_id = identity[0] if len(identity) == 1 else None
+            changes.append(
+                EntityChange(entity=state.mapper.local_table.name, entity_id=entity_id, change_diff=diff)
+            )
+        return changes
+
+
+def _is_audited(state: InstanceState) -> bool:
+    return state.mapper.local_table.name in audited_models()
+
+
+change_recorder_ctx: ContextVar[ChangeRecorder | None] = ContextVar("change_recorder", default=None)
+
+
+def start_change_recording() -> tuple[ChangeRecorder, Token]:
+    recorder = ChangeRecorder()
+    return recorder, change_recorder_ctx.set(recorder)
+
+
+def stop_change_recording(token: Token) -> None:
+    change_recorder_ctx.reset(token)
+
+
+def select_primary_change(changes: list[EntityChange], path: str) -> EntityChange | None:
+    segments = [segment for segment in path.strip("/").split("/") if segment]
+    # The most specific path segment naming an entity wins, e.g. fine payments
+    # for /loans/{id}/fine-payments and loans for /loans/{id}/return.
+    for index in range(len(segments) - 1, -1, -1):
+        table = table_for_segment(segments[index])
+        if table is None:
+            continue
+        matching = [change for change in changes if change.entity == table]
+        next_segment = segments[index + 1] if index + 1 < len(segments) else ""
+        if next_segment.isdigit():
+            target_id = int(next_segment)
+            matching = [change for change in matching if change.entity_id == target_id] or matching
+        if len(matching) == 1:
+            return matching[0]
+        if matching:
+            return None
+    return None
+
+
+@event.listens_for(Session, "before_flush")
+def _record_before_flush(session: Session, _flush_context: Any, _instances: Any) -> None:
+    recorder = change_recorder_ctx.get()
+    if recorder is not None:
+        recorder.before_flush(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_statement(orm_execute_state: Any) -> None:
+    recorder = change_recorder_ctx.get()
+    if recorder is None or not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in audited_models():
+        recorder.before_bulk_statement(orm_execute_state.session, mapper.class_)
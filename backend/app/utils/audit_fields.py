@@ -1,6 +1,6 @@
 from typing import Any
 
-from .request_context import get_actor_user_id
+from .request_context import get_actor_user_id, publish_created_entity
 
 
 def stamp_created_updated_by(obj: Any, *, is_create: bool) -> None:
@@ -11,3 +11,10 @@ def stamp_created_updated_by(obj: Any, *, is_create: bool) -> None:
         setattr(obj, "created_by", actor_user_id)
     if hasattr(obj, "updated_by"):
         setattr(obj, "updated_by", actor_user_id)
+
+
+def publish_created(obj: Any) -> None:
+    table_name = getattr(obj, "__tablename__", None)
+    obj_id = getattr(obj, "id", None)
+    if table_name and isinstance(obj_id, int):
+        publish_created_entity(table_name, obj_id)
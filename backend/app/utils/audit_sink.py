@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable
+
+from sqlalchemy import insert
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models import AuditLog
+from .api_cache import api_cache
+
+audit_logger = logging.getLogger("audit")
+
+OVERFLOW_POLICIES = {"drop_oldest", "drop_newest", "block"}
+_STOP = object()
+
+
+class AuditLogWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Any] = SessionLocal,
+        *,
+        max_queue_size: int | None = None,
+        batch_size: int | None = None,
+        flush_interval_seconds: float | None = None,
+        overflow_policy: str | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_queue_size = max(
+            max_queue_size if max_queue_size is not None else settings.audit_log_queue_max_size, 1
+        )
+        self.batch_size = max(batch_size if batch_size is not None else settings.audit_log_batch_size, 1)
+        self.flush_interval_seconds = (
+            flush_interval_seconds
+            if flush_interval_seconds is not None
+            else settings.audit_log_flush_interval_seconds
+        )
+        policy = overflow_policy or settings.audit_log_overflow_policy
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {sorted(OVERFLOW_POLICIES)}")
+        self.overflow_policy = policy
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+
+    async def stop(self) -> None:
+        if not self.running or self._queue is None:
+            return
+        # From here on submit() writes inline, so _STOP is always the last
+        # item in the queue and nothing queued behind it is lost.
+        self._stopping = True
+        try:
+            await self._queue.put(_STOP)
+            await self._task
+        finally:
+            self._stopping = False
+        self._task = None
+        self._queue = None
+
+    async def submit(self, entry: dict[str, Any]) -> None:
+        if not self.running or self._queue is None or self._stopping:
+            # No background writer (e.g. lifespan not started) or it is
+            # draining for shutdown: persist inline.
+            await self._write([entry])
+            return
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.overflow_policy == "block":
+            await self._queue.put(entry)
+            return
+        self.dropped += 1
+        if self.overflow_policy == "drop_oldest":
+            # The head is an entry: _STOP is only queued once stop() has begun,
+            # and submit() no longer queues by then.
+            self._queue.get_nowait()
+            self._queue.put_nowait(entry)
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self.flush_interval_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+        except Exception:
+            self.failed += len(batch)
+            audit_logger.exception("Failed to persist %d audit log entries", len(batch))
+            return
+        self.flushed += len(batch)
+        self.batches += 1
+        await api_cache.invalidate_tags(("audit",))
+
+
+audit_log_writer = AuditLogWriter()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import DateTime, and_, func, literal, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+CURSOR_DESCRIPTION = f"{NEXT_CURSOR_HEADER} from the previous page; skip is ignored when set"
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _field(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, Mapping) else getattr(row, name)
+
+
+@dataclass(frozen=True, slots=True)
+class Keyset:
+    # Seek pagination over ORDER BY (column, tiebreaker). The cursor holds the
+    # last row's sort value and id, so the next page starts with an index
+    # range scan instead of reading and discarding `skip` rows. Nullable
+    # columns sort NULLS LAST on every dialect so the seek condition is the
+    # same on SQLite and Postgres.
+    column: Any
+    tiebreaker: Any
+    descending: bool = False
+    tiebreaker_descending: bool = False
+    field: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self.field or self.column.key
+
+    @property
+    def nullable(self) -> bool:
+        return bool(getattr(self.column, "nullable", False))
+
+    def _sort_expression(self, expression: Any, dialect: str | None) -> Any:
+        # SQLite keeps datetimes as text in two shapes: func.now() defaults
+        # have no fraction, values bound from Python have six digits. Sort and
+        # compare on one canonical form so equal instants compare equal.
+        if dialect == "sqlite" and isinstance(self.column.type, DateTime):
+            return func.strftime("%Y-%m-%d %H:%M:%f", expression)
+        return expression
+
+    def order_by(self, dialect: str | None = None) -> tuple[Any, Any]:
+        column = self._sort_expression(self.column, dialect)
+        order = column.desc() if self.descending else column.asc()
+        if self.nullable:
+            order = order.nulls_last()
+        tiebreaker = self.tiebreaker.desc() if self.tiebreaker_descending else self.tiebreaker.asc()
+        return order, tiebreaker
+
+    def encode(self, row: Any) -> str:
+        token = {
+            "k": self.name,
+            "d": int(self.descending),
+            "v": _dump(_field(row, self.name)),
+            "id": _field(row, self.tiebreaker.key),
+        }
+        raw = json.dumps(token, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    def decode(self, cursor: str) -> tuple[Any, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            token = json.loads(raw)
+            key, descending, value, last_id = token["k"], token["d"], token["v"], int(token["id"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise ValueError("Invalid cursor") from None
+        if key != self.name or bool(descending) != self.descending:
+            raise ValueError("Cursor does not match the requested sort order")
+        return self._coerce(value), last_id
+
+    def _coerce(self, value: Any) -> Any:
+        if value is None:
+            return None
+        try:
+            python_type = self.column.type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            if issubclass(python_type, datetime):
+                return datetime.fromisoformat(value)
+            if issubclass(python_type, date):
+                return date.fromisoformat(value)
+            return python_type(value)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor") from None
+
+    def after(self, cursor: str, dialect: str | None = None) -> Any:
+        value, last_id = self.decode(cursor)
+        tiebreaker = self.tiebreaker < last_id if self.tiebreaker_descending else self.tiebreaker > last_id
+        if value is None:
+            # Only the NULL tail is left.
+            return and_(self.column.is_(None), tiebreaker)
+        column = self._sort_expression(self.column, dialect)
+        value = self._sort_expression(literal(value, self.column.type), dialect)
+        beyond = column < value if self.descending else column > value
+        condition = or_(beyond, and_(column == value, tiebreaker))
+        if self.nullable:
+            condition = or_(condition, self.column.is_(None))
+        return condition
+
+    def apply(self, stmt: Any, cursor: str | None, *, dialect: str | None = None) -> Any:
+        if cursor:
+            stmt = stmt.where(self.after(cursor, dialect))
+        return stmt.order_by(*self.order_by(dialect))
+
+    def next_cursor(self, rows: Sequence[Any], limit: int) -> str | None:
+        # A short page is the last one.
+        if not rows or len(rows) < limit:
+            return None
+        return self.encode(rows[-1])
+
+
+def cursor_headers(keyset: Keyset | None, rows: Sequence[Any], limit: int) -> dict[str, str]:
+    cursor = keyset.next_cursor(rows, limit) if keyset is not None else None
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
+
+def check_cursor(keyset: Keyset | None, cursor: str | None) -> None:
+    if not cursor:
+        return
+    if keyset is None:
+        raise ValueError("Cursor pagination is not available for this ordering.")
+    keyset.decode(cursor)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    # Lightweight stand-in for User; carries what auth checks and /me need.
+    id: int
+    name: str
+    email: str | None
+    phone: str | None
+    role: str
+    created_at: datetime
+    version: int
+
+    @classmethod
+    def from_user(cls, user: User, version: int) -> Principal:
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            phone=user.phone,
+            role=user.role,
+            created_at=user.created_at,
+            version=version,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: int | None = None, enabled: bool | None = None) -> None:
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.auth_principal_cache_ttl_seconds
+        self.enabled = enabled if enabled is not None else settings.auth_principal_cache_enabled
+        self._entries: dict[int, tuple[float, Principal]] = {}
+        self._versions: dict[int, int] = {}
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= monotonic() or principal.version != self._versions.get(user_id, 0):
+                self._entries.pop(user_id, None)
+                return None
+            return principal
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def put(self, user: User, *, version: int) -> Principal:
+        principal = Principal.from_user(user, version)
+        with self._lock:
+            # A concurrent update bumped the version while we were loading: keep it out.
+            if version == self._versions.get(user.id, 0):
+                self._entries[user.id] = (monotonic() + self.ttl_seconds, principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+    def invalidate_after_commit(self, db: AsyncSession, user_id: int) -> None:
+        # Bump now so reads inside the writing transaction skip the cache, and
+        # again once it commits: a resolve on another session in between loads
+        # the old committed row under the first bump's version.
+        self.invalidate(user_id)
+        session = db.sync_session
+        pending = session.info.get("principal_cache_pending")
+        if pending is None:
+            pending = session.info["principal_cache_pending"] = set()
+
+            def _invalidate(_: object) -> None:
+                user_ids = list(pending)
+                pending.clear()
+                for pending_id in user_ids:
+                    self.invalidate(pending_id)
+
+            event.listen(session, "after_commit", _invalidate)
+            event.listen(session, "after_rollback", lambda _: pending.clear())
+        pending.add(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    async def resolve(self, db: AsyncSession, user_id: int) -> Principal | User | None:
+        if not self.enabled:
+            return await db.get(User, user_id)
+        principal = self.get(user_id)
+        if principal is not None:
+            return principal
+        version = self.version(user_id)
+        user = await db.get(User, user_id)
+        if user is None:
+            return None
+        return self.put(user, version=version)
+
+
+principal_cache = PrincipalCache()
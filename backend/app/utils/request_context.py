@@ -6,6 +6,9 @@ from typing import Any
 actor_user_id_ctx: ContextVar[int | None] = ContextVar("actor_user_id", default=None)
 actor_role_ctx: ContextVar[str | None] = ContextVar("actor_role", default=None)
 actor_user_ctx: ContextVar[Any | None] = ContextVar("actor_user", default=None)
+actor_claims_ctx: ContextVar[dict[str, Any] | None] = ContextVar("actor_claims", default=None)
+created_entities_ctx: ContextVar[dict[str, int] | None] = ContextVar("created_entities", default=None)
+changed_entities_ctx: ContextVar[set[tuple[str, int]] | None] = ContextVar("changed_entities", default=None)
 
 
 @dataclass
@@ -13,13 +16,17 @@ class ContextTokens:
     user_id: Token
     role: Token
     user: Token
+    claims: Token
 
 
-def set_actor_context(user_id: int | None, role: str | None) -> ContextTokens:
+def set_actor_context(
+    user_id: int | None, role: str | None, claims: dict[str, Any] | None = None
+) -> ContextTokens:
     return ContextTokens(
         user_id=actor_user_id_ctx.set(user_id),
         role=actor_role_ctx.set(role),
         user=actor_user_ctx.set(None),
+        claims=actor_claims_ctx.set(claims),
     )
 
 
@@ -27,6 +34,7 @@ def reset_actor_context(tokens: ContextTokens) -> None:
     actor_user_id_ctx.reset(tokens.user_id)
     actor_role_ctx.reset(tokens.role)
     actor_user_ctx.reset(tokens.user)
+    actor_claims_ctx.reset(tokens.claims)
 
 
 def get_actor_user_id() -> int | None:
@@ -37,9 +45,53 @@ def get_actor_role() -> str | None:
     return actor_role_ctx.get()
 
 
+def get_actor_claims() -> dict[str, Any] | None:
+    return actor_claims_ctx.get()
+
+
 def set_actor_user(user: Any) -> None:
     actor_user_ctx.set(user)
 
 
 def get_actor_user() -> Any | None:
     return actor_user_ctx.get()
+
+
+def begin_created_entity_capture() -> Token:
+    # Handlers run in a child context; a shared dict lets them report back.
+    return created_entities_ctx.set({})
+
+
+def end_created_entity_capture(token: Token) -> None:
+    created_entities_ctx.reset(token)
+
+
+def publish_created_entity(entity: str, entity_id: int) -> None:
+    created = created_entities_ctx.get()
+    if created is not None:
+        created.setdefault(entity, entity_id)
+
+
+def get_created_entity_id(entity: str) -> int | None:
+    created = created_entities_ctx.get()
+    if created is None:
+        return None
+    return created.get(entity)
+
+
+def begin_changed_entity_capture() -> Token:
+    return changed_entities_ctx.set(set())
+
+
+def end_changed_entity_capture(token: Token) -> None:
+    changed_entities_ctx.reset(token)
+
+
+def publish_changed_entity(entity: str, entity_id: int) -> None:
+    changed = changed_entities_ctx.get()
+    if changed is not None:
+        changed.add((entity, entity_id))
+
+
+def get_changed_entities() -> set[tuple[str, int]]:
+    return changed_entities_ctx.get() or set()
@@ -1,4 +1,11 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import partial
+import hashlib
+from threading import Lock
+from time import time
 from uuid import uuid4
 
 from jose import JWTError, jwt
@@ -6,7 +13,11 @@ from passlib.context import CryptContext
 
 from ..config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt_sha256", "bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256", "bcrypt"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.password_bcrypt_rounds,
+)
 
 
 def hash_password(password: str) -> str:
@@ -17,6 +28,47 @@ def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
 
+def verify_and_update_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+class PasswordService:
+    # bcrypt releases the GIL, so a small thread pool keeps hashing off the
+    # event loop; the semaphore caps how many requests queue for it at once.
+    def __init__(self, max_workers: int, max_concurrency: int) -> None:
+        self.max_workers = max(max_workers, 1)
+        self.max_concurrency = max(max_concurrency, 1)
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), partial(func, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(verify_password, password, password_hash)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        # The new hash is set when the stored one uses an outdated scheme or cost.
+        return await self._run(verify_and_update_password, password, password_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_service = PasswordService(settings.password_hash_workers, settings.password_hash_max_concurrency)
+
+
 def create_access_token(*, user_id: int, role: str, subject: str) -> str:
     issued_at = datetime.now(timezone.utc)
     expire = issued_at + timedelta(
@@ -47,3 +99,62 @@ def decode_access_token(token: str) -> dict:
     if not isinstance(payload.get("jti"), str):
         raise ValueError("Invalid token")
     return payload
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # Bind entries to the signing config so a rotated secret cannot reuse them.
+        material = f"{settings.jwt_algorithm}:{settings.jwt_secret_key}:{token}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        expires_at = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(expires_at), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache(settings.auth_token_cache_max_entries)
+
+
+def verify_access_token(token: str) -> dict:
+    # Signature checks run once per token; verified claims live until `exp`.
+    payload = verified_token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = decode_access_token(token)
+    verified_token_cache.put(token, payload)
+    return payload
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from contextlib import suppress
+import logging
+import re
+import sys
+from threading import Lock
+from typing import Any, Callable, Iterable
+import unicodedata
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models import Book, User
+from .api_cache import api_cache
+from .request_context import publish_changed_entity
+
+suggest_logger = logging.getLogger("suggest_index")
+
+WORD_START = re.compile(r"[\s@._+\-/,:;()]+")
+NON_DIGITS = re.compile(r"\D+")
+DIGIT_QUERY = re.compile(r"[\d\s+\-()]+")
+# Per-entry overhead of the two parallel lists (one pointer each).
+_SLOT_BYTES = 2 * 8
+
+Snapshot = tuple[list[str], list[int], dict[int, tuple[Any, ...]], int, int]
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return " ".join(folded.split())
+
+
+class PrefixIndex:
+    # Typeahead over a few text fields, kept per worker. Every field value
+    # contributes its normalized text and each suffix starting at a word
+    # boundary (so "herb" finds "Frank Herbert"); digit fields also index
+    # their digits only (so "9780" finds "978-0-..."). Keys live in a sorted
+    # list searched with bisect, with document ids in a parallel list: a
+    # lookup is one binary search plus a short forward scan, and memory is
+    # two pointers per key plus the key strings, tracked in `bytes`.
+    def __init__(
+        self,
+        name: str,
+        fields: tuple[str, ...],
+        digit_fields: frozenset[str] = frozenset(),
+        *,
+        max_entries: int | None = None,
+        max_key_length: int | None = None,
+        max_words: int | None = None,
+    ) -> None:
+        self.name = name
+        self.fields = fields
+        self.digit_fields = digit_fields
+        self.max_entries = max_entries if max_entries is not None else settings.suggest_index_max_entries
+        self.max_key_length = max_key_length if max_key_length is not None else settings.suggest_index_max_key_length
+        self.max_words = max_words if max_words is not None else settings.suggest_index_max_words
+        self._keys: list[str] = []
+        self._ids: list[int] = []
+        self._docs: dict[int, tuple[Any, ...]] = {}
+        self._bytes = 0
+        self._lock = Lock()
+        self.dropped = 0
+        self.loaded = False
+        # Changes made while a rebuild reads the database are replayed onto
+        # the new arrays before they are swapped in.
+        self._replay: list[tuple[int, tuple[Any, ...] | None]] | None = None
+
+    def tokens(self, values: tuple[Any, ...]) -> set[str]:
+        tokens: set[str] = set()
+        for field, value in zip(self.fields, values):
+            if not value:
+                continue
+            text = normalize(str(value))
+            starts = [0] + [match.end() for match in WORD_START.finditer(text)]
+            for start in starts[: self.max_words]:
+                if start < len(text):
+                    tokens.add(text[start : start + self.max_key_length])
+            if field in self.digit_fields:
+                digits = NON_DIGITS.sub("", text)
+                if digits:
+                    tokens.add(digits[: self.max_key_length])
+        return tokens
+
+    def _doc_bytes(self, values: tuple[Any, ...]) -> int:
+        return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values if value is not None)
+
+    def _add_key(self, token: str, doc_id: int) -> None:
+        position = bisect_right(self._keys, token)
+        self._keys.insert(position, token)
+        self._ids.insert(position, doc_id)
+        self._bytes += sys.getsizeof(token) + _SLOT_BYTES
+
+    def _drop_key(self, token: str, doc_id: int) -> None:
+        low = bisect_left(self._keys, token)
+        high = bisect_right(self._keys, token, lo=low)
+        for position in range(low, high):
+            if self._ids[position] == doc_id:
+                del self._keys[position]
+                del self._ids[position]
+                self._bytes -= sys.getsizeof(token) + _SLOT_BYTES
+                return
+
+    def _apply(self, doc_id: int, values: tuple[Any, ...] | None) -> None:
+        # Only keys that changed move: each insert or delete shifts the tail
+        # of both lists, so an edit that keeps the title costs nothing there.
+        old_values = self._docs.get(doc_id)
+        old = self.tokens(old_values) if old_values is not None else set()
+        new = self.tokens(values) if values is not None else set()
+        if values is not None and old_values is None and len(self._keys) + len(new) > self.max_entries:
+            self.dropped += 1
+            return
+        for token in old - new:
+            self._drop_key(token, doc_id)
+        for token in new - old:
+            self._add_key(token, doc_id)
+        if old_values is not None:
+            self._bytes -= self._doc_bytes(old_values)
+            del self._docs[doc_id]
+        if values is not None:
+            self._docs[doc_id] = values
+            self._bytes += self._doc_bytes(values)
+
+    def upsert(self, doc_id: int, values: tuple[Any, ...]) -> None:
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((doc_id, values))
+            self._apply(doc_id, values)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((doc_id, None))
+            self._apply(doc_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys, self._ids, self._docs = [], [], {}
+            self._bytes = 0
+            self.dropped = 0
+            self.loaded = False
+
+    def search(self, q: str, *, limit: int = 10) -> list[tuple[int, tuple[Any, ...]]]:
+        prefix = normalize(q)
+        if prefix and DIGIT_QUERY.fullmatch(q.strip()) and any(field in self.digit_fields for field in self.fields):
+            prefix = NON_DIGITS.sub("", prefix) or prefix
+        prefix = prefix[: self.max_key_length]
+        if not prefix:
+            return []
+        matches: list[tuple[int, tuple[Any, ...]]] = []
+        seen: set[int] = set()
+        with self._lock:
+            keys, ids = self._keys, self._ids
+            position = bisect_left(keys, prefix)
+            # A document has at most max_words + 1 keys per field, so `limit`
+            # distinct documents fit in this window; it also keeps a one-letter
+            # prefix over duplicate-heavy keys cheap.
+            end = min(len(keys), position + limit * (self.max_words + 1) * len(self.fields))
+            while position < end and keys[position].startswith(prefix):
+                doc_id = ids[position]
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    matches.append((doc_id, self._docs[doc_id]))
+                    if len(matches) >= limit:
+                        break
+                position += 1
+        return matches
+
+    def builder(self) -> SnapshotBuilder:
+        return SnapshotBuilder(self)
+
+    def build(self, rows: Iterable[tuple[int, tuple[Any, ...]]]) -> Snapshot:
+        builder = self.builder()
+        builder.add(rows)
+        return builder.finish()
+
+    def begin_rebuild(self) -> None:
+        with self._lock:
+            self._replay = []
+
+    def abort_rebuild(self) -> None:
+        with self._lock:
+            self._replay = None
+
+    def swap(self, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._keys, self._ids, self._docs, self._bytes, self.dropped = snapshot
+            replay, self._replay = self._replay or [], None
+            for doc_id, values in replay:
+                self._apply(doc_id, values)
+            self.loaded = True
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "entries": len(self._keys),
+                "max_entries": self.max_entries,
+                "dropped": self.dropped,
+                "bytes": self._bytes,
+                "loaded": self.loaded,
+            }
+
+
+class SnapshotBuilder:
+    # Collects keys batch by batch so a rebuild can stream rows from the
+    # database instead of loading the table first. Touches no shared state,
+    # so add() and finish() can run in a worker thread.
+    def __init__(self, index: PrefixIndex) -> None:
+        self.index = index
+        self.pairs: list[tuple[str, int]] = []
+        self.docs: dict[int, tuple[Any, ...]] = {}
+        self.size = 0
+        self.dropped = 0
+
+    def add(self, rows: Iterable[tuple[int, tuple[Any, ...]]]) -> None:
+        for doc_id, values in rows:
+            tokens = self.index.tokens(values)
+            if len(self.pairs) + len(tokens) > self.index.max_entries:
+                self.dropped += 1
+                continue
+            self.pairs.extend((token, doc_id) for token in tokens)
+            self.size += sum(sys.getsizeof(token) + _SLOT_BYTES for token in tokens)
+            self.size += self.index._doc_bytes(values)
+            self.docs[doc_id] = values
+
+    def finish(self) -> Snapshot:
+        pairs, self.pairs = self.pairs, []
+        pairs.sort()
+        return [key for key, _ in pairs], [doc_id for _, doc_id in pairs], self.docs, self.size, self.dropped
+
+
+book_suggestions = PrefixIndex("books", ("title", "author", "isbn"), frozenset({"isbn"}))
+user_suggestions = PrefixIndex("users", ("name", "email", "phone"), frozenset({"phone"}))
+
+
+def book_values(book: Any) -> tuple[Any, ...]:
+    return (book.title, book.author, book.isbn)
+
+
+def user_values(user: Any) -> tuple[Any, ...]:
+    return (user.name, user.email, user.phone)
+
+
+def index_after_commit(
+    db: AsyncSession, index: PrefixIndex, doc_id: int, values: tuple[Any, ...] | None
+) -> None:
+    # Index changes wait for the writing transaction (`values=None` removes):
+    # a rolled-back create never shows up in suggestions. Other workers hear
+    # about the change through the cache invalidation broadcast.
+    publish_changed_entity(index.name, doc_id)
+    session = db.sync_session
+    pending = session.info.get("suggest_index_pending")
+    if pending is None:
+        pending = session.info["suggest_index_pending"] = []
+
+        def _apply(_: Any) -> None:
+            changes = list(pending)
+            pending.clear()
+            for change_index, change_id, change_values in changes:
+                if change_values is None:
+                    change_index.remove(change_id)
+                else:
+                    change_index.upsert(change_id, change_values)
+
+        event.listen(session, "after_commit", _apply)
+        event.listen(session, "after_rollback", lambda _: pending.clear())
+    pending.append((index, doc_id, values))
+
+
+class SuggestIndexes:
+    # Builds both indexes in the background at startup, streaming the rows.
+    # After that, changes made by other workers arrive as cache invalidation
+    # events and only those ids are reloaded. A full rebuild runs again when
+    # events may have been lost, and every `suggest_index_refresh_seconds`
+    # while no invalidation subscription is running (e.g. without Redis).
+    def __init__(self, session_factory: Callable[[], AsyncSession] = SessionLocal) -> None:
+        self.session_factory = session_factory
+        self.indexes = {"books": book_suggestions, "users": user_suggestions}
+        self._queries = {
+            "books": select(Book.id, Book.title, Book.author, Book.isbn),
+            "users": select(User.id, User.name, User.email, User.phone),
+        }
+        self._models = {"books": Book, "users": User}
+        self._pending: dict[str, set[int]] = {name: set() for name in self.indexes}
+        self._stale = True
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def observe(self, entities: list[tuple[str, int]] | None) -> None:
+        if entities is None:
+            self._stale = True
+        else:
+            for entity, entity_id in entities:
+                if entity in self._pending:
+                    self._pending[entity].add(entity_id)
+        self._wake.set()
+
+    async def rebuild(self) -> None:
+        batch_size = settings.suggest_index_stream_batch_size
+        for name, index in self.indexes.items():
+            builder = index.builder()
+            index.begin_rebuild()
+            try:
+                async with self.session_factory() as db:
+                    result = await db.stream(self._queries[name].execution_options(yield_per=batch_size))
+                    async for rows in result.partitions():
+                        await asyncio.to_thread(builder.add, [(row[0], tuple(row[1:])) for row in rows])
+                snapshot = await asyncio.to_thread(builder.finish)
+            except BaseException:
+                index.abort_rebuild()
+                raise
+            index.swap(snapshot)
+        self._stale = False
+
+    async def refresh_pending(self) -> None:
+        for name, index in self.indexes.items():
+            ids, self._pending[name] = self._pending[name], set()
+            if not ids:
+                continue
+            model = self._models[name]
+            try:
+                async with self.session_factory() as db:
+                    rows = (await db.execute(self._queries[name].where(model.id.in_(ids)))).all()
+            except BaseException:
+                self._pending[name] |= ids
+                raise
+            found = {row[0]: tuple(row[1:]) for row in rows}
+            for doc_id in ids:
+                if doc_id in found:
+                    index.upsert(doc_id, found[doc_id])
+                else:
+                    index.remove(doc_id)
+
+    async def start(self) -> None:
+        if not settings.suggest_index_enabled or self._task is not None:
+            return
+        api_cache.observe_entities(self.observe)
+        self._stale = True
+        # Suggestions fill in once the build finishes; startup does not wait.
+        self._task = asyncio.create_task(self._run(), name="suggest-index-refresh")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                if self._stale:
+                    await self.rebuild()
+                await self.refresh_pending()
+            except Exception:
+                suggest_logger.warning("Suggest index refresh failed", exc_info=True)
+            interval = settings.suggest_index_refresh_seconds
+            # Without the subscription, periodic rebuilds are the only way to
+            # see other workers' writes; after a failure they are the retry.
+            periodic = interval > 0 and (self._stale or not api_cache.listening)
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval if periodic else None)
+            except asyncio.TimeoutError:
+                self._stale = True
+
+    def stats(self) -> dict[str, Any]:
+        return {name: index.stats() for name, index in self.indexes.items()}
+
+
+suggest_indexes = SuggestIndexes()
@@ -0,0 +1,86 @@
+# Benchmark for how cached pages are serialized: bytes stored (memory tier and
+# Redis) against the CPU spent encoding and decoding a list page.
+#
+# "identity" disables compression, i.e. the previous format. For each gzip
+# level it reports:
+# - encode: JSON encoding, compression and the Redis serialization;
+# - decode: reading the entry back from Redis;
+# - identity hit: the extra gunzip for a client that does not send
+#   Accept-Encoding: gzip. Clients that accept gzip get the stored bytes as-is.
+#
+#   cd backend && python -m scripts.bench_cache_codec --rows 100 500 --iterations 200
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+from app.schemas.books import BookOut
+from app.utils import api_cache as api_cache_module
+from app.utils.api_cache import CachedResponse, PayloadCodec
+
+
+def _payload(rows: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        BookOut(
+            id=index,
+            title=f"The Collected Stories of Author {index % 211}, Volume {index % 7}",
+            author=f"Author {index % 211}",
+            subject=("Fiction", "History", "Science", "Poetry")[index % 4],
+            rack_number=f"R-{index % 40}",
+            isbn=f"978{index:010d}",
+            published_year=1950 + index % 70,
+            copies_total=3,
+            copies_available=index % 4,
+            created_at=now - timedelta(days=index),
+            updated_at=now,
+        ).model_dump(mode="json")
+        for index in range(rows)
+    ]
+
+
+def _time_us(fn, iterations: int) -> float:
+    started = perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (perf_counter() - started) / iterations * 1_000_000
+
+
+def _measure(name: str, codec: PayloadCodec, payload: list[dict], iterations: int) -> None:
+    # CachedResponse.from_payload compresses with the module-level codec.
+    api_cache_module.payload_codec = codec
+    cached = CachedResponse.from_payload(payload)
+    encoded = codec.encode(cached)
+    encode_us = _time_us(lambda: codec.encode(CachedResponse.from_payload(payload)), iterations)
+    decode_us = _time_us(lambda: codec.decode(encoded), iterations)
+    identity_us = _time_us(lambda: codec.decode(encoded).identity_body, iterations)
+    print(
+        f"{name:<10}{cached.size:>12,}{len(encoded):>12,}{len(cached.identity_body) / cached.size:>8.1f}x"
+        f"{encode_us:>12.1f}{decode_us:>12.1f}{identity_us:>14.1f}"
+    )
+
+
+def main(row_counts: list[int], iterations: int) -> None:
+    original = api_cache_module.payload_codec
+    try:
+        for rows in row_counts:
+            payload = _payload(rows)
+            print(f"\n{rows} rows per page, {iterations} iterations")
+            print(
+                f"{'codec':<10}{'memory B':>12}{'redis B':>12}{'ratio':>9}"
+                f"{'encode us':>12}{'decode us':>12}{'identity us':>14}"
+            )
+            _measure("identity", PayloadCodec(min_bytes=0), payload, iterations)
+            for level in (1, 6, 9):
+                _measure(f"gzip-{level}", PayloadCodec(min_bytes=1, level=level), payload, iterations)
+    finally:
+        api_cache_module.payload_codec = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.iterations)
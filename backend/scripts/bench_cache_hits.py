@@ -0,0 +1,110 @@
+# Benchmark for the CPU cost of a cached list response.
+#
+# "before" mimics the old hit path: json.loads of the cached string, then
+# FastAPI validates the list against response_model and re-encodes it.
+# "after" returns the pre-encoded CachedResponse body as a raw Response.
+# Requests are driven straight through the ASGI interface so client overhead
+# does not dilute the numbers.
+#
+#   cd backend && python -m scripts.bench_cache_hits --rows 100 --requests 2000
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+from time import perf_counter, process_time
+
+from fastapi import FastAPI
+
+from app.schemas.books import BookOut
+from app.utils.api_cache import CachedResponse
+
+
+def _payload(rows: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        BookOut(
+            id=index,
+            title=f"Title {index}",
+            author=f"Author {index % 17}",
+            subject="Fiction",
+            rack_number=f"R-{index % 9}",
+            isbn=f"978{index:010d}",
+            published_year=1990 + index % 30,
+            copies_total=3,
+            copies_available=2,
+            created_at=now,
+            updated_at=now,
+        ).model_dump(mode="json")
+        for index in range(rows)
+    ]
+
+
+def _build_app(payload: list[dict]) -> FastAPI:
+    bench_app = FastAPI()
+    stored_json = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    stored_response = CachedResponse.from_payload(payload)
+
+    @bench_app.get("/before", response_model=list[BookOut])
+    async def before():
+        return json.loads(stored_json)
+
+    @bench_app.get("/after", response_model=list[BookOut])
+    async def after():
+        return stored_response.to_response(cache_status="HIT")
+
+    return bench_app
+
+
+async def _call(bench_app: FastAPI, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    body_size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal body_size
+        if message["type"] == "http.response.body":
+            body_size += len(message.get("body", b""))
+
+    await bench_app(scope, receive, send)
+    return body_size
+
+
+async def main(rows: int, requests: int) -> None:
+    bench_app = _build_app(_payload(rows))
+    print(f"{rows} rows per page, {requests} requests")
+    print(f"{'path':<10}{'cpu us/req':>12}{'wall us/req':>13}{'body bytes':>12}")
+    for path in ("/before", "/after"):
+        for _ in range(min(requests // 10, 200)):
+            await _call(bench_app, path)
+        cpu_started = process_time()
+        wall_started = perf_counter()
+        for _ in range(requests):
+            size = await _call(bench_app, path)
+        cpu = (process_time() - cpu_started) / requests * 1_000_000
+        wall = (perf_counter() - wall_started) / requests * 1_000_000
+        print(f"{path:<10}{cpu:>12.1f}{wall:>13.1f}{size:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.requests))
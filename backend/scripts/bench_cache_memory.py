@@ -0,0 +1,100 @@
+# Stress benchmark for the in-memory API cache tier under high key cardinality.
+#
+# Writes unique user-scoped keys (as build_user_cache_key produces for
+# arbitrary query strings) and reports process RSS as the key count grows, for
+# an unbounded dict (the previous tier) and for the bounded LRU tier.
+#
+#   cd backend && python -m scripts.bench_cache_memory --keys 200000
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+from time import monotonic, perf_counter
+
+from app.utils.api_cache import CachedResponse, InMemoryTTLCache
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+
+        # Peak RSS only; KiB on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if os.uname().sysname == "Linux" else peak / (1024 * 1024)
+
+
+class UnboundedCache:
+    def __init__(self) -> None:
+        self._store: dict[str, tuple[float, str]] = {}
+
+    def set_json(self, key: str, value, ttl_seconds: int) -> None:
+        payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+        self._store[key] = (monotonic() + ttl_seconds, payload)
+
+
+class BoundedCache:
+    def __init__(self, tier: InMemoryTTLCache) -> None:
+        self.tier = tier
+
+    def set_json(self, key: str, value, ttl_seconds: int) -> None:
+        self.tier.set(key, CachedResponse.from_payload(value), ttl_seconds)
+
+    def stats(self) -> dict[str, int]:
+        return self.tier.stats()
+
+
+def _payload(index: int, rows: int) -> list[dict]:
+    return [
+        {"id": index * rows + row, "title": f"Title {index}-{row}", "author": "Author", "copies_available": 1}
+        for row in range(rows)
+    ]
+
+
+async def _run(name: str, cache, keys: int, rows: int, checkpoints: int) -> None:
+    gc.collect()
+    baseline = _rss_mb()
+    step = max(keys // checkpoints, 1)
+    started = perf_counter()
+    print(f"\n{name}")
+    print(f"{'keys':>10}{'rss MB':>10}{'delta MB':>10}")
+    for index in range(keys):
+        key = f"nls:api-cache:books:list|user:{index % 500}|role:staff|path:/books|query:q=term{index}"
+        cache.set_json(key, _payload(index, rows), ttl_seconds=300)
+        if (index + 1) % step == 0:
+            rss = _rss_mb()
+            print(f"{index + 1:>10}{rss:>10.1f}{rss - baseline:>10.1f}")
+    elapsed = perf_counter() - started
+    print(f"{keys / elapsed:,.0f} sets/s")
+    if hasattr(cache, "stats"):
+        print(cache.stats())
+
+
+async def main(keys: int, rows: int, max_entries: int, max_mb: int, checkpoints: int) -> None:
+    await _run(
+        "bounded LRU tier",
+        BoundedCache(
+            InMemoryTTLCache(max_entries=max_entries, max_bytes=max_mb * 1024 * 1024, sweep_interval_seconds=30)
+        ),
+        keys,
+        rows,
+        checkpoints,
+    )
+    await _run("unbounded dict", UnboundedCache(), keys, rows, checkpoints)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--max-entries", type=int, default=5000)
+    parser.add_argument("--max-mb", type=int, default=16)
+    parser.add_argument("--checkpoints", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.keys, args.rows, args.max_entries, args.max_mb, args.checkpoints))
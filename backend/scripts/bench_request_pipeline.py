@@ -0,0 +1,135 @@
+# Micro-benchmark for per-request middleware overhead.
+#
+# Compares the same routes served with no middleware, with the pipeline stages
+# stacked as individual BaseHTTPMiddleware layers (the previous layout) and with
+# the single pure-ASGI RequestPipelineMiddleware.
+#
+#   cd backend && python -m scripts.bench_request_pipeline --requests 2000
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import statistics
+import tempfile
+from time import perf_counter
+
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.crud.books import crud_books
+from app.crud.users import crud_users
+from app.db import Base, get_db
+from app.main import health
+from app.middleware import PipelineContext, PipelineStage, RequestPipelineMiddleware, default_stages
+from app.routers import books as books_router
+from app.schemas.books import BookCreate
+from app.schemas.users import UserCreate
+from app.utils.security import create_access_token
+
+
+def _stacked_layer(stage: PipelineStage):
+    async def dispatch(request: Request, call_next):
+        ctx = getattr(request.state, "pipeline_ctx", None)
+        if ctx is None:
+            ctx = PipelineContext(
+                method=request.method,
+                path=request.url.path,
+                headers={key: value for key, value in request.headers.items()},
+                client_host=request.client.host if request.client else "unknown",
+            )
+            request.state.pipeline_ctx = ctx
+        response = await stage.on_request(ctx)
+        try:
+            if response is None:
+                response = await call_next(request)
+            ctx.status_code = response.status_code
+            await stage.on_response_start(ctx)
+            return response
+        finally:
+            await stage.on_complete(ctx)
+
+    return dispatch
+
+
+def _build_app(mode: str, session_factory) -> FastAPI:
+    bench_app = FastAPI()
+    bench_app.get("/health")(health)
+    bench_app.include_router(books_router.router)
+
+    async def _get_db():
+        async with session_factory() as db:
+            yield db
+
+    bench_app.dependency_overrides[get_db] = _get_db
+    if mode == "pipeline":
+        bench_app.add_middleware(RequestPipelineMiddleware, stages=default_stages())
+    elif mode == "stacked":
+        # add_middleware prepends, so add innermost first.
+        for stage in reversed(default_stages()):
+            bench_app.add_middleware(BaseHTTPMiddleware, dispatch=_stacked_layer(stage))
+    return bench_app
+
+
+async def _seed(session_factory, books: int) -> str:
+    async with session_factory() as db:
+        admin = await crud_users.create(
+            db,
+            obj_in=UserCreate(name="Bench Admin", email="bench@example.com", role="admin", password="bench-pass-1"),
+        )
+        for index in range(books):
+            await crud_books.create(
+                db,
+                obj_in=BookCreate(title=f"Bench Title {index}", author=f"Author {index % 40}", copies_total=2),
+            )
+        await db.commit()
+    return create_access_token(user_id=admin.id, role=admin.role, subject=admin.email or "")
+
+
+async def _measure(bench_app: FastAPI, path: str, headers: dict[str, str], requests: int) -> list[float]:
+    transport = ASGITransport(app=bench_app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(requests // 10, 100)):
+            await client.get(path, headers=headers)
+        samples = []
+        for _ in range(requests):
+            started = perf_counter()
+            response = await client.get(path, headers=headers)
+            samples.append((perf_counter() - started) * 1_000_000)
+            response.raise_for_status()
+    return samples
+
+
+async def main(requests: int, books: int) -> None:
+    db_file = Path(tempfile.gettempdir()) / "nls_bench_pipeline.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    token = await _seed(session_factory, books)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    targets = [("/health", {}), ("/books?limit=50", headers)]
+    print(f"{'path':<18}{'mode':<10}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}{'overhead us':>13}")
+    for path, request_headers in targets:
+        baseline_mean = None
+        for mode in ("none", "stacked", "pipeline"):
+            samples = await _measure(_build_app(mode, session_factory), path, request_headers, requests)
+            mean = statistics.fmean(samples)
+            p50 = statistics.median(samples)
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            if baseline_mean is None:
+                baseline_mean = mean
+            print(f"{path:<18}{mode:<10}{mean:>10.1f}{p50:>10.1f}{p95:>10.1f}{mean - baseline_mean:>13.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.books))
@@ -0,0 +1,84 @@
+# Benchmark for the in-memory typeahead index behind /books/suggest: build
+# time, measured memory (tracemalloc) against the index's own byte estimate,
+# and lookup latency percentiles for short prefixes.
+#
+#   cd backend && python -m scripts.bench_suggest --books 100000 --lookups 20000
+from __future__ import annotations
+
+import argparse
+import random
+from time import perf_counter
+import tracemalloc
+
+from app.utils.suggest_index import PrefixIndex
+
+WORDS = (
+    "river", "garden", "shadow", "empire", "silent", "winter", "history", "science", "letters", "journey",
+    "ocean", "mountain", "city", "stars", "memory", "kingdom", "machine", "harvest", "storm", "lantern",
+)
+SURNAMES = ("Rao", "Iyer", "Sharma", "Khan", "Das", "Menon", "Singh", "Patel", "Bose", "Nair")
+
+
+def _rows(count: int, rng: random.Random) -> list[tuple[int, tuple]]:
+    rows = []
+    for book_id in range(1, count + 1):
+        title = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 5))) + f" {book_id}"
+        author = f"{rng.choice(WORDS).title()} {rng.choice(SURNAMES)}"
+        isbn = f"978-{book_id:010d}" if book_id % 3 else None
+        rows.append((book_id, (title, author, isbn)))
+    return rows
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def main(books: int, lookups: int, limit: int) -> None:
+    rng = random.Random(7)
+    rows = _rows(books, rng)
+    index = PrefixIndex("bench", ("title", "author", "isbn"), frozenset({"isbn"}), max_entries=books * 20)
+
+    started = perf_counter()
+    index.build(rows)
+    build_seconds = perf_counter() - started
+    # Traced separately: tracemalloc slows allocation-heavy code severalfold.
+    tracemalloc.start()
+    index.swap(index.build(rows))
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Retitling moves the title keys; the author and ISBN keys stay put.
+    started = perf_counter()
+    for book_id, (title, author, isbn) in rows[:1000]:
+        index.upsert(book_id, (f"Revised {title}", author, isbn))
+    upsert_us = (perf_counter() - started) / 1000 * 1_000_000
+
+    prefixes = [rng.choice(WORDS)[: rng.randint(1, 6)] for _ in range(lookups)]
+    prefixes += [f"978-{rng.randint(0, books):010d}"[: rng.randint(4, 10)] for _ in range(lookups // 10)]
+    samples = []
+    for prefix in prefixes:
+        started = perf_counter()
+        index.search(prefix, limit=limit)
+        samples.append((perf_counter() - started) * 1_000_000)
+    samples.sort()
+
+    stats = index.stats()
+    print(f"{books:,} books, {stats['entries']:,} keys, built in {build_seconds:.2f}s")
+    print(
+        f"memory: {traced / 1024 / 1024:.1f} MiB traced, "
+        f"{stats['bytes'] / 1024 / 1024:.1f} MiB estimated by the index"
+    )
+    print(f"retitle: {upsert_us:.1f} us per book")
+    print(
+        f"lookup ({len(samples):,} prefixes, limit {limit}): p50 {_percentile(samples, 0.5):.1f} us, "
+        f"p99 {_percentile(samples, 0.99):.1f} us, max {samples[-1]:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    main(args.books, args.lookups, args.limit)
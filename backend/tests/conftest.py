@@ -7,8 +7,11 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.db import Base, get_db
-import app.main as app_main
 from app.main import app, login_attempts
+from app.utils.api_cache import api_cache
+from app.utils.audit_sink import audit_log_writer
+from app.utils.principal_cache import principal_cache
+from app.utils.suggest_index import suggest_indexes
 
 from tests.constants import TEST_AUTH_VALUE
 
@@ -49,8 +52,10 @@ async def client(db_session):
     audit_session_local = async_sessionmaker(
         bind=db_session.bind, class_=AsyncSession, autoflush=False, expire_on_commit=False
     )
-    original_audit_session_local = app_main.SessionLocal
-    app_main.SessionLocal = audit_session_local
+    original_audit_writer_session_factory = audit_log_writer.session_factory
+    audit_log_writer.session_factory = audit_session_local
+    original_api_cache_session_factory = api_cache.session_factory
+    api_cache.session_factory = audit_session_local
 
     async def _override_get_db():
         try:
@@ -66,7 +71,8 @@ async def client(db_session):
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
     app.dependency_overrides.clear()
-    app_main.SessionLocal = original_audit_session_local
+    audit_log_writer.session_factory = original_audit_writer_session_factory
+    api_cache.session_factory = original_api_cache_session_factory
 
 
 @pytest.fixture(autouse=True)
@@ -76,6 +82,32 @@ def clear_login_rate_limiter_state():
     login_attempts.clear()
 
 
+@pytest.fixture(autouse=True)
+async def clear_api_cache():
+    # Cached pages are keyed by user id, which every test reuses.
+    await api_cache.invalidate_all()
+    yield
+    await api_cache.invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    # User ids are reused across tests since each test recreates the schema.
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_suggest_indexes():
+    # Ids are reused across tests; lifespan (and so the startup build) does not run here.
+    for index in suggest_indexes.indexes.values():
+        index.clear()
+    yield
+    for index in suggest_indexes.indexes.values():
+        index.clear()
+
+
 @pytest.fixture(scope="function")
 async def auth_headers(client):
     bootstrap = await client.post(
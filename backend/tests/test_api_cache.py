@@ -0,0 +1,631 @@
+import json
+
+import pytest
+
+from app.middleware import mutation_cache_tags
+from app.utils.api_cache import (
+    APICache,
+    CachedResponse,
+    CircuitBreaker,
+    CircuitState,
+    GenerationStore,
+    InMemoryTTLCache,
+    OptionalRedisCache,
+    Payload,
+    api_cache,
+    payload_codec,
+)
+
+
+def _entry(value):
+    return CachedResponse.from_payload(value)
+
+
+def _value(cached):
+    return None if cached is None else json.loads(cached.identity_body)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_tags_only_drops_tagged_entries():
+    cache = APICache()
+    books_key = await cache.versioned_key("books:list|a", tags=("books",))
+    loans_key = await cache.versioned_key("loans:list|a", tags=("loans", "books"))
+    users_key = await cache.versioned_key("users:list|a", tags=("users",))
+    for index, key in enumerate((books_key, loans_key, users_key)):
+        await cache.set(key, _entry([index]))
+
+    await cache.invalidate_tags(("books",))
+    assert _value(await cache.get(await cache.versioned_key("books:list|a", tags=("books",)))) is None
+    assert _value(await cache.get(await cache.versioned_key("loans:list|a", tags=("books", "loans")))) is None
+    assert _value(await cache.get(await cache.versioned_key("users:list|a", tags=("users",)))) == [2]
+    # A page resolved before the write is stored under the old generation.
+    await cache.set(books_key, _entry(["stale"]))
+    assert _value(await cache.get(await cache.versioned_key("books:list|a", tags=("books",)))) is None
+
+    await cache.invalidate_all()
+    assert _value(await cache.get(await cache.versioned_key("users:list|a", tags=("users",)))) is None
+
+
+class _SharedGenerations:
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    async def get_generations(self, key):
+        return None if self.down else dict(self.values)
+
+    async def incr_generations(self, key, tags):
+        if self.down:
+            return None
+        for tag in tags:
+            self.values[tag] = self.values.get(tag, 0) + 1
+        return {tag: self.values[tag] for tag in tags}
+
+    async def claim_generation_epoch(self, key, field, epoch):
+        if self.down:
+            return None
+        return self.values.setdefault(field, epoch)
+
+
+@pytest.mark.asyncio
+async def test_generation_bumps_are_shared_through_the_remote_store():
+    remote = _SharedGenerations()
+    node_a = GenerationStore(remote, "gens", sync_interval_seconds=0)
+    node_b = GenerationStore(remote, "gens", sync_interval_seconds=0)
+    assert await node_b.current(("books",)) == {"books": 0}
+
+    await node_a.bump(("books", "loans"))
+    assert await node_a.current(("books", "loans")) == {"books": 1, "loans": 1}
+    assert await node_b.current(("books", "users")) == {"books": 1, "users": 0}
+
+
+@pytest.mark.asyncio
+async def test_generation_bumps_survive_redis_outage_and_flush():
+    remote = _SharedGenerations()
+    resets = []
+    node_a = GenerationStore(remote, "gens", sync_interval_seconds=0, origin="a" * 32)
+    node_b = GenerationStore(remote, "gens", sync_interval_seconds=0, on_reset=lambda: resets.append("b"))
+    await node_a.current(("books",))
+    assert await node_b.current(("books",)) == {"books": 0}
+
+    # A bump Redis misses invalidates node_a's keys without matching any
+    # generation another worker could reach.
+    remote.down = True
+    assert await node_a.bump(("books",)) == {}
+    assert await node_a.current(("books",)) == {"books": "0~aaaaaaaa.1"}
+    assert await node_b.current(("books",)) == {"books": 0}
+
+    # On recovery the pending bump is pushed, so node_b moves past its
+    # pre-outage pages and node_a rejoins the shared counter.
+    remote.down = False
+    assert await node_a.current(("books",)) == {"books": 1}
+    assert await node_b.current(("books",)) == {"books": 1}
+    assert node_a.stats()["pending"] == []
+
+    # node_a no longer runs ahead, so node_b's next bump still reaches it.
+    assert await node_b.bump(("books",)) == {"books": 2}
+    assert await node_a.current(("books",)) == {"books": 2}
+
+    # A flushed hash restarts the counters under a new epoch.
+    epoch = node_a.epoch
+    remote.values.clear()
+    assert await node_b.bump(("books",)) == {}
+    assert await node_b.current(("books",)) == {"books": 2}
+    assert node_b.epoch != epoch and resets == ["b"]
+    assert await node_a.current(("books",)) == {"books": 2}
+    assert node_a.epoch == node_b.epoch
+
+
+def test_mutation_routes_map_to_touched_entities():
+    assert mutation_cache_tags("POST", "/loans/borrow") == ("loans", "books")
+    assert mutation_cache_tags("POST", "/loans/12/fine-payments") == ("fine_payments",)
+    assert mutation_cache_tags("PATCH", "/users/3/") == ("users",)
+    assert mutation_cache_tags("PUT", "/settings/policy") == ("policy",)
+    assert mutation_cache_tags("POST", "/auth/login") == ()
+    assert mutation_cache_tags("POST", "/seed") is None
+
+
+@pytest.mark.asyncio
+async def test_unrelated_mutation_keeps_cached_books_page(client, auth_headers):
+    book = await client.post(
+        "/books", json={"title": "Tagged", "author": "Cache Author", "copies_total": 2}, headers=auth_headers
+    )
+    member = await client.post(
+        "/users",
+        json={"name": "Tag Member", "email": "tag-member@test.dev", "role": "member"},
+        headers=auth_headers,
+    )
+    loan = await client.post(
+        "/loans/borrow",
+        json={"book_id": book.json()["id"], "user_id": member.json()["id"], "days": 1},
+        headers=auth_headers,
+    )
+    loan_id = loan.json()["id"]
+
+    books_page = await client.get("/books", headers=auth_headers)
+    loans_page = await client.get("/loans", headers=auth_headers)
+    assert books_page.status_code == loans_page.status_code == 200
+
+    from app.crud.books import crud_books
+
+    book_queries = []
+    original_list = crud_books.list
+
+    async def counting_list(*args, **kwargs):
+        book_queries.append(kwargs)
+        return await original_list(*args, **kwargs)
+
+    crud_books.list = counting_list
+    try:
+        renamed = await client.patch(
+            f"/users/{member.json()['id']}", json={"name": "Renamed Member"}, headers=auth_headers
+        )
+        assert renamed.status_code == 200
+        assert (await client.get("/books", headers=auth_headers)).json() == books_page.json()
+        assert book_queries == []
+
+        returned = await client.post(f"/loans/{loan_id}/return", headers=auth_headers)
+        assert returned.status_code == 200
+        refreshed = await client.get("/books", headers=auth_headers)
+        assert len(book_queries) == 1
+        assert refreshed.json()[0]["copies_available"] == 2
+    finally:
+        del crud_books.list
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_bounded_by_entries_and_bytes():
+    cache = InMemoryTTLCache(max_entries=3, max_bytes=10_000, sweep_interval_seconds=3600)
+    for name in ("a", "b", "c"):
+        cache.set(name, _entry([name]), ttl_seconds=60)
+    assert _value(cache.get("a")) == ["a"]
+    cache.set("d", _entry(["d"]), ttl_seconds=60)
+    # "b" was least recently used once "a" was read.
+    assert _value(cache.get("b")) is None
+    assert _value(cache.get("a")) == ["a"]
+    assert cache.stats()["evictions"] == 1
+
+    byte_capped = InMemoryTTLCache(max_entries=100, max_bytes=400, sweep_interval_seconds=3600)
+    for index in range(10):
+        byte_capped.set(f"k{index}", _entry("x" * 50), ttl_seconds=60)
+    stats = byte_capped.stats()
+    assert stats["bytes"] <= 400
+    assert stats["entries"] < 10
+    byte_capped.set("huge", _entry("x" * 1000), ttl_seconds=60)
+    assert _value(byte_capped.get("huge")) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_sweeps_expired_entries(monkeypatch):
+    from app.utils import api_cache as api_cache_module
+
+    clock = [1000.0]
+    monkeypatch.setattr(api_cache_module, "monotonic", lambda: clock[0])
+    cache = InMemoryTTLCache(max_entries=100, max_bytes=10_000, sweep_interval_seconds=5)
+    cache.set("short", _entry([1]), ttl_seconds=1)
+    cache.set("long", _entry([2]), ttl_seconds=60)
+
+    clock[0] += 10
+    cache.set("new", _entry([3]), ttl_seconds=60)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["expirations"] == 1
+    assert _value(cache.get("long")) == [2]
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_return_the_stored_body(client, auth_headers):
+    await client.post("/books", json={"title": "Bytes", "author": "Encoded", "copies_total": 1}, headers=auth_headers)
+
+    miss = await client.get("/books", headers=auth_headers)
+    hit = await client.get("/books", headers=auth_headers)
+    assert miss.headers["x-cache"] == "MISS"
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.content == miss.content
+    assert hit.headers["etag"] == miss.headers["etag"]
+    assert hit.headers["content-type"] == "application/json"
+    assert hit.json()[0]["title"] == "Bytes"
+
+    cached = CachedResponse.from_payload([{"title": "Ünïcode\nline"}])
+    assert payload_codec.decode(payload_codec.encode(cached)) == cached
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_build():
+    import asyncio
+
+    cache = APICache()
+    key = await cache.versioned_key("books:list|herd", tags=("books",))
+    calls = []
+    release = asyncio.Event()
+
+    async def build(db):
+        calls.append(1)
+        await release.wait()
+        return [{"id": 1}]
+
+    pollers = [asyncio.create_task(cache.serve(key, build, db=None)) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    release.set()
+    responses = await asyncio.gather(*pollers)
+    assert len(calls) == 1
+    assert sorted(response.headers["x-cache"] for response in responses) == ["COALESCED"] * 9 + ["MISS"]
+    assert {response.body for response in responses} == {b'[{"id":1}]'}
+
+    async def failing_build(db):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    failing_key = await cache.versioned_key("books:list|failing", tags=("books",))
+    results = await asyncio.gather(
+        *(cache.serve(failing_key, failing_build, db=None) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_waiters_take_over_when_the_leading_request_is_cancelled():
+    import asyncio
+
+    cache = APICache()
+    key = await cache.versioned_key("books:list|cancel", tags=("books",))
+    started = asyncio.Event()
+
+    async def slow_build(db):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast_build(db):
+        return ["fresh"]
+
+    leader = asyncio.create_task(cache.serve(key, slow_build, db=None))
+    await started.wait()
+    waiter = asyncio.create_task(cache.serve(key, fast_build, db=None))
+    await asyncio.sleep(0)
+    leader.cancel()
+    response = await waiter
+    assert response.headers["x-cache"] == "MISS"
+    assert json.loads(response.body) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_polling_dashboards_run_one_query_after_invalidation(client, db_session, auth_headers):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.crud.books import crud_books
+    from app.db import get_db
+    from app.main import app
+
+    await client.post("/books", json={"title": "Herd", "author": "Poller", "copies_total": 1}, headers=auth_headers)
+    session_factory = async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+    async def _per_request_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _per_request_db
+    queries = []
+    original_list = crud_books.list
+
+    async def slow_list(*args, **kwargs):
+        queries.append(1)
+        await asyncio.sleep(0.05)
+        return await original_list(*args, **kwargs)
+
+    crud_books.list = slow_list
+    try:
+        responses = await asyncio.gather(*(client.get("/books", headers=auth_headers) for _ in range(8)))
+    finally:
+        del crud_books.list
+    assert all(response.status_code == 200 for response in responses)
+    assert len(queries) == 1
+    assert {response.content for response in responses} == {responses[0].content}
+
+
+@pytest.mark.asyncio
+async def test_stale_pages_are_served_while_refreshing_in_background(monkeypatch):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from app.config import settings
+    from app.utils import api_cache as api_cache_module
+
+    monkeypatch.setitem(settings.api_cache_stale_ttl_seconds, "books:list", 30)
+    clock = [1000.0]
+    monkeypatch.setattr(api_cache_module, "time", lambda: clock[0])
+    cache = APICache()
+    sessions = []
+
+    @asynccontextmanager
+    async def session_factory():
+        sessions.append("background")
+        yield "background-session"
+
+    cache.session_factory = session_factory
+    version = ["v1"]
+    seen_sessions = []
+
+    async def build(db):
+        seen_sessions.append(db)
+        return [version[0]]
+
+    books_key = await cache.versioned_key("books:list|swr", tags=("books",))
+    assert (await cache.serve(books_key, build, db="request-session")).headers["x-cache"] == "MISS"
+
+    version[0] = "v2"
+    clock[0] += settings.api_cache_ttl_seconds + 1
+    stale = await cache.serve(books_key, build, db="request-session")
+    again = await cache.serve(books_key, build, db="request-session")
+    assert stale.headers["x-cache"] == again.headers["x-cache"] == "STALE"
+    assert json.loads(stale.body) == ["v1"]
+    await asyncio.gather(*cache._refresh_tasks)
+    assert seen_sessions == ["request-session", "background-session"]
+
+    fresh = await cache.serve(books_key, build, db="request-session")
+    assert fresh.headers["x-cache"] == "HIT"
+    assert json.loads(fresh.body) == ["v2"]
+
+    # Scopes without a stale window expire straight to a blocking miss.
+    loans_key = await cache.versioned_key("loans:list|swr", tags=("loans",))
+    await cache.serve(loans_key, build, db="request-session")
+    clock[0] += settings.api_cache_ttl_seconds + 1
+    assert (await cache.serve(loans_key, build, db="request-session")).headers["x-cache"] != "STALE"
+
+
+@pytest.mark.asyncio
+async def test_catalog_pages_are_shared_per_role_class_and_normalized(client, auth_headers):
+    from tests.constants import TEST_AUTH_VALUE
+
+    await client.post("/books", json={"title": "Shared", "author": "Alpha", "copies_total": 1}, headers=auth_headers)
+    member_headers = []
+    for index in range(2):
+        email = f"reader{index}@test.dev"
+        await client.post(
+            "/users",
+            json={"name": f"Reader {index}", "email": email, "role": "member", "password": TEST_AUTH_VALUE},
+            headers=auth_headers,
+        )
+        login = await client.post("/auth/login", json={"email": email, "password": TEST_AUTH_VALUE})
+        member_headers.append({"Authorization": f"Bearer {login.json()['access_token']}"})
+
+    first = await client.get("/books?author=alpha&author=Beta&sort_order=asc&limit=100", headers=member_headers[0])
+    second = await client.get("/books?author=beta&author=ALPHA&author=alpha&skip=0", headers=member_headers[1])
+    staff_view = await client.get("/books?author=alpha&author=beta", headers=auth_headers)
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert staff_view.headers["x-cache"] == "MISS"
+    assert second.content == first.content == staff_view.content
+    assert [book["title"] for book in first.json()] == ["Shared"]
+
+    different = await client.get("/books?author=alpha&limit=5", headers=member_headers[0])
+    assert different.headers["x-cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_return_not_modified_until_the_entity_changes(client, auth_headers):
+    created = await client.post(
+        "/books", json={"title": "Tagged", "author": "A", "copies_total": 1}, headers=auth_headers
+    )
+    book_id = created.json()["id"]
+
+    listing = await client.get("/books", headers=auth_headers)
+    detail = await client.get(f"/books/{book_id}", headers=auth_headers)
+    assert listing.headers["cache-control"] == "private, max-age=5, stale-while-revalidate=30"
+    assert detail.headers["cache-control"] == "private, no-cache"
+    users = await client.get("/users", headers=auth_headers)
+    assert users.headers["cache-control"] == "private, no-cache"
+    for path, response in (("/books", listing), (f"/books/{book_id}", detail)):
+        etag = response.headers["etag"]
+        not_modified = await client.get(path, headers={**auth_headers, "If-None-Match": f'W/{etag}, "other"'})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+
+    await client.patch(f"/books/{book_id}", json={"title": "Retitled"}, headers=auth_headers)
+    for path, response in (("/books", listing), (f"/books/{book_id}", detail)):
+        changed = await client.get(path, headers={**auth_headers, "If-None-Match": response.headers["etag"]})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != response.headers["etag"]
+        assert "Retitled" in changed.text
+
+
+@pytest.mark.asyncio
+async def test_book_detail_is_cached_until_patched_deleted_or_circulated(client, auth_headers):
+    book = (
+        await client.post("/books", json={"title": "Detail", "author": "A", "copies_total": 2}, headers=auth_headers)
+    ).json()
+    path = f"/books/{book['id']}"
+    user = (
+        await client.post("/users", json={"name": "Reader", "email": "detail@test.dev"}, headers=auth_headers)
+    ).json()
+    before = api_cache.stats()["scopes"].get("books:detail", {})
+
+    assert (await client.get(path, headers=auth_headers)).headers["x-cache"] == "MISS"
+    assert (await client.get(path, headers=auth_headers)).headers["x-cache"] == "HIT"
+    after = api_cache.stats()["scopes"]["books:detail"]
+    assert after["hit"] - before.get("hit", 0) == 1
+    assert after["miss"] - before.get("miss", 0) == 1
+
+    # Creating another book leaves this entry alone.
+    await client.post("/books", json={"title": "Other", "author": "B", "copies_total": 1}, headers=auth_headers)
+    assert (await client.get(path, headers=auth_headers)).headers["x-cache"] == "HIT"
+
+    loan = await client.post(
+        "/loans/borrow", json={"book_id": book["id"], "user_id": user["id"], "days": 7}, headers=auth_headers
+    )
+    assert loan.status_code == 201
+    borrowed = await client.get(path, headers=auth_headers)
+    assert borrowed.headers["x-cache"] == "MISS"
+    assert borrowed.json()["copies_available"] == 1
+
+    await client.post(f"/loans/{loan.json()['id']}/return", headers=auth_headers)
+    assert (await client.get(path, headers=auth_headers)).json()["copies_available"] == 2
+
+    await client.patch(path, json={"title": "Renamed"}, headers=auth_headers)
+    assert (await client.get(path, headers=auth_headers)).json()["title"] == "Renamed"
+
+    await client.delete(f"/loans/{loan.json()['id']}", headers=auth_headers)
+    deleted = await client.delete(path, headers=auth_headers)
+    assert deleted.status_code == 204
+    assert (await client.get(path, headers=auth_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_invalidations_are_broadcast_to_other_workers(monkeypatch):
+    published = []
+
+    async def publish(channel, message):
+        published.append(message)
+
+    worker_a, worker_b = APICache(), APICache()
+    monkeypatch.setattr(type(worker_a._redis), "configured", property(lambda self: True))
+    monkeypatch.setattr(worker_a._redis, "publish", publish)
+    remote = _SharedGenerations()
+    worker_a._generations._redis = worker_b._generations._redis = remote
+
+    page_key = await worker_b.versioned_key("books:list|a", tags=("books",))
+    detail_key = await worker_b.versioned_key(worker_b.entity_key("books", 7))
+    await worker_b.set(page_key, _entry(["page"]))
+    await worker_b.set(detail_key, _entry({"id": 7}))
+
+    await worker_a.invalidate_tags(("books",))
+    await worker_a.invalidate_entities([("books", 7)])
+    assert len(published) == 2
+    # A worker ignores its own events.
+    await worker_a.apply_invalidation(published[0])
+    assert worker_a.broadcasts_received == 0
+
+    assert _value(await worker_b.get(detail_key)) == {"id": 7}
+    for message in published:
+        await worker_b.apply_invalidation(message)
+    assert worker_b.broadcasts_received == 2
+    assert _value(await worker_b.get(detail_key)) is None
+    assert await worker_b.versioned_key("books:list|a", tags=("books",)) != page_key
+    await worker_b.apply_invalidation(b"not json")
+
+
+def test_circuit_breaker_opens_then_probes_once_before_closing():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    # Only one probe at a time while half-open.
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_degrades_to_misses_and_recovers_without_restart():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=5, clock=lambda: now[0])
+    redis = OptionalRedisCache("redis://127.0.0.1:1/0", timeout_seconds=1.0, breaker=breaker)
+
+    assert await redis.get("missing") is None
+    assert await redis.acquire_lock("lock", 1.0) is None
+    assert breaker.state is CircuitState.OPEN
+    assert await redis.get("missing") is None
+    assert redis.calls == 2
+    assert redis.errors == {"get": 1, "acquire_lock": 1}
+
+    # The circuit is retried after the reset window rather than staying off.
+    now[0] += 5
+    assert await redis.get("missing") is None
+    assert redis.calls == 3
+    assert redis.stats()["breaker"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_large_pages_are_stored_and_served_gzipped(client, auth_headers):
+    import gzip
+
+    rows = [{"id": index, "title": f"Book {index}", "author": "Same Author"} for index in range(500)]
+    cached = CachedResponse.from_payload(rows)
+    assert cached.content_encoding == "gzip"
+    assert cached.size * 5 < len(cached.identity_body)
+    assert json.loads(gzip.decompress(cached.body)) == rows
+    encoded = payload_codec.encode(cached)
+    assert payload_codec.decode(encoded) == cached
+    with pytest.raises(ValueError):
+        payload_codec.decode(b"\x01" + encoded[1:])
+    paged = CachedResponse.from_payload(Payload(rows, {"X-Next-Cursor": "eyJrIjoiaWQifQ"}))
+    assert payload_codec.decode(payload_codec.encode(paged)) == paged
+    assert paged.to_response(cache_status="HIT").headers["X-Next-Cursor"] == "eyJrIjoiaWQifQ"
+
+    for index in range(60):
+        await client.post(
+            "/books",
+            json={"title": f"Compressible {index}", "author": "Same Author", "copies_total": 1},
+            headers=auth_headers,
+        )
+    gzipped = await client.get("/books", headers=auth_headers)
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"].endswith('-gzip"')
+    identity = await client.get("/books", headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert identity.headers["x-cache"] == "HIT"
+    assert "content-encoding" not in identity.headers
+    assert identity.content == gzipped.content
+    assert len(identity.json()) == 60
+    revalidated = await client.get("/books", headers={**auth_headers, "If-None-Match": gzipped.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_cache_metrics_report_per_scope_outcomes_and_latency(client, auth_headers):
+    from app.utils.api_cache import LatencyHistogram
+
+    await client.post("/books", json={"title": "Metered", "author": "A", "copies_total": 1}, headers=auth_headers)
+    before = api_cache.stats()
+    await client.get("/books", headers=auth_headers)
+    await client.get("/books", headers=auth_headers)
+    await client.get("/books", headers={**auth_headers, "If-None-Match": "*"})
+
+    metrics = await client.get("/admin/metrics/cache", headers=auth_headers)
+    assert metrics.status_code == 200
+    body = metrics.json()
+    books = body["scopes"]["books:list"]
+    previous = before["scopes"].get("books:list", {})
+    assert books["hit"] - previous.get("hit", 0) == 2
+    assert books["miss"] - previous.get("miss", 0) == 1
+    assert books["set"] - previous.get("set", 0) == 1
+    assert books["entries"] >= 1 and books["bytes"] > 0
+    assert 0 < books["hit_ratio"] <= 1
+    assert body["invalidations"]["books"] >= 1
+    memory_latency = body["latency"]["memory"]
+    assert memory_latency["count"] - before["latency"]["memory"]["count"] >= 3
+    assert memory_latency["buckets"]["+Inf"] == memory_latency["count"]
+
+    histogram = LatencyHistogram(buckets=(1.0, 10.0))
+    for elapsed_ms in (0.5, 0.7, 5.0, 50.0):
+        histogram.observe(elapsed_ms)
+    assert histogram.stats()["buckets"] == {"1.0": 2, "10.0": 3, "+Inf": 4}
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == float("inf")
+    assert histogram.stats()["p99_ms"] == "+Inf"
+
+    member = await client.post(
+        "/users",
+        json={"name": "Member", "email": "metrics@test.dev", "role": "member", "password": "Member@12345"},
+        headers=auth_headers,
+    )
+    assert member.status_code == 201
+    login = await client.post("/auth/login", json={"email": "metrics@test.dev", "password": "Member@12345"})
+    denied = await client.get(
+        "/admin/metrics/cache", headers={"Authorization": f"Bearer {login.json()['access_token']}"}
+    )
+    assert denied.status_code == 403
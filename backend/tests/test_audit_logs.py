@@ -123,3 +123,72 @@ async def test_audit_log_endpoint_is_admin_only(client):
 
     forbidden = await client.get("/audit/logs", headers=staff_headers)
     assert forbidden.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_audit_change_diff_covers_return_policy_and_delete(client, auth_headers):
+    member = await client.post(
+        "/users",
+        json={"name": "Diff Member", "email": "diff-member@test.dev", "role": "member"},
+        headers=auth_headers,
+    )
+    assert member.status_code == 201
+    book = await client.post(
+        "/books",
+        json={"title": "Diff Book", "author": "Diff Author", "copies_total": 1},
+        headers=auth_headers,
+    )
+    assert book.status_code == 201
+    borrow = await client.post(
+        "/loans/borrow",
+        json={"book_id": book.json()["id"], "user_id": member.json()["id"], "days": 7},
+        headers=auth_headers,
+    )
+    assert borrow.status_code == 201
+    loan_id = borrow.json()["id"]
+
+    returned = await client.post(f"/loans/{loan_id}/return", headers=auth_headers)
+    assert returned.status_code == 200
+
+    policy = await client.put(
+        "/settings/policy",
+        json={
+            "enforce_limits": True,
+            "max_active_loans_per_user": 3,
+            "max_loan_days": 14,
+            "fine_per_day": 2.0,
+        },
+        headers=auth_headers,
+    )
+    assert policy.status_code == 200
+
+    spare_book = await client.post(
+        "/books",
+        json={"title": "Spare Book", "author": "Diff Author", "copies_total": 1},
+        headers=auth_headers,
+    )
+    assert spare_book.status_code == 201
+    deleted = await client.delete(f"/books/{spare_book.json()['id']}", headers=auth_headers)
+    assert deleted.status_code == 204
+
+    logs = await client.get("/audit/logs", headers=auth_headers)
+    assert logs.status_code == 200
+    by_path = {(item["method"], item["path"]): item for item in logs.json()}
+
+    borrow_log = by_path[("POST", "/loans/borrow")]
+    assert borrow_log["change_diff"]["_created"]["to"]["id"] == loan_id
+
+    return_log = by_path[("POST", f"/loans/{loan_id}/return")]
+    assert return_log["change_diff"]["returned_at"]["from"] is None
+    assert return_log["change_diff"]["returned_at"]["to"] is not None
+
+    policy_log = by_path[("PUT", "/settings/policy")]
+    assert policy_log["change_diff"]["max_active_loans_per_user"]["to"] == 3
+
+    delete_log = by_path[("DELETE", f"/books/{spare_book.json()['id']}")]
+    assert delete_log["change_diff"]["_deleted"]["from"]["title"] == "Spare Book"
+
+    member_log = next(
+        item for item in logs.json() if item["path"] == "/users" and item["entity_id"] == member.json()["id"]
+    )
+    assert "password_hash" not in member_log["change_diff"]["_created"]["to"]
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import AuditLog
+from app.utils.audit_sink import AuditLogWriter
+
+
+class _CountingSessionFactory:
+    def __init__(self, bind):
+        self._factory = async_sessionmaker(
+            bind=bind, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.sessions = 0
+
+    def __call__(self):
+        self.sessions += 1
+        return self._factory()
+
+
+def _entry(index: int) -> dict:
+    return {
+        "actor_user_id": None,
+        "actor_role": None,
+        "method": "POST",
+        "path": f"/books/{index}",
+        "entity": "books",
+        "entity_id": index,
+        "change_diff": None,
+        "status_code": 201,
+        "duration_ms": 1.0,
+    }
+
+
+async def _audit_count(db_session) -> int:
+    return int(await db_session.scalar(select(func.count(AuditLog.id))))
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_entries_into_few_transactions(db_session):
+    factory = _CountingSessionFactory(db_session.bind)
+    writer = AuditLogWriter(factory, batch_size=10, flush_interval_seconds=5)
+    await writer.start()
+    for index in range(25):
+        await writer.submit(_entry(index))
+    await writer.stop()
+
+    assert writer.flushed == 25
+    assert writer.batches == 3
+    assert factory.sessions == 3
+    assert await _audit_count(db_session) == 25
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_partial_batch_after_interval(db_session):
+    factory = _CountingSessionFactory(db_session.bind)
+    writer = AuditLogWriter(factory, batch_size=100, flush_interval_seconds=0.05)
+    await writer.start()
+    await writer.submit(_entry(1))
+    for _ in range(50):
+        if writer.flushed:
+            break
+        await asyncio.sleep(0.02)
+    assert writer.flushed == 1
+    assert writer.running is True
+    await writer.stop()
+    assert writer.running is False
+
+
+@pytest.mark.asyncio
+async def test_writer_overflow_policies_count_dropped_entries(db_session):
+    factory = _CountingSessionFactory(db_session.bind)
+    newest = AuditLogWriter(factory, max_queue_size=2, overflow_policy="drop_newest")
+    oldest = AuditLogWriter(factory, max_queue_size=2, overflow_policy="drop_oldest")
+    for writer in (newest, oldest):
+        await writer.start()
+        # Fill the queue without yielding so the background task cannot drain it.
+        await writer.submit(_entry(1))
+        await writer.submit(_entry(2))
+        await writer.submit(_entry(99))
+        assert writer.dropped == 1
+        await writer.stop()
+
+    assert newest.flushed + oldest.flushed == 4
+    paths = set(await db_session.scalars(select(AuditLog.path)))
+    assert "/books/99" in paths
+
+    with pytest.raises(ValueError):
+        AuditLogWriter(factory, overflow_policy="unbounded")
+
+
+@pytest.mark.asyncio
+async def test_writer_keeps_entries_submitted_while_stopping(db_session):
+    factory = _CountingSessionFactory(db_session.bind)
+    writer = AuditLogWriter(factory, max_queue_size=1, flush_interval_seconds=5, overflow_policy="drop_oldest")
+    await writer.start()
+    await writer.submit(_entry(1))
+    stopping = asyncio.create_task(writer.stop())
+    # The writer has taken entry 1 and the shutdown marker now fills the queue.
+    await asyncio.sleep(0)
+    assert writer.stats()["queued"] == 1
+
+    await writer.submit(_entry(2))
+    await stopping
+    assert writer.dropped == 0
+    assert writer.flushed == 2
+    assert set(await db_session.scalars(select(AuditLog.path))) == {"/books/1", "/books/2"}
+
+
+@pytest.mark.asyncio
+async def test_writer_persists_inline_when_not_started(db_session):
+    factory = _CountingSessionFactory(db_session.bind)
+    writer = AuditLogWriter(factory)
+    await writer.submit(_entry(7))
+    assert writer.flushed == 1
+    assert writer.stats()["running"] is False
+    assert await _audit_count(db_session) == 1
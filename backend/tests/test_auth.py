@@ -32,3 +32,85 @@ async def test_login_and_me(client):
 async def test_protected_endpoints_require_token(client):
     response = await client.get("/books")
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_when_cost_changes(client, db_session):
+    from app.models import User
+    from app.utils.security import pwd_context
+
+    create = await client.post(
+        "/users",
+        json={"name": "Low Cost", "email": "lowcost@library.dev", "role": "admin", "password": TEST_AUTH_VALUE},
+    )
+    user = await db_session.get(User, create.json()["id"])
+    user.password_hash = pwd_context.handler("bcrypt_sha256").using(rounds=5).hash(TEST_AUTH_VALUE)
+    await db_session.commit()
+    stale_hash = user.password_hash
+
+    login = await client.post("/auth/login", json={"email": "lowcost@library.dev", "password": TEST_AUTH_VALUE})
+    assert login.status_code == 200
+    await db_session.refresh(user)
+    assert user.password_hash != stale_hash
+    assert not pwd_context.needs_update(user.password_hash)
+
+    again = await client.post("/auth/login", json={"email": "lowcost@library.dev", "password": TEST_AUTH_VALUE})
+    assert again.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_health_answers_while_every_hashing_slot_is_busy(client, db_session, monkeypatch):
+    import asyncio
+    import threading
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.db import get_db
+    from app.main import app
+    from app.utils import security as security_module
+
+    create = await client.post(
+        "/users",
+        json={"name": "Storm Admin", "email": "storm@library.dev", "role": "admin", "password": TEST_AUTH_VALUE},
+    )
+    assert create.status_code == 201
+
+    # Hold every login inside the hashing pool until the probe has answered.
+    release = threading.Event()
+    original = security_module.verify_and_update_password
+
+    def held_verify(password, password_hash):
+        release.wait(10)
+        return original(password, password_hash)
+
+    monkeypatch.setattr(security_module, "verify_and_update_password", held_verify)
+
+    # Concurrent logins need their own sessions; the default override shares one.
+    session_factory = async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+    async def _per_request_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = _per_request_db
+
+    async def login():
+        return await client.post("/auth/login", json={"email": "storm@library.dev", "password": TEST_AUTH_VALUE})
+
+    storm = asyncio.gather(*(login() for _ in range(8)))
+    try:
+        for _ in range(500):
+            if security_module.password_service._semaphore.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert security_module.password_service._semaphore.locked()
+
+        # With bcrypt on the event loop this probe could not be answered
+        # until the logins finished.
+        health = await asyncio.wait_for(client.get("/health"), 5)
+        assert health.status_code == 200
+        assert not storm.done()
+    finally:
+        release.set()
+    assert all(response.status_code == 200 for response in await storm)
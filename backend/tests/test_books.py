@@ -83,3 +83,191 @@ async def test_book_search(client, auth_headers):
     assert by_year.status_code == 200
     assert len(by_year.json()) == 1
     assert by_year.json()[0]["title"] == "Clean Architecture"
+
+
+@pytest.mark.asyncio
+async def test_book_search_orders_by_relevance(client, auth_headers):
+    for title, author, subject in (
+        ("Gardens of the Moon", "Steven Erikson", "Fantasy"),
+        ("Deadhouse Gates", "Steven Erikson", "Fantasy"),
+        ("Moon Garden Handbook", "Asha Rao", "Gardening"),
+        ("Field Notes", "Jane Moon", "Nature"),
+    ):
+        await client.post(
+            "/books",
+            json={"title": title, "author": author, "subject": subject, "copies_total": 1},
+            headers=auth_headers,
+        )
+
+    ranked = await client.get("/books?q=moon&sort_by=relevance", headers=auth_headers)
+    assert ranked.status_code == 200
+    assert [book["title"] for book in ranked.json()] == ["Gardens of the Moon", "Moon Garden Handbook", "Field Notes"]
+    by_title = await client.get("/books?q=moon", headers=auth_headers)
+    assert [book["title"] for book in by_title.json()] == ["Field Notes", "Gardens of the Moon", "Moon Garden Handbook"]
+
+
+@pytest.mark.asyncio
+async def test_book_cursor_pagination_matches_offset_pages(client, auth_headers):
+    # Duplicate and missing subjects exercise the id tie-breaker and NULLS LAST.
+    for index, subject in enumerate(("History", None, "Art", "History", None, "Art", "History", "Poetry")):
+        await client.post(
+            "/books",
+            json={"title": f"Cursor {index}", "author": "Paged", "subject": subject, "copies_total": 1},
+            headers=auth_headers,
+        )
+
+    for sort_order in ("asc", "desc"):
+        query = f"/books?sort_by=subject&sort_order={sort_order}&limit=3"
+        by_offset = (await client.get(f"/books?sort_by=subject&sort_order={sort_order}", headers=auth_headers)).json()
+        assert [book["subject"] for book in by_offset][-2:] == [None, None]
+
+        walked, cursor = [], None
+        while True:
+            page = await client.get(query + (f"&cursor={cursor}" if cursor else ""), headers=auth_headers)
+            assert page.status_code == 200
+            walked.extend(page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert [book["id"] for book in walked] == [book["id"] for book in by_offset]
+
+    first = await client.get("/books?sort_by=subject&limit=3", headers=auth_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    cached = await client.get(f"/books?sort_by=subject&limit=3&cursor={cursor}", headers=auth_headers)
+    assert (await client.get(f"/books?sort_by=subject&limit=3&cursor={cursor}", headers=auth_headers)).headers[
+        "X-Cache"
+    ] == "HIT"
+    assert cached.headers.get("X-Next-Cursor") is not None
+    with_skip = await client.get(f"/books?sort_by=subject&limit=3&skip=2&cursor={cursor}", headers=auth_headers)
+    assert with_skip.json() == cached.json()
+
+    mismatched = await client.get(f"/books?sort_by=title&cursor={cursor}", headers=auth_headers)
+    assert mismatched.status_code == 400
+    garbage = await client.get("/books?cursor=not-a-cursor", headers=auth_headers)
+    assert garbage.status_code == 400
+    relevance = await client.get(f"/books?q=cursor&sort_by=relevance&cursor={cursor}", headers=auth_headers)
+    assert relevance.status_code == 400
+    ranked = await client.get("/books?q=cursor&sort_by=relevance&limit=1", headers=auth_headers)
+    assert "X-Next-Cursor" not in ranked.headers
+
+
+def _facets(payload):
+    return {facet: {item["value"]: item["count"] for item in items} for facet, items in payload.items()}
+
+
+@pytest.mark.asyncio
+async def test_book_facets_follow_catalog_changes(client, db_session, auth_headers):
+    from sqlalchemy import select
+
+    from app.crud.book_facets import crud_book_facets
+    from app.models import Book
+
+    books = []
+    for title, author, subject, year, copies in (
+        ("Dune", "Frank Herbert", "Science Fiction", 1965, 1),
+        ("Children of Dune", "Frank Herbert", "Science Fiction", 1976, 2),
+        ("Beloved", "Toni Morrison", "Fiction", 1987, 1),
+        ("Untitled Notes", "Anonymous", None, None, 1),
+    ):
+        created = await client.post(
+            "/books",
+            json={"title": title, "author": author, "subject": subject, "published_year": year, "copies_total": copies},
+            headers=auth_headers,
+        )
+        books.append(created.json())
+    reader = (await client.post("/users", json={"name": "Facet Reader"}, headers=auth_headers)).json()
+
+    facets = await client.get("/books/facets", headers=auth_headers)
+    assert facets.status_code == 200
+    assert _facets(facets.json()) == {
+        "author": {"Frank Herbert": 2, "Toni Morrison": 1, "Anonymous": 1},
+        "subject": {"Science Fiction": 2, "Fiction": 1},
+        "decade": {"1960s": 1, "1970s": 1, "1980s": 1},
+        "availability": {"available": 4},
+    }
+
+    loan = await client.post(
+        "/loans/borrow", json={"book_id": books[0]["id"], "user_id": reader["id"], "days": 7}, headers=auth_headers
+    )
+    await client.post(
+        "/loans/borrow", json={"book_id": books[1]["id"], "user_id": reader["id"], "days": 7}, headers=auth_headers
+    )
+    await client.patch(
+        f"/books/{books[2]['id']}", json={"subject": "Literature", "published_year": 1993}, headers=auth_headers
+    )
+    await client.delete(f"/books/{books[3]['id']}", headers=auth_headers)
+
+    expected = {
+        "author": {"Frank Herbert": 2, "Toni Morrison": 1},
+        "subject": {"Science Fiction": 2, "Literature": 1},
+        "decade": {"1960s": 1, "1970s": 1, "1990s": 1},
+        "availability": {"available": 2, "unavailable": 1},
+    }
+    assert _facets((await client.get("/books/facets", headers=auth_headers)).json()) == expected
+    # The maintained aggregate agrees with counting the books from scratch.
+    live = await crud_book_facets.live_counts(db_session, select(Book), limit=50)
+    assert _facets(live) == expected
+
+    await client.post(f"/loans/{loan.json()['id']}/return", headers=auth_headers)
+    herbert = await client.get("/books/facets?q=dune", headers=auth_headers)
+    assert _facets(herbert.json()) == {
+        "author": {"Frank Herbert": 2},
+        "subject": {"Science Fiction": 2},
+        "decade": {"1960s": 1, "1970s": 1},
+        "availability": {"available": 2},
+    }
+    available = await client.get("/books/facets?availability=unavailable", headers=auth_headers)
+    assert _facets(available.json())["availability"] == {}
+
+
+@pytest.mark.asyncio
+async def test_book_facet_counts_are_backfilled_when_the_table_is_created(client, db_session, auth_headers):
+    from app.db import Base
+    from app.models import BookFacetCount
+
+    for title, subject in (("Old One", "History"), ("Old Two", "History"), ("Old Three", None)):
+        await client.post(
+            "/books",
+            json={"title": title, "author": "Archivist", "subject": subject, "published_year": 1954, "copies_total": 1},
+            headers=auth_headers,
+        )
+    # AUTO_CREATE_SCHEMA adding the aggregate table next to an existing catalog.
+    async with db_session.bind.begin() as conn:
+        await conn.run_sync(BookFacetCount.__table__.drop)
+        await conn.run_sync(Base.metadata.create_all)
+
+    facets = await client.get("/books/facets", headers=auth_headers)
+    assert _facets(facets.json()) == {
+        "author": {"Archivist": 3},
+        "subject": {"History": 2},
+        "decade": {"1950s": 3},
+        "availability": {"available": 3},
+    }
+
+
+def test_book_search_uses_the_indexed_vector_on_postgres():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from app.crud.books import crud_books, prefix_tsquery
+    from app.models import Book
+
+    assert prefix_tsquery("Tolkien, J.R.R.") == "tolkien:* & j:* & r:* & r:*"
+    assert prefix_tsquery("  --  ") is None
+
+    def compile(stmt):
+        return str(
+            stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        ).replace("%%", "%")
+
+    stmt, relevance = crud_books.apply_search(select(Book), "ography", "postgresql")
+    sql = compile(stmt.order_by(relevance.desc()))
+    assert "books.search_vector @@ to_tsquery('simple'::regconfig, 'ography:*')" in sql
+    assert "ts_rank(books.search_vector" in sql
+    # Mid-word fragments and the subject/rack columns keep substring matching.
+    for column in ("title", "author", "isbn", "subject", "rack_number"):
+        assert f"books.{column} ILIKE '%ography%'" in sql
+    # Input without word characters keeps the substring fallback only.
+    fallback = compile(crud_books.apply_search(select(Book), "--", "postgresql")[0])
+    assert "books.title ILIKE '%--%'" in fallback
+    assert "search_vector" not in fallback
@@ -1,7 +1,14 @@
 import pytest
 
 from app.models import Book, Loan
-from app.utils.request_context import get_actor_role, get_actor_user_id
+from app.utils.request_context import (
+    begin_created_entity_capture,
+    end_created_entity_capture,
+    get_actor_role,
+    get_actor_user_id,
+    get_created_entity_id,
+    publish_created_entity,
+)
 
 
 from tests.constants import TEST_AUTH_VALUE
@@ -103,3 +110,20 @@ async def test_request_context_cleared_after_request(client, auth_headers):
     assert response.status_code == 201
     assert get_actor_user_id() is None
     assert get_actor_role() is None
+
+
+def test_created_entity_channel_keeps_first_id_per_entity():
+    publish_created_entity("books", 1)
+    assert get_created_entity_id("books") is None
+
+    token = begin_created_entity_capture()
+    try:
+        publish_created_entity("books", 5)
+        publish_created_entity("books", 6)
+        publish_created_entity("loans", 9)
+        assert get_created_entity_id("books") == 5
+        assert get_created_entity_id("loans") == 9
+        assert get_created_entity_id("users") is None
+    finally:
+        end_created_entity_capture(token)
+    assert get_created_entity_id("books") is None
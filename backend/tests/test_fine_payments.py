@@ -75,6 +75,13 @@ async def test_fine_payment_collection_and_summary(client, db_session):
     assert pay.json()["payment_mode"] == "upi"
     assert pay.json()["amount"] == 2.0
 
+    # The audit row names the payment its diff describes, not the loan in the path.
+    logs = await client.get("/audit/logs?method=POST", headers=admin_headers)
+    payment_log = next(item for item in logs.json() if item["path"] == f"/loans/{loan_id}/fine-payments")
+    assert payment_log["entity"] == "fine_payments"
+    assert payment_log["entity_id"] == pay.json()["id"]
+    assert payment_log["change_diff"]["_created"]["to"]["loan_id"] == loan_id
+
     payments = await client.get(f"/loans/{loan_id}/fine-payments", headers=admin_headers)
     assert payments.status_code == 200
     assert len(payments.json()) == 1
@@ -86,3 +86,72 @@ async def test_delete_constraints(client, auth_headers):
 
     delete_user = await client.delete(f"/users/{user['id']}", headers=auth_headers)
     assert delete_user.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_loan_search_matches_ids_exactly_and_text_by_substring(client, auth_headers):
+    users = [
+        (
+            await client.post(
+                "/users", json={"name": f"Reader {index}", "email": f"r{index}@search.dev"}, headers=auth_headers
+            )
+        ).json()
+        for index in range(3)
+    ]
+    loan_ids = []
+    for index in range(12):
+        book = (
+            await client.post(
+                "/books", json={"title": f"Searchable {index}", "author": "A", "copies_total": 1}, headers=auth_headers
+            )
+        ).json()
+        borrow = await client.post(
+            "/loans/borrow",
+            json={"book_id": book["id"], "user_id": users[index // 4]["id"], "days": 7},
+            headers=auth_headers,
+        )
+        loan_ids.append(borrow.json()["id"])
+
+    by_id = await client.get("/loans?q=11", headers=auth_headers)
+    assert by_id.status_code == 200
+    # Loan/book 11 by id plus the "Searchable 11" title; a text match on ids
+    # would also have returned loans 1 and 10.
+    assert {loan["id"] for loan in by_id.json()} == {11, loan_ids[11]}
+    by_title = await client.get("/loans?q=searchable%201&fuzzy=true", headers=auth_headers)
+    assert {loan["id"] for loan in by_title.json()} == {loan_ids[1], loan_ids[10], loan_ids[11]}
+
+
+@pytest.mark.asyncio
+async def test_loan_cursor_pagination_walks_datetime_keys(client, auth_headers):
+    user = (
+        await client.post("/users", json={"name": "Pager", "email": "pager@loans.dev"}, headers=auth_headers)
+    ).json()
+    loan_ids = []
+    for index in range(5):
+        book = (
+            await client.post(
+                "/books", json={"title": f"Paged {index}", "author": "A", "copies_total": 1}, headers=auth_headers
+            )
+        ).json()
+        borrow = await client.post(
+            "/loans/borrow",
+            json={"book_id": book["id"], "user_id": user["id"], "days": 7 + index % 2},
+            headers=auth_headers,
+        )
+        loan_ids.append(borrow.json()["id"])
+    for loan_id in loan_ids[:2]:
+        assert (await client.post(f"/loans/{loan_id}/return", headers=auth_headers)).status_code == 200
+
+    for sort_by in ("borrowed_at", "due_at", "returned_at"):
+        by_offset = (await client.get(f"/loans?sort_by={sort_by}", headers=auth_headers)).json()
+        walked, cursor = [], None
+        for _ in range(len(loan_ids)):
+            suffix = f"&cursor={cursor}" if cursor else ""
+            page = await client.get(f"/loans?sort_by={sort_by}&limit=2{suffix}", headers=auth_headers)
+            assert page.status_code == 200
+            walked.extend(page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert [loan["id"] for loan in walked] == [loan["id"] for loan in by_offset]
+        assert len(walked) == len(loan_ids)
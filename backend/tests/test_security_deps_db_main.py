@@ -1,6 +1,8 @@
 import pytest
 from fastapi import HTTPException
 from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.responses import JSONResponse
 
 from app import db as db_module
 from app import main as main_module
@@ -11,8 +13,16 @@ from app.deps import (
     require_admin_or_bootstrap_for_user_create,
     require_roles,
 )
-from app.schemas.users import UserCreate
-from app.utils.security import create_access_token, decode_access_token
+from app.middleware import PipelineStage, RequestPipelineMiddleware
+from app.schemas.users import UserCreate, UserUpdate
+from app.utils import security as security_module
+from app.utils.principal_cache import Principal, principal_cache
+from app.utils.security import (
+    VerifiedTokenCache,
+    create_access_token,
+    decode_access_token,
+    verify_access_token,
+)
 from tests.constants import TEST_AUTH_VALUE
 
 
@@ -30,6 +40,109 @@ async def test_decode_access_token_rejects_invalid_and_missing_claims():
         decode_access_token(token_missing_claims)
 
 
+@pytest.mark.asyncio
+async def test_verified_token_cache_decodes_once_until_expiry(monkeypatch):
+    decode_calls = []
+    original_decode = security_module.decode_access_token
+
+    def counting_decode(token):
+        decode_calls.append(token)
+        return original_decode(token)
+
+    monkeypatch.setattr(security_module, "decode_access_token", counting_decode)
+    token = create_access_token(user_id=7, role="staff", subject="cache@test.dev")
+    assert verify_access_token(token)["uid"] == 7
+    assert verify_access_token(token)["uid"] == 7
+    assert len(decode_calls) == 1
+
+    with pytest.raises(ValueError):
+        verify_access_token("not-a-jwt")
+
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.put("expired", {"uid": 1, "exp": 1})
+    assert cache.get("expired") is None
+    for name in ("a", "b", "c"):
+        cache.put(name, {"uid": 1, "exp": 4102444800})
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_authenticated_request_verifies_token_once(client, auth_headers, monkeypatch):
+    decode_calls = []
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(args[0])
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(security_module.jwt, "decode", counting_decode)
+    security_module.verified_token_cache.clear()
+    for _ in range(3):
+        response = await client.get("/books", headers=auth_headers)
+        assert response.status_code == 200
+    assert len(decode_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_skips_user_lookup_and_tracks_updates(client, db_session, auth_headers, monkeypatch):
+    staff = await client.post(
+        "/users",
+        json={"name": "Desk Staff", "email": "desk@test.dev", "role": "staff", "password": TEST_AUTH_VALUE},
+        headers=auth_headers,
+    )
+    staff_id = staff.json()["id"]
+    login = await client.post("/auth/login", json={"email": "desk@test.dev", "password": TEST_AUTH_VALUE})
+    staff_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    first = await client.get("/auth/me", headers=staff_headers)
+    assert first.json()["role"] == "staff"
+    assert isinstance(principal_cache.get(staff_id), Principal)
+
+    original_get = db_session.get
+
+    async def guarded_get(model, ident, *args, **kwargs):
+        assert not (model.__name__ == "User" and ident == staff_id), "principal should come from cache"
+        return await original_get(model, ident, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "get", guarded_get)
+    assert (await client.get("/loans", headers=staff_headers)).status_code == 200
+    monkeypatch.undo()
+
+    demoted = await client.patch(f"/users/{staff_id}", json={"role": "member"}, headers=auth_headers)
+    assert demoted.status_code == 200
+    assert principal_cache.get(staff_id) is None
+    assert (await client.get("/loans", headers=staff_headers)).status_code == 403
+
+    monkeypatch.setattr(principal_cache, "enabled", False)
+    me = await client.get("/users/me", headers=staff_headers)
+    assert me.status_code == 200
+    assert me.json()["role"] == "member"
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_drops_principals_resolved_before_commit(db_session):
+    staff = await crud_users.create(db_session, obj_in=UserCreate(name="Night Desk", role="staff"))
+    member = await crud_users.create(db_session, obj_in=UserCreate(name="Leaving Member"))
+    await db_session.commit()
+    reader_session = async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+    await crud_users.update(db_session, db_obj=staff, obj_in=UserUpdate(role="member"))
+    await crud_users.remove(db_session, obj_id=member.id)
+    # Another request resolves between the flush and the commit and caches
+    # the rows that are still committed.
+    async with reader_session() as reader:
+        assert (await principal_cache.resolve(reader, staff.id)).role == "staff"
+        assert (await principal_cache.resolve(reader, member.id)) is not None
+    await db_session.commit()
+
+    assert principal_cache.get(staff.id) is None
+    assert principal_cache.get(member.id) is None
+    async with reader_session() as reader:
+        assert (await principal_cache.resolve(reader, staff.id)).role == "member"
+        assert await principal_cache.resolve(reader, member.id) is None
+
+
 @pytest.mark.asyncio
 async def test_require_roles_checks_permissions():
     dep = require_roles("admin")
@@ -270,3 +383,63 @@ def test_local_cors_regex_enables_loopback_ports():
         == r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$"
     )
     assert main_module._local_cors_regex("https://example.com") is None
+
+
+class _RecordingStage(PipelineStage):
+    def __init__(self, name, events, short_circuit=None):
+        self.name = name
+        self.events = events
+        self.short_circuit = short_circuit
+
+    async def on_request(self, ctx):
+        self.events.append(f"{self.name}:request")
+        return self.short_circuit
+
+    async def on_response_start(self, ctx):
+        self.events.append(f"{self.name}:start:{ctx.status_code}")
+
+    async def on_complete(self, ctx):
+        self.events.append(f"{self.name}:complete")
+
+
+@pytest.mark.asyncio
+async def test_request_pipeline_runs_stage_hooks_in_order():
+    events = []
+
+    async def downstream(scope, receive, send):
+        events.append("app")
+        await JSONResponse({"ok": True})(scope, receive, send)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/x", "headers": [], "client": ("1.2.3.4", 1)}
+    pipeline = RequestPipelineMiddleware(
+        downstream,
+        stages=[_RecordingStage("a", events), _RecordingStage("b", events)],
+    )
+    await pipeline(scope, None, send)
+    assert events == [
+        "a:request",
+        "b:request",
+        "app",
+        "a:start:200",
+        "b:start:200",
+        "b:complete",
+        "a:complete",
+    ]
+    assert sent[0]["status"] == 200
+
+    events.clear()
+    blocked = RequestPipelineMiddleware(
+        downstream,
+        stages=[
+            _RecordingStage("a", events),
+            _RecordingStage("b", events, short_circuit=JSONResponse({}, status_code=429)),
+            _RecordingStage("c", events),
+        ],
+    )
+    await blocked(scope, None, send)
+    assert events == ["a:request", "b:request", "a:start:429", "b:start:429", "b:complete", "a:complete"]
@@ -0,0 +1,137 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.crud.books import crud_books
+from app.models import Book
+from app.schemas.books import BookCreate
+from app.utils.api_cache import APICache, encode_json
+from app.utils.suggest_index import PrefixIndex, SuggestIndexes, book_suggestions
+
+
+def _titles(payload):
+    return [item["title"] for item in payload]
+
+
+@pytest.mark.asyncio
+async def test_book_suggestions_follow_crud_changes(client, auth_headers):
+    created = {}
+    for title, author, isbn in (
+        ("Dune", "Frank Herbert", "978-0-441-17271-9"),
+        ("Dune Messiah", "Frank Herbert", None),
+        ("Les Misérables", "Victor Hugo", None),
+        ("Dubliners", "James Joyce", None),
+    ):
+        response = await client.post(
+            "/books", json={"title": title, "author": author, "isbn": isbn, "copies_total": 1}, headers=auth_headers
+        )
+        created[title] = response.json()["id"]
+
+    assert _titles((await client.get("/books/suggest?q=dun", headers=auth_headers)).json()) == ["Dune", "Dune Messiah"]
+    assert _titles((await client.get("/books/suggest?q=HERB", headers=auth_headers)).json()) == ["Dune", "Dune Messiah"]
+    assert _titles((await client.get("/books/suggest?q=miser", headers=auth_headers)).json()) == ["Les Misérables"]
+    assert _titles((await client.get("/books/suggest?q=9780441", headers=auth_headers)).json()) == ["Dune"]
+    assert _titles((await client.get("/books/suggest?q=du&limit=1", headers=auth_headers)).json()) == ["Dubliners"]
+
+    await client.patch(f"/books/{created['Dune Messiah']}", json={"title": "Messiah"}, headers=auth_headers)
+    await client.delete(f"/books/{created['Dubliners']}", headers=auth_headers)
+    assert _titles((await client.get("/books/suggest?q=du", headers=auth_headers)).json()) == ["Dune"]
+    assert _titles((await client.get("/books/suggest?q=mess", headers=auth_headers)).json()) == ["Messiah"]
+    stats = await client.get("/admin/metrics/suggest-index", headers=auth_headers)
+    assert stats.json()["books"]["documents"] == 3
+
+
+@pytest.mark.asyncio
+async def test_user_suggestions_match_name_email_and_phone(client, auth_headers):
+    await client.post(
+        "/users",
+        json={"name": "Asha Rao", "email": "asha.rao@library.dev", "phone": "+91 98450 12345"},
+        headers=auth_headers,
+    )
+    for q in ("asha", "rao", "asha.r", "library", "98450", "%2B91 9845"):
+        names = [item["name"] for item in (await client.get(f"/users/suggest?q={q}", headers=auth_headers)).json()]
+        assert names == ["Asha Rao"], q
+    assert (await client.get("/users/suggest?q=zz", headers=auth_headers)).json() == []
+
+
+@pytest.mark.asyncio
+async def test_suggestions_wait_for_commit(db_session):
+    await crud_books.create(db_session, obj_in=BookCreate(title="Rolled Back", author="Nobody", copies_total=1))
+    assert book_suggestions.search("rolled") == []
+    await db_session.rollback()
+    assert book_suggestions.search("rolled") == []
+
+    await crud_books.create(db_session, obj_in=BookCreate(title="Committed", author="Somebody", copies_total=1))
+    await db_session.commit()
+    assert [values[0] for _, values in book_suggestions.search("comm")] == ["Committed"]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_loads_rows_and_replays_concurrent_writes(db_session, monkeypatch):
+    for title in ("Alpha", "Beta"):
+        await crud_books.create(db_session, obj_in=BookCreate(title=title, author="Loader", copies_total=1))
+    await db_session.commit()
+    book_suggestions.clear()
+
+    indexes = SuggestIndexes(
+        async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    )
+    book_suggestions.begin_rebuild()
+    # A write that lands while the rebuild is reading must survive the swap.
+    book_suggestions.upsert(999, ("Gamma", "Writer", None))
+    snapshot = book_suggestions.build([(1, ("Alpha", "Loader", None))])
+    book_suggestions.swap(snapshot)
+    assert [values[0] for _, values in book_suggestions.search("gam")] == ["Gamma"]
+
+    monkeypatch.setattr(settings, "suggest_index_stream_batch_size", 1)
+    await indexes.rebuild()
+    assert [values[0] for _, values in book_suggestions.search("loader")] == ["Alpha", "Beta"]
+    assert indexes.stats()["books"]["loaded"] is True
+
+
+@pytest.mark.asyncio
+async def test_other_workers_changes_reload_only_the_broadcast_ids(db_session):
+    kept = await crud_books.create(db_session, obj_in=BookCreate(title="Original", author="Writer", copies_total=1))
+    await db_session.commit()
+    book_suggestions.upsert(999, ("Ghost", "Gone", None))
+    # Another worker renames one book and deletes another; this worker only
+    # hears about it through the invalidation channel.
+    await db_session.execute(update(Book).where(Book.id == kept.id).values(title="Renamed"))
+    await db_session.commit()
+
+    indexes = SuggestIndexes(
+        async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    )
+    cache = APICache()
+    cache.observe_entities(indexes.observe)
+    await cache.apply_invalidation(
+        encode_json({"origin": "other-worker", "entities": [["books", kept.id], ["books", 999], ["loans", 1]]})
+    )
+    await indexes.refresh_pending()
+    assert [values[0] for _, values in book_suggestions.search("renamed")] == ["Renamed"]
+    assert book_suggestions.search("orig") == []
+    assert book_suggestions.search("ghost") == []
+
+
+def test_prefix_index_memory_is_tracked_and_bounded():
+    index = PrefixIndex("test", ("title", "author"), max_entries=10, max_words=3)
+    index.upsert(1, ("The Name of the Wind", "Patrick Rothfuss"))
+    stats = index.stats()
+    # Three word starts of the title plus two of the author.
+    assert stats["entries"] == 5
+    assert stats["bytes"] > 0
+
+    index.upsert(2, ("A Wizard of Earthsea", "Ursula K. Le Guin"))
+    assert index.stats()["dropped"] == 1
+    assert index.search("wiz") == []
+
+    index.remove(1)
+    assert index.stats() == {
+        "documents": 0,
+        "entries": 0,
+        "max_entries": 10,
+        "dropped": 1,
+        "bytes": 0,
+        "loaded": False,
+    }
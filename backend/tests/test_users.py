@@ -42,3 +42,21 @@ async def test_user_search(client, auth_headers):
     data = resp.json()
     assert len(data) == 1
     assert data[0]["name"] == "Grace Hopper"
+
+
+def test_fuzzy_search_uses_trigram_operators_on_postgres():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from app.crud.search import fuzzy_filter
+    from app.models import User
+
+    condition, score = fuzzy_filter((User.name, User.email), "jonh")
+    sql = str(
+        select(User).where(condition).order_by(score.desc()).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    ).replace("%%", "%")
+    assert "('jonh' <% users.name)" in sql
+    assert "users.email ILIKE '%jonh%'" in sql
+    assert "greatest(word_similarity('jonh', coalesce(users.name, ''))" in sql